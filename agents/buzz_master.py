@@ -7,6 +7,7 @@ from models.youtube_models import StreamMetadataDB, WriteChatModel
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.settings import ModelSettings
 from utils import supabase_util
+from utils.buzz_queue import get_buzz_queue
 
 # Create Agent Instance with System Prompt and Result Type
 buzz_master_agent = Agent(
@@ -77,7 +78,7 @@ async def get_current_buzz(ctx: RunContext[str]) -> str:
             such as a network error or database query failure.
     """
     _ = await get_active_stream(session_id=ctx.deps)
-    return await supabase_util.get_current_buzz(session_id=ctx.deps)
+    return await get_buzz_queue().current(session_id=ctx.deps)
 
 
 @buzz_master_agent.tool
@@ -101,8 +102,8 @@ async def get_next_buzz(ctx: RunContext[str]) -> str:
             such as problems marking the current buzz inactive or fetching the next one.
     """
     _ = await get_active_stream(session_id=ctx.deps)
-    await supabase_util.mark_current_buzz_inactive(session_id=ctx.deps)
-    return await supabase_util.get_current_buzz(session_id=ctx.deps)
+    await get_buzz_queue().retire_current(session_id=ctx.deps)
+    return await get_buzz_queue().current(session_id=ctx.deps)
 
 
 @buzz_master_agent.tool
@@ -1,4 +1,4 @@
-from typing import List
+from typing import AsyncIterator, List
 
 from pydantic_ai.messages import ModelRequest, ModelResponse
 
@@ -13,6 +13,45 @@ from .responder import responder_agent
 from .stream_starter import stream_starter_agent
 
 
+async def _classify_request(
+    request: AgentRequest, human_messages: list[str]
+) -> StreamerIntentEnum:
+    """Makes the request's files RAG ready and classifies the streamer's intent."""
+    # Make file RAG ready
+    if request.files:
+        await create_knowledge_base(request)
+
+    # Get streamer's buzz_type
+    streamer_intent: StreamerIntentEnum = (
+        await intent_util.classify_streamer_intent(
+            messages=human_messages, query=request.query
+        )
+    )
+    print(f"{request.query=}>> {streamer_intent.name=}")
+    return streamer_intent
+
+
+async def _run_command(
+    request: AgentRequest, streamer_intent: StreamerIntentEnum
+) -> str:
+    """Runs the agent of a streamer command, i.e. any intent but UNKNOWN."""
+    if streamer_intent == StreamerIntentEnum.START_STREAM:
+        agent_result = await stream_starter_agent.run(
+            user_prompt=request.query, deps=request.session_id, result_type=str
+        )
+        return agent_result.data + START_STREAM_APPEND
+    if streamer_intent == StreamerIntentEnum.GET_CURRENT_CHAT:
+        user_prompt = "Get current buzz."
+    elif streamer_intent == StreamerIntentEnum.GET_NEXT_CHAT:
+        user_prompt = "Get next buzz."
+    else:
+        user_prompt = f"Extract and store reply from this message:\n{request.query}"
+    agent_result = await buzz_master_agent.run(
+        user_prompt=user_prompt, deps=request.session_id, result_type=str
+    )
+    return agent_result.data
+
+
 async def get_response(
     request: AgentRequest,
     human_messages: list[str],
@@ -44,56 +83,72 @@ async def get_response(
             this function, such as network issues or unexpected model responses.
     """
     try:
-        # Make file RAG ready
-        if request.files:
-            await create_knowledge_base(request)
-
-        # Get streamer's buzz_type
-        streamer_intent: StreamerIntentEnum = (
-            await intent_util.classify_streamer_intent(
-                messages=human_messages, query=request.query
-            )
-        )
-        print(f"{request.query=}>> {streamer_intent.name=}")
+        streamer_intent = await _classify_request(request, human_messages)
 
         # Perform task based on streamer's buzz_type
-        if streamer_intent == StreamerIntentEnum.START_STREAM:
-            agent_result = await stream_starter_agent.run(
-                user_prompt=request.query, deps=request.session_id, result_type=str
-            )
-            response = agent_result.data + START_STREAM_APPEND
-        elif streamer_intent == StreamerIntentEnum.GET_CURRENT_CHAT:
-            agent_result = await buzz_master_agent.run(
-                user_prompt="Get current buzz.",
-                deps=request.session_id,
-                result_type=str,
-            )
-            response = agent_result.data
-        elif streamer_intent == StreamerIntentEnum.GET_NEXT_CHAT:
-            agent_result = await buzz_master_agent.run(
-                user_prompt="Get next buzz.", deps=request.session_id, result_type=str
-            )
-            response = agent_result.data
-        elif streamer_intent == StreamerIntentEnum.REPLY_CHAT:
-            agent_result = await buzz_master_agent.run(
-                user_prompt=f"Extract and store reply from this message:\n{request.query}",
-                deps=request.session_id,
-                result_type=str,
-            )
-            response = agent_result.data
-        else:
-            agent_result = await responder_agent.run(
-                user_prompt=request.query,
-                deps=request.session_id,
-                result_type=str,
-                message_history=messages,
-            )
-            response = agent_result.data
-
-        return response
+        if streamer_intent != StreamerIntentEnum.UNKNOWN:
+            return await _run_command(request, streamer_intent)
+        agent_result = await responder_agent.run(
+            user_prompt=request.query,
+            deps=request.session_id,
+            result_type=str,
+            message_history=messages,
+        )
+        return agent_result.data
     except UserError as ue:
         print(f"Error>> get_response: {str(ue)}")
         raise
     except Exception as e:
         print(f"Error>> get_response: {str(e)}")
         raise
+
+
+async def stream_response(
+    request: AgentRequest,
+    human_messages: list[str],
+    messages: List[ModelRequest | ModelResponse],
+) -> AsyncIterator[str]:
+    """Streams the response to a user's request as the model produces it.
+
+    This function dispatches the request like `get_response`. Answers of the
+    responder agent are streamed token by token; streamer commands are run by
+    tool-calling agents whose answer is only known at the end, so it is yielded
+    as a single chunk.
+
+    Args:
+        request: An AgentRequest object containing the user's query, session ID, and
+            any associated files.
+        human_messages: A list of strings representing the history of human
+            messages in the current conversation.
+        messages: A list of ModelRequest or ModelResponse objects representing
+            the history of model messages in the current conversation.
+
+    Yields:
+        The response, in chunks of text. Joined, they form the full response.
+
+    Raises:
+        UserError: If a user-related error occurs during processing, such as
+            invalid input or a problem with user-specific data.
+        Exception: If any other unexpected error occurs during the execution of
+            this function, such as network issues or unexpected model responses.
+    """
+    try:
+        streamer_intent = await _classify_request(request, human_messages)
+
+        if streamer_intent != StreamerIntentEnum.UNKNOWN:
+            yield await _run_command(request, streamer_intent)
+            return
+        async with responder_agent.run_stream(
+            user_prompt=request.query,
+            deps=request.session_id,
+            result_type=str,
+            message_history=messages,
+        ) as result:
+            async for delta in result.stream_text(delta=True):
+                yield delta
+    except UserError as ue:
+        print(f"Error>> stream_response: {str(ue)}")
+        raise
+    except Exception as e:
+        print(f"Error>> stream_response: {str(e)}")
+        raise
@@ -0,0 +1,69 @@
+"""Placeholder environment for running benchmarks without real credentials.
+
+Import this module before any StreamBuzz module. Values already present in the
+environment (or in `.env`) are left untouched.
+"""
+import json
+import os
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+BENCH_ENV = {
+    "OPEN_ROUTER_API_KEY": "bench-open-router-key",
+    "GEMINI_API_KEY": "bench-gemini-key",
+    "SUPABASE_URL": "http://127.0.0.1:54321",
+    "SUPABASE_SERVICE_KEY": "bench.service.key",
+    "API_BEARER_TOKEN": "bench-token",
+    "YOUTUBE_API_KEY_BUNCHES": json.dumps(
+        [
+            {
+                "api_key": f"BENCH_KEY_{index}",
+                "client_id": f"BENCH_CLIENT_{index}",
+                "client_secret": f"BENCH_SECRET_{index}",
+                "refresh_token": f"BENCH_REFRESH_{index}",
+                "access_token": f"BENCH_ACCESS_{index}",
+            }
+            for index in range(3)
+        ]
+    ),
+}
+
+for name, value in BENCH_ENV.items():
+    os.environ.setdefault(name, value)
+
+BENCH_KEY_BUNCHES = json.loads(BENCH_ENV["YOUTUBE_API_KEY_BUNCHES"])
+"""Fake YouTube key bunches that skip the OAuth refresh during benchmarks."""
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Returns the `pct` percentile of `samples` using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    """Serves `app` on its own thread and event loop.
+
+    Running stand-in servers off the benchmark's loop keeps their work out of the
+    latencies being measured.
+
+    Args:
+        app: The ASGI application to serve.
+        port: The local port to listen on.
+
+    Returns:
+        The running `uvicorn.Server`; set `should_exit = True` to stop it.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
@@ -0,0 +1,69 @@
+"""Measures import time and memory of StreamBuzz modules in fresh interpreters.
+
+Each measurement runs in its own Python process, so nothing is cached between
+them. The lazy resources are reported as loaded or not after the import, and the
+time to first use of the sentence transformer is measured separately.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, sys, time
+import benchmarks.bench_env
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter() - started
+from utils import resource_util
+loaded = resource_util.loaded_resources()
+first_use = None
+if {first_use}:
+    started = time.perf_counter()
+    resource_util.get_resource("nlp_model")
+    first_use = time.perf_counter() - started
+print(json.dumps({{
+    "import": imported,
+    "first_use": first_use,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+    "loaded": loaded,
+}}))
+"""
+
+
+def measure(module: str, first_use: bool) -> dict:
+    """Imports `module` in a fresh interpreter and returns its measurements."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, first_use=first_use)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int) -> None:
+    for module, first_use in (("constants.constants", False), ("streambuzz", True)):
+        samples = [measure(module, first_use) for _ in range(runs)]
+        import_time = statistics.median(sample["import"] for sample in samples)
+        max_rss = statistics.median(sample["max_rss_mb"] for sample in samples)
+        print(
+            f"import {module}: {import_time * 1000:.0f}ms, max RSS {max_rss:.0f}MB, "
+            f"torch imported={samples[-1]['torch_imported']}, "
+            f"resources loaded={samples[-1]['loaded']}"
+        )
+        if first_use:
+            first_use_time = statistics.median(sample["first_use"] for sample in samples)
+            print(f"  first use of nlp_model: {first_use_time * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    main(args.runs)
@@ -0,0 +1,117 @@
+"""Measures /api/v1/streambuzz latency while chat polling hits the database.
+
+A fake PostgREST server stands in for Supabase. Polling workers keep issuing the
+database round trips of the scheduled jobs (next page updates, multi-row buzz
+inserts and buzz claims, which no cache serves) while requests are sent to
+/api/v1/streambuzz. The orchestrator is replaced by a no-op so only the
+endpoint's own database work is measured. Every request uses a new session, so
+its history load misses `session_history_cache` and goes to the database; its
+messages are queued by the write-behind `message_writer`, which is not timed.
+
+Run from the repository root:
+    python -m benchmarks.bench_supabase_latency --requests 200 --pollers 100
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from benchmarks.bench_env import percentile
+from benchmarks.fake_postgrest_server import start_in_thread
+import streambuzz
+from constants.constants import (BUZZ_CLAIM_BATCH_SIZE, BUZZ_MAX_ATTEMPTS,
+                                 BUZZ_VISIBILITY_TIMEOUT)
+from models.youtube_models import StreamBuzzModel
+from utils import supabase_util
+
+
+async def no_op_response(request, human_messages, messages) -> str:
+    return f"Echo: {request.query}"
+
+
+async def poll_database(stop: asyncio.Event, index: int) -> None:
+    """Issues the uncached database round trips of one stream until stopped."""
+    buzz_list = [
+        StreamBuzzModel(
+            session_id=f"poller-{index}",
+            original_chat="How do I join the hackathon?",
+            author="@viewer",
+            buzz_type="QUESTION",
+            generated_response="",
+        )
+    ] * 5
+    while not stop.is_set():
+        await supabase_util.update_next_chat_page(f"chat-{index}", "page")
+        await supabase_util.store_buzz_batch(buzz_list)
+        await supabase_util.claim_buzz(
+            f"poller-{index}",
+            BUZZ_CLAIM_BATCH_SIZE,
+            BUZZ_VISIBILITY_TIMEOUT,
+            BUZZ_MAX_ATTEMPTS,
+        )
+
+
+async def send_requests(requests: int, concurrency: int) -> list[float]:
+    """Sends requests to /api/v1/streambuzz and returns their latencies."""
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {os.environ['API_BEARER_TOKEN']}"}
+    transport = httpx.ASGITransport(app=streambuzz.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def send(index: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await client.post(
+                    "/api/v1/streambuzz",
+                    headers=headers,
+                    json={
+                        "query": "What is the current buzz?",
+                        "user_id": "bench-user",
+                        "request_id": f"request-{index}",
+                        "session_id": f"session-{index}",
+                    },
+                )
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(send(index) for index in range(requests)))
+    return latencies
+
+
+async def main(requests: int, concurrency: int, pollers: int) -> None:
+    streambuzz.orchestrator.get_response = no_op_response
+    stop = asyncio.Event()
+    polling = [asyncio.create_task(poll_database(stop, index)) for index in range(pollers)]
+    try:
+        latencies = await send_requests(requests, concurrency)
+    finally:
+        stop.set()
+        await asyncio.gather(*polling, return_exceptions=True)
+
+    print(f"requests={requests} concurrency={concurrency} pollers={pollers}")
+    print(
+        "/api/v1/streambuzz latency: "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"max={max(latencies, default=0) * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--pollers", type=int, default=100)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    # The stand-in listens where SUPABASE_URL points (see bench_env)
+    server = start_in_thread(urlparse(os.environ["SUPABASE_URL"]).port, args.latency)
+    try:
+        asyncio.run(main(args.requests, args.concurrency, args.pollers))
+    finally:
+        server.should_exit = True
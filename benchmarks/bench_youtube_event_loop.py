@@ -0,0 +1,87 @@
+"""Measures event-loop latency while many live chats are polled at once.
+
+A probe coroutine sleeps for a fixed tick and records how late it wakes up.
+With a blocking transport the lag grows with every in-flight YouTube call; with
+the pooled async transport it should stay in the low milliseconds.
+
+Run from the repository root:
+    python -m benchmarks.bench_youtube_event_loop --streams 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from benchmarks.bench_env import BENCH_KEY_BUNCHES, percentile
+from benchmarks.fake_youtube_server import start_in_thread
+from utils import http_util, youtube_util
+
+PROBE_TICK = 0.01
+
+
+async def fake_key_bunches() -> list[dict]:
+    """Returns the fake key bunches without refreshing their OAuth tokens."""
+    return BENCH_KEY_BUNCHES
+
+
+async def probe_event_loop(lags: list[float], stop: asyncio.Event) -> None:
+    """Records how much later than `PROBE_TICK` the event loop wakes the probe."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_TICK)
+        lags.append(time.perf_counter() - started - PROBE_TICK)
+
+
+async def poll_streams(base_url: str, streams: int) -> float:
+    """Fetches one live chat page for `streams` chats concurrently.
+
+    Returns:
+        The wall time of the whole fan-out in seconds.
+    """
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            youtube_util.get_request_with_retries(
+                url=f"{base_url}/youtube/v3/liveChat/messages",
+                params={"part": "snippet, authorDetails", "liveChatId": f"chat-{index}"},
+                session_id=f"session-{index}",
+                use_keys=True,
+            )
+            for index in range(streams)
+        )
+    )
+    return time.perf_counter() - started
+
+
+async def main(port: int, streams: int, latency: float) -> None:
+    server = start_in_thread(port, latency)
+    youtube_util.get_youtube_api_key_bunches = fake_key_bunches
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_event_loop(lags, stop))
+    try:
+        wall_time = await poll_streams(f"http://127.0.0.1:{port}", streams)
+    finally:
+        stop.set()
+        await probe
+        await http_util.close_http_client()
+        server.should_exit = True
+
+    print(f"streams={streams} server_latency={latency:.3f}s")
+    print(f"fan-out wall time: {wall_time:.3f}s")
+    print(
+        "event-loop lag: "
+        f"p50={percentile(lags, 50) * 1000:.2f}ms "
+        f"p99={percentile(lags, 99) * 1000:.2f}ms "
+        f"max={max(lags, default=0) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args.port, args.streams, args.latency))
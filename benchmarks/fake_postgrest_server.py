@@ -0,0 +1,68 @@
+"""A local stand-in for the Supabase PostgREST API used by the benchmarks.
+
+Every table endpoint waits for a configurable latency and answers with an empty
+result (or echoes inserted rows), which is enough to exercise the data-access
+layer's concurrency without a database.
+
+Run standalone with:
+    python -m benchmarks.fake_postgrest_server --port 54321 --latency 0.05
+"""
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from benchmarks.bench_env import serve_in_thread
+
+app = FastAPI()
+app.state.latency = 0.05
+
+
+@app.post("/rest/v1/rpc/{function_name}")
+async def call_function(request: Request, function_name: str):
+    await asyncio.sleep(request.app.state.latency)
+    return True if function_name == "try_acquire_lease" else []
+
+
+@app.get("/rest/v1/{table}")
+async def select_rows(request: Request, table: str):
+    await asyncio.sleep(request.app.state.latency)
+    return []
+
+
+@app.post("/rest/v1/{table}")
+async def insert_rows(request: Request, table: str):
+    await asyncio.sleep(request.app.state.latency)
+    rows = await request.json()
+    return rows if isinstance(rows, list) else [rows]
+
+
+@app.patch("/rest/v1/{table}")
+@app.delete("/rest/v1/{table}")
+async def modify_rows(request: Request, table: str):
+    await asyncio.sleep(request.app.state.latency)
+    return []
+
+
+def start_in_thread(port: int, latency: float) -> uvicorn.Server:
+    """Starts the fake PostgREST server on its own thread.
+
+    Args:
+        port: The local port to listen on.
+        latency: Seconds each endpoint waits before responding.
+
+    Returns:
+        The running `uvicorn.Server`; set `should_exit = True` to stop it.
+    """
+    app.state.latency = latency
+    return serve_in_thread(app, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,85 @@
+"""A local stand-in for the YouTube Data API used by the benchmarks.
+
+Serves `videos` and `liveChat/messages` with a configurable latency so the
+transport can be exercised without quota or credentials.
+
+Run standalone with:
+    python -m benchmarks.fake_youtube_server --port 8765 --latency 0.5
+"""
+import argparse
+import asyncio
+import itertools
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from benchmarks.bench_env import serve_in_thread
+
+app = FastAPI()
+app.state.latency = 0.5
+app.state.polling_interval_millis = 5000
+_page_counter = itertools.count()
+
+
+@app.get("/youtube/v3/liveChat/messages")
+async def list_live_chat_messages(request: Request, liveChatId: str):
+    await asyncio.sleep(request.app.state.latency)
+    page = next(_page_counter)
+    return {
+        "nextPageToken": f"page-{page}",
+        "pollingIntervalMillis": request.app.state.polling_interval_millis,
+        "items": [
+            {
+                "snippet": {"displayMessage": f"Question {page}-{index} from {liveChatId}?"},
+                "authorDetails": {"displayName": f"viewer{index}"},
+            }
+            for index in range(5)
+        ],
+    }
+
+
+@app.post("/youtube/v3/liveChat/messages")
+async def insert_live_chat_message(request: Request):
+    await asyncio.sleep(request.app.state.latency)
+    return await request.json()
+
+
+@app.get("/youtube/v3/videos")
+async def list_videos(request: Request, id: str):
+    await asyncio.sleep(request.app.state.latency)
+    return {
+        "items": [
+            {
+                "id": id,
+                "snippet": {
+                    "title": "Fake stream",
+                    "channelTitle": "Fake channel",
+                    "thumbnails": {"high": {"url": "http://127.0.0.1/thumb.png"}},
+                },
+                "liveStreamingDetails": {"activeLiveChatId": f"chat-{id}"},
+            }
+        ]
+    }
+
+
+def start_in_thread(port: int, latency: float) -> uvicorn.Server:
+    """Starts the fake YouTube server on its own thread.
+
+    Args:
+        port: The local port to listen on.
+        latency: Seconds each endpoint waits before responding.
+
+    Returns:
+        The running `uvicorn.Server`; set `should_exit = True` to stop it.
+    """
+    app.state.latency = latency
+    return serve_in_thread(app, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
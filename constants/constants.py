@@ -1,11 +1,7 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
-from openai import OpenAI
-from pydantic_ai.models.gemini import GeminiModel
-from pydantic_ai.models.openai import OpenAIModel
-from sentence_transformers import SentenceTransformer
-from supabase import create_client
 
 load_dotenv()
 
@@ -26,12 +22,112 @@ MAX_FILE_SIZE_B = MAX_FILE_SIZE_MB * 1024 * 1024  # 5MB
 
 # Intents
 CHAT_READ_INTERVAL = 30
-"""Interval in seconds to read chat messages."""
+"""Initial interval in seconds to read chat messages of a stream."""
 CHAT_WRITE_INTERVAL = 60
 """Interval in seconds to write chat messages."""
+ACTIVE_STREAM_CACHE_TTL = 30
+"""Time in seconds the active streams are cached in each worker.
+
+    Streams started or stopped through a worker update its cache right away; other
+    workers see the change within this time.
+"""
+CHAT_POLL_TICK_INTERVAL = 5
+"""Interval in seconds at which streams that are due are dispatched for polling.
+
+    Each stream keeps its own poll interval (starting at `CHAT_READ_INTERVAL`);
+    this tick only bounds how late a due stream can be picked up.
+"""
+MIN_POLL_INTERVAL = 5
+"""Lower bound in seconds for a stream's poll interval."""
+MAX_POLL_INTERVAL = 120
+"""Upper bound in seconds for a stream's poll interval."""
+POLL_BACKOFF_FACTOR = 1.5
+"""Factor by which a quiet stream's poll interval grows after an empty page."""
+POLL_SPEEDUP_FACTOR = 2
+"""Factor by which a busy stream's poll interval shrinks after a full page."""
+POLL_BUSY_THRESHOLD = 20
+"""Number of chats in a page from which a stream is considered busy."""
+STREAM_POLL_CONCURRENCY = 50
+"""Maximum number of active streams polled concurrently in one read tick."""
+STREAM_POLL_TIMEOUT = CHAT_POLL_TICK_INTERVAL - 1
+"""Deadline in seconds for fetching one stream's chats in a read tick.
+
+    Kept below `CHAT_POLL_TICK_INTERVAL`. Overlapping ticks are skipped, so a
+    longer deadline would let one slow stream hold back the next polls of every
+    stream.
+"""
+BUZZ_TYPES = ["QUESTION", "CONCERN", "REQUEST"]
+"""Chat intents that are stored as buzz."""
+CHAT_BATCH_TOKEN_BUDGET = 3000
+"""Approximate number of chat tokens sent to the LLM in one classification call."""
+CHAT_BATCH_MAX_SIZE = 100
+"""Maximum number of chats sent to the LLM in one classification call."""
+CHAT_CLASSIFY_CONCURRENCY = 8
+"""Maximum number of classification calls running concurrently."""
+CHAT_CLASSIFY_TIMEOUT = 30
+"""Deadline in seconds for a single classification call.
+
+    Only the LLM call is time-boxed; time spent waiting for `gemini_rate_limiter`
+    does not count against it.
+"""
+BUZZ_INSERT_BATCH_SIZE = 500
+"""Maximum number of buzz rows written in a single multi-row insert."""
+BUZZ_RESPONSE_CONCURRENCY = 8
+"""Maximum number of buzz responses generated concurrently."""
+BUZZ_RESPONSE_TOKENS = 600
+"""Estimated number of tokens in a generated buzz response of up to 300 words."""
+BUZZ_CLAIM_BATCH_SIZE = 20
+"""Maximum number of buzz claimed from the buzz queue in one page."""
+BUZZ_PROCESS_INTERVAL = 5
+"""Interval in seconds at which queued buzz is claimed and answered.
+
+    Buzz is answered by its own job, so slow LLM calls never hold back the read
+    tick that polls the streams.
+"""
+BUZZ_PAGES_PER_TICK = 5
+"""Maximum number of buzz queue pages processed in one tick.
+
+    Pages are claimed and processed one after the other, so a tick holds at most
+    `BUZZ_CLAIM_BATCH_SIZE` buzz in memory and a large backlog is drained over
+    several ticks instead of stretching one tick.
+"""
+BUZZ_VISIBILITY_TIMEOUT = 300
+"""Time in seconds a claimed buzz stays hidden from other workers.
+
+    A buzz whose worker crashed or stalled is claimable again once its claim is
+    this old, so nothing stays in PROCESSING forever.
+"""
+BUZZ_MAX_ATTEMPTS = 3
+"""Number of failed attempts after which a buzz is given up on and marked INACTIVE.
+
+    Failures that are not the buzz's fault, such as an open circuit breaker, a rate
+    limit or a timeout, do not count.
+"""
 CONVERSATION_CONTEXT = 3
 """Number of previous messages to include in the conversation context."""
-START_STREAM_APPEND = f"\n\nFetching buzz in {CHAT_READ_INTERVAL} seconds..."
+SESSION_HISTORY_WINDOW = 10
+"""Number of latest messages of a session loaded and buffered as its history."""
+SESSION_HISTORY_CACHE_TTL = 60
+"""Time in seconds a session history buffer is used before it is reloaded.
+
+    Messages stored by this worker are appended to the buffer right away; messages
+    stored by other workers show up once the buffer is reloaded.
+"""
+SESSION_HISTORY_CACHE_SIZE = 1000
+"""Maximum number of sessions whose history is buffered in each worker."""
+MESSAGE_FLUSH_INTERVAL = 0.5
+"""Interval in seconds at which queued conversation messages are written."""
+MESSAGE_FLUSH_BATCH_SIZE = 100
+"""Maximum number of queued conversation messages written in one insert."""
+MESSAGE_FLUSH_MAX_ATTEMPTS = 20
+"""Number of failed inserts after which a batch of messages is dropped."""
+MESSAGE_QUEUE_MAX_SIZE = 10000
+"""Maximum number of conversation messages waiting to be written.
+
+    Messages queued while the queue is full are dropped, so a database outage
+    cannot grow the queue without limit.
+"""
+START_STREAM_APPEND = f"\n\nFetching buzz in {CHAT_POLL_TICK_INTERVAL} seconds..."
 """Message appended to start of stream."""
 CONFIDENCE_THRESHOLD = 0.35
 STREAMER_INTENT_EXAMPLES = {
@@ -151,12 +247,96 @@ STREAMER_INTENT_EXAMPLES = {
     This dictionary maps intent names (keys) to lists of example phrases (values)
     that a streamer might use to trigger that intent.
 """
+CHAT_INTENT_CONFIDENCE_THRESHOLD = 0.5
+"""Minimum similarity to a chat intent centroid to classify a chat locally."""
+CHAT_INTENT_MARGIN = 0.1
+"""Minimum lead of the best chat intent over the runner-up to classify locally.
+
+    Chats below the confidence threshold or the margin are ambiguous and are sent
+    to the LLM instead.
+"""
+CHAT_INTENT_EXAMPLES = {
+    "QUESTION": [
+        "How do I join the hackathon?",
+        "What is the deadline for submissions?",
+        "Which library are you using for this?",
+        "Can you explain that again?",
+        "Why did you choose this approach?",
+        "Where can I find the source code?",
+        "When is the next stream?",
+        "Is this available for free?",
+        "What editor is that?",
+        "How does this compare to the previous version?",
+        "Does this work on Windows?",
+        "Who is the speaker today?",
+        "How much does it cost?",
+        "Will the recording be available later?",
+    ],
+    "CONCERN": [
+        "The audio is not working",
+        "I can't hear anything",
+        "The stream keeps buffering",
+        "The video is lagging a lot",
+        "The screen is too blurry to read",
+        "The link in the description is broken",
+        "I am worried this is not secure",
+        "This is too fast, I can't keep up",
+        "My registration failed",
+        "The website is down",
+        "I didn't get the confirmation email",
+        "The mic is too quiet",
+        "The sound is out of sync",
+        "I am unable to log in",
+    ],
+    "REQUEST": [
+        "Please share the slides",
+        "Can you zoom in on the code?",
+        "Please increase the font size",
+        "Share the link to the repo",
+        "Please do a tutorial on deployment",
+        "Make a video about testing next time",
+        "Please slow down a bit",
+        "Could you post the resources in the chat?",
+        "Please turn up the volume",
+        "Do a Q&A session at the end",
+        "Please pin the registration link",
+        "Can you show the demo again?",
+        "Please cover databases in the next stream",
+        "Add subtitles please",
+    ],
+    "UNKNOWN": [
+        "Hi",
+        "Hello everyone",
+        "lol",
+        "First!",
+        "Nice stream",
+        "gg",
+        "🔥🔥🔥",
+        "Hello from India",
+        "Great job",
+        "Love this",
+        "haha",
+        "Awesome",
+        "Good morning",
+        "Thanks",
+    ],
+}
+"""Examples of viewer chat intents and their corresponding phrases.
+
+    Used to classify chats locally. Chats classified as `UNKNOWN` are dropped and
+    the others are stored as buzz, see `BUZZ_TYPES`.
+"""
 
 # Model Constants
-NLP_MODEL = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-"""Sentence Transformer model for generating sentence embeddings.
+NLP_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+"""Name of the Sentence Transformer model used for intent classification."""
+INTENT_CACHE_DIR = os.getenv(
+    "INTENT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "streambuzz_intents")
+)
+"""Directory holding the cached intent centroid matrices.
 
-    This model is used to convert text into numerical vectors that capture semantic meaning.
+    Each cache file is keyed by a hash of `NLP_MODEL_NAME` and the example set, so
+    it is rebuilt only when the model or the examples change.
 """
 EMBEDDING_MODEL_NAME = "models/text-embedding-004"
 """Name of the embedding model.
@@ -169,12 +349,36 @@ EMBEDDING_DIMENSIONS = 768
     This integer represents the number of dimensions in the vector space where text
     is embedded.
 """
+EMBEDDING_BATCH_SIZE = 100
+"""Maximum number of texts embedded in one request, the Gemini batch limit."""
+EMBEDDING_RETRY_ATTEMPTS = 3
+"""Number of attempts to embed a single text after its batch failed."""
+EMBEDDING_RETRY_BASE_DELAY = 1
+"""Delay in seconds before the second attempt of a text, doubled on each retry."""
 CHUNK_SIZE = 1000
 """Size of text chunks used for processing.
 
     This integer defines the maximum number of characters to consider when processing
     text in chunks.
 """
+RAG_SUMMARY_CONCURRENCY = 8
+"""Maximum number of chunks summarised concurrently while ingesting a document."""
+RAG_EMBED_CONCURRENCY = 4
+"""Maximum number of embedding requests running while ingesting a document.
+
+    Each request embeds every chunk waiting at that moment, up to
+    `EMBEDDING_BATCH_SIZE`.
+"""
+RAG_INSERT_CONCURRENCY = 8
+"""Maximum number of chunks stored concurrently while ingesting a document."""
+RAG_QUEUE_SIZE = 32
+"""Maximum number of chunks waiting between two ingestion stages.
+
+    A full queue blocks the stage feeding it, so a slow stage slows the ones before
+    it instead of letting finished chunks pile up in memory.
+"""
+RAG_PROGRESS_STEPS = 10
+"""Number of progress updates logged while ingesting a document."""
 MODEL_RETRIES = 3
 """Number of retries for model calls.
 
@@ -193,23 +397,6 @@ OPEN_ROUTER_MODEL_NAME = "google/gemini-2.0-flash-thinking-exp:free"
 
     This string specifies the name of the model to be used from the Open Router API.
 """
-OPEN_ROUTER_CLIENT = OpenAI(
-    base_url=OPEN_ROUTER_BASE_URL,
-    api_key=os.getenv("OPEN_ROUTER_API_KEY"),
-)
-"""OpenAI client configured for Open Router.
-
-    This instance of the OpenAI client is configured to use the Open Router API.
-"""
-OPEN_ROUTER_MODEL = OpenAIModel(
-    model_name=OPEN_ROUTER_MODEL_NAME,
-    base_url=OPEN_ROUTER_BASE_URL,
-    api_key=os.getenv("OPEN_ROUTER_API_KEY"),
-)
-"""Pydantic-AI OpenAI model configured for Open Router.
-
-    This instance of the Pydantic-AI OpenAI model is configured to use the Open Router API.
-"""
 
 # Gemini Pydantic-AI model related constants - testing
 GEMINI_MODEL_NAME = "gemini-2.0-flash-exp"
@@ -217,20 +404,44 @@ GEMINI_MODEL_NAME = "gemini-2.0-flash-exp"
 
     This string specifies the name of the Gemini model to be used.
 """
-GEMINI_MODEL = GeminiModel(
-    model_name=GEMINI_MODEL_NAME, api_key=os.getenv("GEMINI_API_KEY")
+GEMINI_REQUEST_TIMEOUT = 600
+"""Timeout in seconds for a single Gemini request, as in Pydantic-AI's client."""
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "10"))
+"""Requests per minute allowed by the Gemini quota (RPM)."""
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "4000000"))
+"""Tokens per minute allowed by the Gemini quota (TPM)."""
+GEMINI_EMBEDDING_REQUESTS_PER_MINUTE = int(
+    os.getenv("GEMINI_EMBEDDING_REQUESTS_PER_MINUTE", "1500")
 )
-"""Pydantic-AI Gemini model.
+"""Requests per minute allowed by the Gemini embedding quota."""
+
+# Models and clients used in project, created on first use by utils.resource_util
+LAZY_RESOURCES = {
+    "NLP_MODEL": "nlp_model",
+    "OPEN_ROUTER_CLIENT": "open_router_client",
+    "OPEN_ROUTER_MODEL": "open_router_model",
+    "GEMINI_MODEL": "gemini_model",
+    "PYDANTIC_AI_MODEL": "pydantic_ai_model",
+}
+"""Heavy objects still importable from this module, mapped to their resource names.
 
-   This instance of the Pydantic-AI Gemini model is configured with the API key.
+    `NLP_MODEL` is the Sentence Transformer model, `OPEN_ROUTER_CLIENT` and
+    `OPEN_ROUTER_MODEL` are the OpenAI client and Pydantic-AI model configured for
+    Open Router, `GEMINI_MODEL` is the Pydantic-AI Gemini model and
+    `PYDANTIC_AI_MODEL` is the main model used for generating text responses.
+    Importing any of them creates it, so importing this module stays cheap.
 """
+WARM_UP_RESOURCES = os.getenv("WARM_UP_RESOURCES", "true").lower() == "true"
+"""Whether to create the lazy resources when the application starts."""
 
-# Model used in project
-PYDANTIC_AI_MODEL = GEMINI_MODEL
-"""The Pydantic-AI model used in the project.
 
-    This is the main model used for generating text responses.
-"""
+def __getattr__(name: str):
+    """Resolves the names in `LAZY_RESOURCES` on first access."""
+    if name in LAZY_RESOURCES:
+        from utils import resource_util
+
+        return resource_util.get_resource(LAZY_RESOURCES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # YouTube API related constants
 YOUTUBE_URL_REGEX = r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/[a-zA-Z0-9_\-]+"
@@ -255,14 +466,75 @@ YOUTUBE_LIVE_API_ENDPOINT = "https://www.googleapis.com/youtube/v3/liveChat/mess
 """
 OAUTH_TOKEN_URI = "https://oauth2.googleapis.com/token"
 YOUTUBE_SSL = "https://www.googleapis.com/auth/youtube.force-ssl"
+YOUTUBE_REQUEST_TIMEOUT = 10
+"""Timeout in seconds for a single YouTube API request.
 
-# Supabase setup constants
-SUPABASE_CLIENT = create_client(
-    os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
-)
-"""Supabase client.
+    This value bounds each request attempt, so one slow YouTube call cannot hold a
+    stream's poll for longer than this.
+"""
+YOUTUBE_RETRY_MAX_ATTEMPTS = 4
+"""Maximum number of attempts of a YouTube API request, across keys."""
+YOUTUBE_RETRY_BASE_DELAY = 1
+"""Backoff in seconds before the second attempt; it doubles on each attempt."""
+YOUTUBE_RETRY_MAX_DELAY = 16
+"""Maximum backoff in seconds between two attempts of a YouTube API request."""
+YOUTUBE_RETRY_DEADLINE = 20
+"""Time budget in seconds for all attempts of a YouTube API request."""
+YOUTUBE_POLL_RETRY_DEADLINE = STREAM_POLL_TIMEOUT - 1
+"""Time budget in seconds for all attempts of a live chat poll.
+
+    Kept below `STREAM_POLL_TIMEOUT`, so a poll gives up on its own before it is
+    cancelled. A stream whose poll fails is retried on a later tick.
+"""
+YOUTUBE_DAILY_QUOTA = 10000
+"""Quota units each key bunch may spend per day. Quota resets at midnight Pacific."""
+YOUTUBE_QUOTA_RESET_TIMEZONE = "America/Los_Angeles"
+"""Time zone whose midnight resets the YouTube Data API quota."""
+YOUTUBE_VIDEOS_LIST_COST = 1
+"""Quota units charged for a videos.list call."""
+YOUTUBE_LIVE_CHAT_LIST_COST = 5
+"""Quota units charged for a liveChatMessages.list call."""
+YOUTUBE_LIVE_CHAT_INSERT_COST = 50
+"""Quota units charged for a liveChatMessages.insert call."""
+YOUTUBE_KEY_RATE_LIMIT_COOLDOWN = 60
+"""Time in seconds a key bunch is skipped after hitting a rate limit."""
+YOUTUBE_KEY_FAILURE_THRESHOLD = 3
+"""Number of consecutive failures after which a key bunch is cooled down."""
+YOUTUBE_KEY_FAILURE_COOLDOWN = 30
+"""Time in seconds a key bunch is skipped after repeated failures."""
+YOUTUBE_TOKEN_REFRESH_MARGIN = 300
+"""Time in seconds before an OAuth access token expires at which it is refreshed."""
+YOUTUBE_TOKEN_REFRESH_RETRY_DELAY = 30
+"""Delay in seconds before retrying a failed OAuth access token refresh."""
+YOUTUBE_TOKEN_DEFAULT_LIFETIME = 3600
+"""Assumed lifetime in seconds of an OAuth access token without a known expiry."""
+
+# Circuit breaker constants
+CIRCUIT_FAILURE_THRESHOLD = 5
+"""Number of consecutive failures after which a dependency's circuit opens."""
+CIRCUIT_RESET_TIMEOUT = 30
+"""Time in seconds an open circuit sheds calls before letting a probe through."""
+
+# HTTP client constants
+HTTP_MAX_CONNECTIONS = 200
+"""Maximum number of concurrent connections held by the shared HTTP client."""
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 50
+"""Maximum number of idle keep-alive connections held by the shared HTTP client."""
+HTTP_KEEPALIVE_EXPIRY = 30
+"""Time in seconds after which an idle keep-alive connection is closed."""
+HTTP_CONNECT_TIMEOUT = 5
+"""Timeout in seconds for establishing a new connection."""
 
-    This instance of the Supabase client is configured to interact with the Supabase database.
+# Supabase setup constants
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+"""URL of the Supabase project."""
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+"""Service key used by the Supabase client."""
+SUPABASE_TIMEOUT = 10
+"""Timeout in seconds for a single Supabase query.
+
+    The asynchronous Supabase client itself is created on first use by
+    `supabase_util.get_supabase_client` and shared by every query.
 """
 
 # Table names
@@ -291,3 +563,41 @@ STREAMER_KB = "streamer_knowledge"
 
     This string represents the name of the table storing streamer knowledge base.
 """
+SCHEDULER_LEASES = "scheduler_leases"
+"""Name of the scheduler leases table.
+
+    This string represents the name of the table storing which worker currently runs
+    each scheduled job.
+"""
+
+# Scheduler lease constants
+LEASE_BACKEND = os.getenv("LEASE_BACKEND", "sqlite")
+"""Backend used to elect the worker that runs scheduled jobs.
+
+    "sqlite" coordinates the workers of a single host through a shared database file,
+    "supabase" coordinates workers across hosts through the `SCHEDULER_LEASES` table
+    and "none" runs every job in every worker.
+"""
+LEASE_DB_PATH = os.getenv(
+    "LEASE_DB_PATH", os.path.join(tempfile.gettempdir(), "streambuzz_leases.db")
+)
+"""Path of the SQLite database used by the "sqlite" lease backend."""
+LEASE_TTL = 30
+"""Time in seconds a job lease stays valid without being renewed.
+
+    The holder renews its lease every third of this time while a job is running, so
+    another worker only takes over once the holder has stopped for `LEASE_TTL`.
+"""
+
+# Buzz queue constants
+BUZZ_QUEUE_BACKEND = os.getenv("BUZZ_QUEUE_BACKEND", "supabase")
+"""Backend of the queue that hands out buzz to respond to.
+
+    "supabase" claims rows of the `YT_BUZZ` table through the `claim_buzz` function,
+    so workers on any host can drain buzz in parallel. "sqlite" keeps all buzz in a
+    local database file, for tests and single-host local runs.
+"""
+BUZZ_QUEUE_DB_PATH = os.getenv(
+    "BUZZ_QUEUE_DB_PATH", os.path.join(tempfile.gettempdir(), "streambuzz_buzz.db")
+)
+"""Path of the SQLite database used by the "sqlite" buzz queue backend."""
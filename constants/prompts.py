@@ -11,16 +11,15 @@ Classify original_chat as QUESTION, CONCERN, or REQUEST.
 Rules:
 1. Exclude records classified as Unknown (small talk, hate speech or irrelevant).
 2. Return a JSON list with:
-    - original_chat (unchanged)
-    - author (unchanged)
+    - chat_id (unchanged)
     - intent (QUESTION, CONCERN, or REQUEST).
 3. Ensure intent has only one value.
 
 Input:
-JSON list with original_chat and author.
+JSON list with chat_id and original_chat.
 
 Output:
-JSON list with original_chat, author, and intent.
+JSON list with chat_id and intent.
 """
 
 TITLE_SUMMARY_PROMPT = """
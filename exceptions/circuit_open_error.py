@@ -0,0 +1,23 @@
+class CircuitOpenError(Exception):
+    """
+    Exception raised when a call is rejected by an open circuit breaker.
+
+    The dependency behind the breaker has failed repeatedly, so the call is
+    shed right away instead of waiting for another timeout. It is distinct
+    from the dependency's own errors and does not count as a new failure.
+    """
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        """
+        Initializes a new CircuitOpenError exception.
+
+        Args:
+            name: The name of the dependency whose breaker is open.
+            retry_in: Seconds until the breaker lets a probe call through.
+
+        Returns:
+            None.
+        """
+        super().__init__(f"Circuit for {name} is open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
@@ -0,0 +1,23 @@
+class KeyPoolExhaustedError(Exception):
+    """
+    Exception raised when no YouTube key bunch can afford a call right now.
+
+    Every key bunch is out of daily quota, rate-limited or cooling down after
+    repeated failures, so the call is not made at all. It is a local condition,
+    not a failure of YouTube, and does not count against the YouTube circuit.
+    """
+
+    def __init__(self, quota_cost: int) -> None:
+        """
+        Initializes a new KeyPoolExhaustedError exception.
+
+        Args:
+            quota_cost: The quota units the call would have been charged.
+
+        Returns:
+            None.
+        """
+        super().__init__(
+            f"No YouTube key bunch can afford a call of {quota_cost} units right now"
+        )
+        self.quota_cost = quota_cost
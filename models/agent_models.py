@@ -1,5 +1,5 @@
 # Request/Response Models
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
@@ -49,6 +49,8 @@ class ProcessFoundBuzz:
             "action item", "problem identified").
         original_chat (str): The original text where the buzz was identified. This
             allows for easy reference to the source of the buzz.
+        created_at (Optional[str]): ISO time the buzz was stored. Together with
+            `id` it is the cursor for paging through the buzz queue.
     """
 
     id: int
@@ -56,6 +58,45 @@ class ProcessFoundBuzz:
     author: str
     buzz_type: str
     original_chat: str
+    created_at: Optional[str] = None
+
+
+@dataclass
+class BatchInsertResult:
+    """Outcome of a chunked multi-row insert.
+
+    Each chunk is inserted in a single statement, so a chunk either lands as a
+    whole or fails as a whole. Failed chunks do not stop the remaining ones.
+
+    Attributes:
+        inserted (int): The number of rows that were inserted.
+        failed (List[Any]): The rows of every chunk that failed to insert, so the
+            caller can log or retry them.
+        errors (List[str]): One error message per failed chunk.
+    """
+
+    inserted: int = 0
+    failed: List[Any] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IngestionProgress:
+    """Progress of a document through the ingestion pipeline.
+
+    Attributes:
+        total (int): The number of chunks of the document.
+        summarized (int): The number of chunks given a title and summary.
+        embedded (int): The number of chunks embedded.
+        stored (int): The number of chunks stored in the knowledge base.
+        failed (int): The number of chunks that could not be stored.
+    """
+
+    total: int
+    summarized: int = 0
+    embedded: int = 0
+    stored: int = 0
+    failed: int = 0
 
 
 class AgentRequest(BaseModel):
@@ -78,6 +119,9 @@ class AgentRequest(BaseModel):
             metadata associated with the request. Each dictionary within the list
             represents a file and may contain details such as file name, size,
             and type. Defaults to None if no files are included in the request.
+        stream (bool, optional): Whether to stream the answer back as server-sent
+            events while it is generated, instead of returning an `AgentResponse`
+            once it is stored. Defaults to False.
     """
 
     query: str
@@ -85,6 +129,7 @@ class AgentRequest(BaseModel):
     request_id: str
     session_id: str
     files: Optional[List[Dict[str, Any]]] = None
+    stream: bool = False
 
 
 class AgentResponse(BaseModel):
@@ -139,6 +139,14 @@ class WriteChatModel(BaseModel):
     is_written: Optional[int] = 0
 
 class ChatIntent(BaseModel):
-    original_chat: str
-    author: str
+    """
+    Represents the intent the LLM assigned to one chat of a classification batch.
+
+    Attributes:
+        chat_id (int): The position of the chat in the batch sent to the LLM, used
+            to route the intent back to its chat and session.
+        intent (str): The classified intent (QUESTION, CONCERN, or REQUEST).
+    """
+
+    chat_id: int
     intent: str
\ No newline at end of file
@@ -95,11 +95,86 @@ create table youtube_buzz (
   author text not null,
   generated_response text not null,
   buzz_status smallint not null default '0'::smallint,
+  claimed_by text null,
+  claimed_until timestamp with time zone null,
+  attempts smallint not null default '0'::smallint,
   constraint youtube_buzz_pkey primary key (id)
 ) TABLESPACE pg_default;
 
 create index IF not exists idx_youtube_buzz_session_id on youtube_buzz using btree (session_id) TABLESPACE pg_default;
 create index IF not exists idx_youtube_buzz_created_at on youtube_buzz using btree (created_at) TABLESPACE pg_default;
+create index IF not exists idx_youtube_buzz_status_created_at on youtube_buzz using btree (buzz_status, created_at, id) TABLESPACE pg_default;
+
+-- Existing databases: add the claim columns of the buzz queue
+alter table youtube_buzz
+  add column if not exists claimed_by text null,
+  add column if not exists claimed_until timestamp with time zone null,
+  add column if not exists attempts smallint not null default '0'::smallint;
+
+-- Claims up to batch_size buzz for claim_owner, oldest first. FOUND buzz and
+-- PROCESSING buzz whose claim has expired are claimable; rows locked by another
+-- worker's claim are skipped. An expired claim counts as a failed attempt,
+-- since its worker died or hung; release_buzz counts the other failures. Buzz
+-- that failed max_attempts times is given up on and marked INACTIVE. When a
+-- cursor is given, only buzz after (after_created_at, after_id) is claimed, so
+-- one pass pages through the queue.
+drop function if exists claim_buzz (text, int, int, int);
+create or replace function claim_buzz (
+  claim_owner text,
+  batch_size int,
+  visibility_seconds int,
+  max_attempts int,
+  after_created_at timestamp with time zone default null,
+  after_id bigint default null
+) returns setof youtube_buzz
+language plpgsql
+as $$
+begin
+  update youtube_buzz
+  set buzz_status = 0, claimed_by = null, claimed_until = null,
+    attempts = attempts + 1
+  where buzz_status = 1 and (claimed_until is null or claimed_until < now());
+
+  update youtube_buzz
+  set buzz_status = 3
+  where buzz_status = 0 and attempts >= max_attempts;
+
+  return query
+  update youtube_buzz as b
+  set buzz_status = 1,
+    claimed_by = claim_owner,
+    claimed_until = now() + make_interval(secs => visibility_seconds)
+  where b.id in (
+    select id from youtube_buzz
+    where buzz_status = 0
+      and attempts < max_attempts
+      and (after_created_at is null or (created_at, id) > (after_created_at, after_id))
+    order by created_at, id
+    limit batch_size
+    for update skip locked
+  )
+  returning b.*;
+end;
+$$;
+
+-- Puts a buzz claimed by claim_owner back in the queue, unless it was retired
+-- meanwhile. count_attempt is false when the failure was not the buzz's fault
+-- (an open circuit, a rate limit or a timeout), so an outage does not use up its
+-- attempts.
+create or replace function release_buzz (
+  release_id bigint,
+  claim_owner text,
+  count_attempt boolean
+) returns void
+language sql
+as $$
+  update youtube_buzz
+  set buzz_status = 0,
+    claimed_by = null,
+    claimed_until = null,
+    attempts = attempts + case when count_attempt then 1 else 0 end
+  where id = release_id and claimed_by = claim_owner and buzz_status = 1;
+$$;
 
 
 -- Streamer Replies
@@ -116,4 +191,33 @@ create table youtube_reply (
 
 create index IF not exists idx_youtube_reply_session_id on youtube_reply using btree (session_id) TABLESPACE pg_default;
 create index IF not exists idx_youtube_reply_live_chat_id on youtube_reply using btree (live_chat_id) TABLESPACE pg_default;
-create index IF not exists idx_youtube_reply_created_at on youtube_reply using btree (created_at) TABLESPACE pg_default;
\ No newline at end of file
+create index IF not exists idx_youtube_reply_created_at on youtube_reply using btree (created_at) TABLESPACE pg_default;
+
+-- Scheduler leases: only the worker holding a job's lease runs that job
+create table if not exists scheduler_leases (
+  name text not null,
+  owner text not null,
+  expires_at timestamp with time zone not null,
+  constraint scheduler_leases_pkey primary key (name)
+) TABLESPACE pg_default;
+
+-- Grants or renews a lease atomically. Returns true when lease_owner holds it.
+create or replace function try_acquire_lease (
+  lease_name text,
+  lease_owner text,
+  ttl_seconds int
+) returns boolean
+language plpgsql
+as $$
+declare
+  current_owner text;
+begin
+  insert into scheduler_leases as l (name, owner, expires_at)
+  values (lease_name, lease_owner, now() + make_interval(secs => ttl_seconds))
+  on conflict (name) do update
+    set owner = excluded.owner, expires_at = excluded.expires_at
+    where l.owner = excluded.owner or l.expires_at < now()
+  returning owner into current_owner;
+  return current_owner is not null;
+end;
+$$;
@@ -2,85 +2,218 @@ import asyncio
 import json
 import re
 from collections import defaultdict
-from typing import Any, Dict, List
+from itertools import zip_longest
+from typing import Any, Dict, List, Optional
 
+import httpx
 from fastapi import APIRouter
 
 from agents.buzz_intern import buzz_intern_agent
 from agents.responder import responder_agent
-from constants.constants import YOUTUBE_LIVE_API_ENDPOINT
+from constants.constants import (BUZZ_CLAIM_BATCH_SIZE, BUZZ_PAGES_PER_TICK,
+                                 BUZZ_PROCESS_INTERVAL,
+                                 BUZZ_RESPONSE_CONCURRENCY,
+                                 BUZZ_RESPONSE_TOKENS, CHAT_POLL_TICK_INTERVAL,
+                                 CHAT_WRITE_INTERVAL, STREAM_POLL_CONCURRENCY,
+                                 STREAM_POLL_TIMEOUT, YOUTUBE_LIVE_API_ENDPOINT)
 from constants.enums import BuzzStatusEnum
-from constants.prompts import CHAT_ANALYSER_PROMPT, REPLY_SUMMARISER_PROMPT
+from constants.prompts import REPLY_SUMMARISER_PROMPT
+from exceptions.circuit_open_error import CircuitOpenError
 from logger import log_method
 from models.agent_models import ProcessFoundBuzz
-from models.youtube_models import ChatIntent, StreamBuzzModel, WriteChatModel
-from utils import supabase_util, youtube_util
-from utils.supabase_util import store_message
+from models.youtube_models import StreamBuzzModel, WriteChatModel
+from utils import classifier_util, supabase_util, youtube_util
+from utils.async_util import gather_with_limit
+from utils.buzz_queue import get_buzz_queue
+from utils.circuit_breaker import (breaker_status, gemini_breaker,
+                                   supabase_breaker, youtube_breaker)
+from utils.job_runner import job_stats, run_exclusively
+from utils.key_pool import youtube_key_pool
+from utils.lease_util import WORKER_ID
+from utils.message_writer import message_writer
+from utils.poll_scheduler import stream_poll_scheduler
+from utils.rate_limiter import gemini_rate_limiter
 
 # Create API router for managing live chats
 router = APIRouter()
 
 
-@log_method
-async def process_buzz():
+def interleave_by_session(
+    buzz_list: List[ProcessFoundBuzz],
+) -> List[ProcessFoundBuzz]:
+    """Orders buzz round-robin across sessions, keeping each session's order.
+
+    A busy stream therefore cannot hold every worker while quieter streams wait.
+
+    Args:
+        buzz_list: The buzz to order, oldest first.
+
+    Returns:
+        The same buzz, taking one from each session in turn.
     """
-    Processes buzzes that are in the 'FOUND' state.
+    buzz_by_session = defaultdict(list)
+    for buzz in buzz_list:
+        buzz_by_session[buzz.session_id].append(buzz)
+    interleaved = zip_longest(*buzz_by_session.values())
+    return [buzz for round_ in interleaved for buzz in round_ if buzz is not None]
 
-    This function retrieves buzzes in the 'FOUND' state from the database,
-    updates their status to 'PROCESSING', and then uses a responder agent to
-    generate a response for each buzz. The generated response is stored back
-    in the database, and the buzz status is updated to 'ACTIVE'. If any error
-    occurs during the process, the buzz status is set back to 'FOUND'.
 
-    Raises:
-        Exception: If any error occurs during the processing of a buzz,
-            the exception is caught, logged, and re-raised after setting the
-            buzz status back to 'FOUND'.
+def is_transient_error(error: Exception) -> bool:
+    """Returns whether a failure is caused by a dependency rather than the buzz.
+
+    Open circuits, timeouts, network errors, rate limits and server errors would
+    fail any buzz, so they should not use up the attempts of the one at hand.
+
+    Args:
+        error: The exception raised while responding to a buzz.
+
+    Returns:
+        True if the buzz should be retried without counting the attempt.
     """
-    found_buzz_list = await supabase_util.get_found_buzz()
-    found_buzz_object_list = [ProcessFoundBuzz(**buzz) for buzz in found_buzz_list]
-    if not found_buzz_object_list:
-        return
-    found_buzz_id_list = [buzz.id for buzz in found_buzz_object_list]
-    await supabase_util.update_buzz_status_batch_by_id(
-        id_list=found_buzz_id_list, buzz_status=BuzzStatusEnum.PROCESSING.value
-    )
-    for buzz in found_buzz_object_list:
-        try:
-            await asyncio.sleep(2)
-            response = await responder_agent.run(
-                user_prompt=f"Generate response within 300 words for this "
-                            f"{buzz.buzz_type.strip().upper()}:\n{buzz.original_chat}",
-                result_type=str,
-            )
+    transient_types = (CircuitOpenError, asyncio.TimeoutError, httpx.TransportError)
+    if isinstance(error, transient_types):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        # Raised for Gemini rate limits and server errors by the model's client
+        status_code = error.response.status_code
+    else:
+        # Errors of the OpenAI client used for Open Router carry their status
+        status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
 
-            current_buzz = await supabase_util.get_current_buzz(buzz.session_id)
-            if not current_buzz:
-                # Display buzz
-                buzz_message = {"buzz_type": buzz.buzz_type, "original_chat":
-                    buzz.original_chat, "author": buzz.author, "generated_response":
-                    response.data}
+@log_method
+async def generate_buzz_response(
+    buzz: ProcessFoundBuzz,
+    previous_done: Optional[asyncio.Event],
+    done: asyncio.Event,
+) -> None:
+    """Generates the response of one buzz, stores it and displays it if needed.
+
+    Responses of the same session are generated concurrently, but they are stored
+    in the order of their buzz: each buzz waits for `previous_done` before looking
+    up the session's current buzz, so the oldest buzz is the one put on display.
+    If anything fails, the buzz is released back to the buzz queue. Only failures
+    that `is_transient_error` does not excuse count against its attempts.
+
+    Args:
+        buzz (ProcessFoundBuzz): The buzz to respond to.
+        previous_done (Optional[asyncio.Event]): Set once the previous buzz of the
+            same session is stored, or None for the session's first buzz.
+        done (asyncio.Event): Set once this buzz is stored or has failed.
+    """
+    try:
+        prompt = (
+            f"Generate response within 300 words for this "
+            f"{buzz.buzz_type.strip().upper()}:\n{buzz.original_chat}"
+        )
+        await gemini_rate_limiter.acquire(
+            classifier_util.estimate_tokens(prompt) + BUZZ_RESPONSE_TOKENS
+        )
+        async with gemini_breaker:
+            response = await responder_agent.run(user_prompt=prompt, result_type=str)
+
+        if previous_done is not None:
+            await previous_done.wait()
+        current_buzz = await get_buzz_queue().current(buzz.session_id)
+        if not current_buzz:
+            # Display buzz
+            buzz_message = {"buzz_type": buzz.buzz_type, "original_chat":
+                buzz.original_chat, "author": buzz.author, "generated_response":
+                response.data}
+            await gemini_rate_limiter.acquire(
+                classifier_util.estimate_tokens(str(buzz_message)) + BUZZ_RESPONSE_TOKENS
+            )
+            async with gemini_breaker:
                 buzz_message_display = await buzz_intern_agent.run(
                     f"""
                 1. Extract: `buzz_type`, `original_chat`, `author`, 
                 `generated_response` from the given json
                 2. Format and return the data in a readable, concise manner. Use 
                 spacing and line breaks for clarity, if required.\n{buzz_message}""")
-                await supabase_util.store_message(
-                    session_id=buzz.session_id,
-                    message_type="ai",
-                    content=buzz_message_display.data,
-                )
+            message_writer.enqueue(
+                session_id=buzz.session_id,
+                message_type="ai",
+                content=buzz_message_display.data,
+            )
+
+        await get_buzz_queue().complete(
+            buzz_id=buzz.id, owner=WORKER_ID, generated_response=response.data
+        )
 
-            await supabase_util.update_buzz_response_by_id(
-                buzz_id=buzz.id, generated_response=response.data
+    except Exception as e:
+        print(f"Error>> process_buzz: {str(e)}")
+        try:
+            await get_buzz_queue().release(
+                buzz_id=buzz.id,
+                owner=WORKER_ID,
+                count_attempt=not is_transient_error(e),
             )
+        except Exception as release_error:
+            # The claim expires after BUZZ_VISIBILITY_TIMEOUT anyway
+            print(f"Error>> process_buzz: release: {str(release_error)}")
+    finally:
+        done.set()
 
-        except Exception as e:
-            print(f"Error>> process_buzz: {str(e)}")
-            await supabase_util.update_buzz_status_by_id(
-                buzz_id=buzz.id, buzz_status=BuzzStatusEnum.FOUND.value
+
+@run_exclusively("process_buzz", BUZZ_PROCESS_INTERVAL)
+@log_method
+async def process_buzz():
+    """
+    Processes buzz claimed from the buzz queue.
+
+    This function pages through the buzz queue oldest first, claiming up to
+    `BUZZ_CLAIM_BATCH_SIZE` 'FOUND' buzz per page for this worker, which marks
+    them 'PROCESSING' until the claim expires. Pages are keyed on a
+    (`created_at`, `id`) cursor and processed one at a time, for at most
+    `BUZZ_PAGES_PER_TICK` pages, so memory and tick duration stay bounded however
+    large the backlog is. A responder agent generates a response for each buzz. The
+    generated response is stored back in the database, and the buzz status is
+    updated to 'ACTIVE'. If any error occurs during the process, the buzz is
+    released back to the queue; buzz whose worker died is claimed again once its
+    claim expires.
+
+    Responses are generated by up to `BUZZ_RESPONSE_CONCURRENCY` workers, paced
+    by `gemini_rate_limiter` to the Gemini RPM and TPM quota. Buzz is handed to
+    the workers round-robin across sessions, so every stream makes progress.
+
+    This runs as its own scheduled job every `BUZZ_PROCESS_INTERVAL` seconds, so
+    a tick that waits minutes on the Gemini quota never stops chat polling.
+    """
+    # Shed the work while Gemini is down instead of waiting on every buzz
+    if not gemini_breaker.allow_request():
+        print("Gemini circuit is open, skipping process_buzz")
+        return
+    cursor = None
+    for _ in range(BUZZ_PAGES_PER_TICK):
+        async with supabase_breaker:
+            found_buzz_object_list = await get_buzz_queue().claim(
+                owner=WORKER_ID, limit=BUZZ_CLAIM_BATCH_SIZE, after=cursor
             )
+        if not found_buzz_object_list:
+            return
+        last_buzz = found_buzz_object_list[-1]
+        cursor = (last_buzz.created_at, last_buzz.id)
+
+        # Chain the buzz of each session so they are stored in order
+        last_done: Dict[str, asyncio.Event] = {}
+        events: Dict[int, tuple] = {}
+        for buzz in found_buzz_object_list:
+            done = asyncio.Event()
+            events[buzz.id] = (last_done.get(buzz.session_id), done)
+            last_done[buzz.session_id] = done
+        await gather_with_limit(
+            (
+                generate_buzz_response(buzz, *events[buzz.id])
+                for buzz in interleave_by_session(found_buzz_object_list)
+            ),
+            limit=BUZZ_RESPONSE_CONCURRENCY,
+        )
+        if len(found_buzz_object_list) < BUZZ_CLAIM_BATCH_SIZE:
+            return
+        # Stop early rather than feed pages to a dependency that just went down
+        if not gemini_breaker.allow_request():
+            return
 
 
 def filter_chat_message(chat: str) -> str:
@@ -125,112 +258,142 @@ def filter_chat_message(chat: str) -> str:
 
 
 @log_method
-async def process_chat_messages(chat_list: List[Dict[str, str]], session_id: str):
+async def process_chat_messages(chat_list: List[Dict[str, str]]):
     """
-    Processes a list of chat messages for a given session.
+    Processes a list of chat messages from one or more sessions.
 
-    This function iterates through a list of chat messages, classifies
-    the intent of each message, and if the intent is not 'UNKNOWN', stores
-    the message as a 'buzz' in the database with a 'FOUND' status.
-    If any error occurs during the processing of a chat message, it logs the
-    error along with the chat message that caused the error.
+    This function classifies the intent of the chat messages in token-bounded
+    micro-batches that may mix several sessions, and stores every message
+    classified as a buzz type with a 'FOUND' status using batched inserts.
+    Each buzz is routed back to the session of its chat. Rows that fail to
+    store are logged and not re-raised.
 
     Args:
-        chat_list (List[Dict[str, Any]]): A list of dictionaries, where each
+        chat_list (List[Dict[str, str]]): A list of dictionaries, where each
             dictionary represents a chat message and contains at least the keys
-            'original_chat' and 'author'.
-        session_id (str): The ID of the session to which the chat messages belong.
+            'session_id', 'original_chat' and 'author'.
+    """
+    classified_chats = await classifier_util.classify_chats(chat_list)
+
+    buzz_list = [
+        StreamBuzzModel(
+            session_id=chat["session_id"],
+            original_chat=chat["original_chat"],
+            author=chat["author"],
+            buzz_status=BuzzStatusEnum.FOUND.value,
+            buzz_type=intent,
+            generated_response="",
+        )
+        for chat, intent in classified_chats
+    ]
+    result = await get_buzz_queue().enqueue(buzz_list)
+    if result.failed:
+        # Log the chunk-level failures
+        print(
+            f"Error storing {len(result.failed)} of {len(buzz_list)} buzz. "
+            f"Exceptions: {result.errors}"
+        )
 
-    Raises:
-        Exception: If an error occurs during the processing of a chat message,
-            the exception is caught, logged, and not re-raised.
+
+async def fetch_stream_chats(stream: Dict[str, Any]) -> List[Dict[str, str]]:
     """
-    # Filter original chat
-    filtered_chat_list = []
-    for chat in chat_list:
-        if filter_chat_message(chat["original_chat"]):
-            filtered_chat_list.append(chat)
-
-    #  Can I get process the chat list in one go?
-    chat_intent_response = await buzz_intern_agent.run(
-        f"{CHAT_ANALYSER_PROMPT}\n{filtered_chat_list}", result_type=list[ChatIntent]
-    )
-    chat_intent_response_list = chat_intent_response.data
+    Fetches the latest chat messages of a single active stream.
 
-    for chat_intent in chat_intent_response_list:
-        try:
-            await supabase_util.store_buzz(
-                StreamBuzzModel(
-                    session_id=session_id,
-                    original_chat=chat_intent.original_chat,
-                    author=chat_intent.author,
-                    buzz_status=BuzzStatusEnum.FOUND.value,
-                    buzz_type=chat_intent.intent.strip().upper(),
-                    generated_response="",
-                )
-            )
-        except Exception as e:
-            # Log the exception for the chat-level failure
-            print(f"Error processing chat: {chat_intent}. Exception: {e}")
+    The number of chats and YouTube's `pollingIntervalMillis` are reported to
+    the poll scheduler, which uses them to schedule the stream's next poll.
+    Chats that `filter_chat_message` considers noise are dropped.
+
+    Args:
+        stream (Dict[str, Any]): A dictionary representing an active stream with
+            at least the keys 'session_id', 'live_chat_id', and 'next_chat_page'.
+
+    Returns:
+        List[Dict[str, str]]: The remaining chats, each tagged with the stream's
+            'session_id'.
+    """
+    session_id, live_chat_id, next_chat_page = (
+        stream["session_id"],
+        stream["live_chat_id"],
+        stream["next_chat_page"],
+    )
+    chat_list, polling_interval_millis = await youtube_util.get_live_chat_messages(
+        session_id, live_chat_id, next_chat_page
+    )
+    stream_poll_scheduler.record_poll(
+        session_id, len(chat_list), polling_interval_millis
+    )
+    return [
+        {**chat, "session_id": session_id}
+        for chat in chat_list
+        if filter_chat_message(chat["original_chat"])
+    ]
 
 
 @log_method
 async def process_active_streams(active_streams: List[Dict[str, Any]]):
     """
-    Processes all active streams.
+    Processes all active streams concurrently.
 
-    This function iterates through a list of active streams, fetches the latest
-    chat messages for each stream using the YouTube API, and then processes the
-    chat messages. If any error occurs during the processing of a stream,
-    it logs the error along with the stream that caused the error.
+    This function fans out `fetch_stream_chats` over the active streams, running
+    at most `STREAM_POLL_CONCURRENCY` of them at once and giving each one a
+    deadline of `STREAM_POLL_TIMEOUT` seconds. The wall time of a tick therefore
+    follows the slowest stream instead of the sum of all streams. A failure or
+    timeout of one stream is logged along with the stream and does not affect
+    the others. The chats of all streams are then classified and stored together
+    by `process_chat_messages`, so small pages share LLM calls. A failure there
+    is logged and not re-raised, so the polled streams stay scheduled.
 
     Args:
         active_streams (List[Dict[str, Any]]): A list of dictionaries, where each
             dictionary represents an active stream and contains at least the keys
             'session_id', 'live_chat_id', and 'next_chat_page'.
-
-    Raises:
-        Exception: If an error occurs during the processing of a stream,
-            the exception is caught, logged, and not re-raised.
     """
-    for stream in active_streams:
-        try:
-            session_id, live_chat_id, next_chat_page = (
-                stream["session_id"],
-                stream["live_chat_id"],
-                stream["next_chat_page"],
-            )
-            chat_list = await youtube_util.get_live_chat_messages(
-                session_id, live_chat_id, next_chat_page
-            )
-            if not chat_list:
-                return
-
-            await process_chat_messages(chat_list, session_id)
+    results = await gather_with_limit(
+        (fetch_stream_chats(stream) for stream in active_streams),
+        limit=STREAM_POLL_CONCURRENCY,
+        timeout=STREAM_POLL_TIMEOUT,
+    )
+    chat_list = []
+    for stream, result in zip(active_streams, results):
+        if isinstance(result, Exception):
+            stream_poll_scheduler.record_failure(stream["session_id"])
+            # Log the exception for the stream-level failure
+            print(f"Error processing stream: {stream}. Exception: {result!r}")
+            continue
+        chat_list.extend(result)
 
+    if chat_list:
+        try:
+            await process_chat_messages(chat_list)
         except Exception as e:
-            # Log the exception for the stream-level failure
-            print(f"Error processing stream: {stream}. Exception: {e}")
+            # The streams' next_chat_page already moved past these chats
+            print(f"Error processing {len(chat_list)} chats. Exception: {e!r}")
 
 
+@run_exclusively("read_live_chats", CHAT_POLL_TICK_INTERVAL)
 @log_method
 async def read_live_chats():
     """
     Reads and processes live chat messages from active YouTube streams.
 
-    This function retrieves all active stream sessions, fetches live chat
-    messages for each session using the YouTube API, and determines the intent
+    This function retrieves all active stream sessions, picks the streams whose
+    adaptive poll timer is due, fetches live chat messages for each of them
+    using the YouTube API, and determines the intent
     of each chat message. If the intent is one of [Question, Concern, Request],
     the chat is stored in the database as a 'buzz'. It also updates the
     `next_chat_page` token for pagination and deactivates streams if they
-    are no longer active. Finally, it calls `process_buzz` to generate
-    responses for the newly created buzzes.
+    are no longer active. The buzz is answered by the separate `process_buzz`
+    job, so this tick only polls.
     """
     # Get active stream sessions
-    active_streams = await supabase_util.get_active_streams()
-    if active_streams:
-        await process_active_streams(active_streams)
-    await process_buzz()
+    async with supabase_breaker:
+        active_streams = await supabase_util.get_active_streams()
+    due_streams = stream_poll_scheduler.due_streams(active_streams)
+    if due_streams and not youtube_breaker.allow_request():
+        # Due streams stay due and are polled once the circuit lets calls through
+        print(f"YouTube circuit is open, skipping {len(due_streams)} streams")
+    elif due_streams:
+        await process_active_streams(due_streams)
 
 
 @log_method
@@ -272,10 +435,14 @@ async def group_chats_by_session_id(
         for session_id, live_chat_groups in grouped_chats.items():
             for live_chat_id, replies in live_chat_groups.items():
                 raw_reply = ". ".join(replies)
-                reply_summary = await buzz_intern_agent.run(
-                    user_prompt=f"{REPLY_SUMMARISER_PROMPT}\n{raw_reply}",
-                    result_type=str,
+                await gemini_rate_limiter.acquire(
+                    classifier_util.estimate_tokens(raw_reply) + BUZZ_RESPONSE_TOKENS
                 )
+                async with gemini_breaker:
+                    reply_summary = await buzz_intern_agent.run(
+                        user_prompt=f"{REPLY_SUMMARISER_PROMPT}\n{raw_reply}",
+                        result_type=str,
+                    )
                 result.append(
                     WriteChatModel(
                         session_id=session_id,
@@ -290,6 +457,7 @@ async def group_chats_by_session_id(
         raise
 
 
+@run_exclusively("write_live_chats", CHAT_WRITE_INTERVAL)
 @log_method
 async def write_live_chats():
     """
@@ -308,9 +476,14 @@ async def write_live_chats():
             updating the database, the exception is caught, logged, and
             re-raised.
     """
+    # Leave the replies unwritten while a dependency is down
+    if not (youtube_breaker.allow_request() and gemini_breaker.allow_request()):
+        print("YouTube or Gemini circuit is open, skipping write_live_chats")
+        return
     try:
         # Get unwritten chats from YT_REPLY table
-        unwritten_chats_query_response = await supabase_util.get_unwritten_replies()
+        async with supabase_breaker:
+            unwritten_chats_query_response = await supabase_util.get_unwritten_replies()
         if not unwritten_chats_query_response:
             return
         grouped_chats: List[WriteChatModel] = await group_chats_by_session_id(
@@ -342,7 +515,7 @@ async def write_live_chats():
                     payload=payload,
                 )
                 await supabase_util.mark_replies_success(reply.live_chat_id)
-                await store_message(
+                message_writer.enqueue(
                     session_id=reply.session_id,
                     message_type="ai",
                     content=f"StreamBuzz Bot: Hey there! I have just dropped a reply in the live chat:\n{reply.reply_summary}\n— check it out!",
@@ -377,6 +550,26 @@ async def read_chats_task():
         print(f"Error>> read_chats_task: {str(e)}")
 
 
+@router.post("/process-buzz", tags=["tasks"])
+async def process_buzz_task():
+    """
+    API endpoint to initiate the answering of queued buzz.
+
+    This endpoint triggers the `process_buzz` function, which claims buzz from
+    the buzz queue and generates their responses.
+
+    Raises:
+        Exception: If an error occurs during the execution of
+            `process_buzz`, the exception is caught, logged, and
+            not re-raised.
+    """
+    try:
+        print("Started async background task>> process_buzz")
+        await process_buzz()
+    except Exception as e:
+        print(f"Error>> process_buzz_task: {str(e)}")
+
+
 @router.post("/write-chats", tags=["tasks"])
 async def write_chats_task():
     """
@@ -395,3 +588,43 @@ async def write_chats_task():
         await write_live_chats()
     except Exception as e:
         print(f"Error>> write_chats_task: {str(e)}")
+
+
+@router.get("/streams/schedule", tags=["tasks"])
+async def stream_schedule():
+    """
+    API endpoint to inspect the per-stream poll schedule.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The live chat ID, current poll interval and
+            next poll time of every stream tracked by the poll scheduler, keyed
+            by session ID.
+    """
+    return stream_poll_scheduler.next_poll_times()
+
+
+@router.get("/status/dependencies", tags=["tasks"])
+async def dependency_status():
+    """
+    API endpoint to inspect the health of the external dependencies.
+
+    Returns:
+        Dict[str, Any]: The state of the YouTube, Gemini and Supabase circuit
+            breakers, and the quota use and health of each YouTube key bunch.
+    """
+    return {
+        "circuit_breakers": breaker_status(),
+        "youtube_keys": youtube_key_pool.usage(),
+    }
+
+
+@router.get("/status/jobs", tags=["tasks"])
+async def scheduled_job_status():
+    """
+    API endpoint to inspect the scheduled jobs of this worker.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The run count, skipped ticks, failures, tick
+            durations and overrun lag of every scheduled job, keyed by job name.
+    """
+    return job_stats()
@@ -1,22 +1,31 @@
+import json
 import os
 from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Security
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from agents import orchestrator
 from agents.buzz_intern import buzz_intern_agent
-from constants.constants import (CHAT_READ_INTERVAL, CHAT_WRITE_INTERVAL,
-                                 CONVERSATION_CONTEXT)
+from constants.constants import (BUZZ_PROCESS_INTERVAL, CHAT_POLL_TICK_INTERVAL,
+                                 CHAT_WRITE_INTERVAL, CONVERSATION_CONTEXT,
+                                 WARM_UP_RESOURCES)
 from exceptions.user_error import UserError
 from models.agent_models import AgentRequest, AgentResponse
 from routers import chat_worker
-from routers.chat_worker import read_live_chats, write_live_chats
-from utils.supabase_util import (fetch_conversation_history,
-                                 fetch_human_session_history, store_message)
+from routers.chat_worker import (process_buzz, read_live_chats,
+                                  write_live_chats)
+from utils import http_util, lease_util, resource_util
+from utils.lease_util import leader_only
+from utils.message_writer import message_writer
+from utils.token_util import youtube_token_manager
+from utils.supabase_util import (fetch_session_history, to_human_history,
+                                 to_model_history)
 
 # Load environment variables
 load_dotenv()
@@ -32,8 +41,16 @@ async def lifespan(_: FastAPI):
     Manages the application's lifespan, specifically starting and stopping the scheduler.
 
     This context manager is used by FastAPI to handle startup and shutdown events.
-    It initializes the background scheduler with jobs for reading and writing live chats,
-    starts the scheduler, and ensures it's properly shut down when the application exits.
+    It initializes the background scheduler with jobs for reading live chats, answering
+    buzz and writing live chats, starts the scheduler, and ensures it's properly shut
+    down when the application exits.
+    Every worker schedules the jobs, but each tick only runs in the worker holding the
+    job's lease, so the jobs run once across uvicorn workers and replicas.
+    Each job runs one tick at a time: missed runs are coalesced into a single run,
+    and a run that misses its slot by more than one interval is skipped.
+    When `WARM_UP_RESOURCES` is set, the models are loaded before serving so the
+    first request does not pay for them. Conversation messages are written behind
+    the requests by `message_writer`, which is flushed on shutdown.
 
     Args:
         _: The FastAPI application instance (unused).
@@ -42,21 +59,49 @@ async def lifespan(_: FastAPI):
         None: The context manager yields control back to FastAPI after starting the scheduler
             and when the application is shutting down.
     """
+    # Load models and clients ahead of the first request
+    if WARM_UP_RESOURCES:
+        await resource_util.warm_up()
+        print("Resources warmed up...")
+
+    # Refresh YouTube OAuth tokens now and keep them fresh in the background
+    await youtube_token_manager.start()
+
+    # Write conversation messages in the background
+    message_writer.start()
+
     # Prevent duplicate jobs if app restarts
     if not scheduler.get_job("read_live_chats"):
         scheduler.add_job(
-            read_live_chats,
+            leader_only("read_live_chats")(read_live_chats),
             "interval",
-            seconds=CHAT_READ_INTERVAL,
+            seconds=CHAT_POLL_TICK_INTERVAL,
             id="read_live_chats",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=CHAT_POLL_TICK_INTERVAL,
+        )
+
+    if not scheduler.get_job("process_buzz"):
+        scheduler.add_job(
+            leader_only("process_buzz")(process_buzz),
+            "interval",
+            seconds=BUZZ_PROCESS_INTERVAL,
+            id="process_buzz",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=BUZZ_PROCESS_INTERVAL,
         )
 
     if not scheduler.get_job("write_live_chats"):
         scheduler.add_job(
-            write_live_chats,
+            leader_only("write_live_chats")(write_live_chats),
             "interval",
             seconds=CHAT_WRITE_INTERVAL,
             id="write_live_chats",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=CHAT_WRITE_INTERVAL,
         )
 
     # Start the scheduler
@@ -68,8 +113,18 @@ async def lifespan(_: FastAPI):
 
     # Shutdown the scheduler when the app stops
     scheduler.shutdown()
+    await lease_util.release_held_leases()
     print("Scheduler shut down...")
 
+    # Stop refreshing YouTube OAuth tokens
+    await youtube_token_manager.stop()
+
+    # Write the conversation messages still queued
+    await message_writer.stop()
+
+    # Release pooled HTTP connections
+    await http_util.close_http_client()
+
 
 # Create FastAPI app and pass the lifespan function
 app = FastAPI(lifespan=lifespan)
@@ -128,6 +183,95 @@ async def root():
     return "Chat Worker is up and running! Tasks have been Scheduled!"
 
 
+ERROR_REPLY = "I apologize, but I encountered an error processing your request."
+"""Reply stored and sent when a request fails unexpectedly."""
+
+
+async def user_error_response(session_id: str, user_error_string: str) -> str:
+    """Turns a `UserError` message into a short, polite reply for the streamer.
+
+    Falls back to `ERROR_REPLY` if the reply cannot be generated, so the caller
+    always has a reply to store.
+    """
+    try:
+        exception_response = await buzz_intern_agent.run(
+            user_prompt=f"Respond with a short polite message within 100 words to "
+                        f"convey the following error.\n{user_error_string}. "
+                        f"You can mention the user guide "
+                        f"'https://github.com/hammaadworks/streambuzz/?tab=readme-ov-file#hackathon-community-voting'"
+                        f" Use emojis sparingly to express yourself.",
+            result_type=str,
+            deps=session_id,
+        )
+        return exception_response.data
+    except Exception as e:
+        print(f"Error>> user_error_response: {str(e)}")
+        return ERROR_REPLY
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Formats a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_agent_response(
+    request: AgentRequest,
+    human_messages: list[str],
+    messages: list,
+) -> AsyncIterator[str]:
+    """
+    Streams the agent's answer to a request as server-sent events.
+
+    Each chunk of the answer is sent as a `delta` event as soon as the model
+    produces it, and a final `done` event reports success. Errors are answered
+    like in `sample_supabase_agent`, as a single `error` event whose text
+    replaces any deltas sent before it. The answer is stored the way the client
+    was left with it, like the non-streaming endpoint stores it, and is stored
+    even if the client disconnects mid-stream; it is then marked `incomplete`.
+
+    Args:
+        request: The user's request.
+        human_messages: The latest human messages of the session, newest first.
+        messages: The model history of the session.
+
+    Yields:
+        str: The server-sent events.
+    """
+    chunks = []
+    success = True
+    finished = False
+    data = {"request_id": request.request_id}
+    try:
+        try:
+            async for delta in orchestrator.stream_response(
+                request=request, human_messages=human_messages, messages=messages
+            ):
+                chunks.append(delta)
+                yield sse_event("delta", {"text": delta})
+        except UserError as ue:
+            print(f"Error>> stream_response: {str(ue)}")
+            chunks = [await user_error_response(request.session_id, str(ue))]
+            yield sse_event("error", {"text": chunks[0]})
+        except Exception as e:
+            print(f"Error processing request: {str(e)}")
+            success = False
+            chunks = [ERROR_REPLY]
+            data["error"] = str(e)
+            yield sse_event("error", {"text": chunks[0]})
+        finished = True
+        yield sse_event("done", {"success": success})
+    finally:
+        # Store agent's response, also when the client went away mid-stream
+        if not finished:
+            data["incomplete"] = True
+        message_writer.enqueue(
+            session_id=request.session_id,
+            message_type="ai",
+            content="".join(chunks),
+            data=data,
+        )
+
+
 # noinspection PyUnusedLocal
 @app.post("/api/v1/streambuzz", response_model=AgentResponse)
 async def sample_supabase_agent(
@@ -145,6 +289,8 @@ async def sample_supabase_agent(
     by generating a polite error message using the buzz_intern_agent and stores that
     in Supabase.
     General exceptions are caught and an error message is stored in Supabase.
+    When `request.stream` is set, the answer is streamed back as server-sent
+    events by `stream_agent_response` instead, and stored once it is complete.
 
     Args:
         request: The user's request, including the query, session ID, request ID,
@@ -153,19 +299,18 @@ async def sample_supabase_agent(
         from the `verify_token` dependency.
 
     Returns:
-        AgentResponse: An object indicating the success or failure of the request.
+        AgentResponse: An object indicating the success or failure of the request,
+            or a `StreamingResponse` of server-sent events in streaming mode.
 
     Raises:
         HTTPException: If an error occurs during the agent interaction or database
         operations.
     """
     try:
-        # Fetch conversation history from the DB
-        messages = await fetch_conversation_history(
-            request.session_id, CONVERSATION_CONTEXT
-        )
-
-        human_messages = await fetch_human_session_history(request.session_id)
+        # Fetch conversation history once and derive both views from it
+        history = await fetch_session_history(request.session_id)
+        messages = to_model_history(history, CONVERSATION_CONTEXT)
+        human_messages = to_human_history(history)
 
         # Store user's query with files if present
         message_data = {"request_id": request.request_id}
@@ -173,20 +318,27 @@ async def sample_supabase_agent(
             message_data["files"] = request.files
 
         # Store user's query
-        await store_message(
+        message_writer.enqueue(
             session_id=request.session_id,
             message_type="human",
             content=request.query,
             data=message_data,
         )
 
+        if request.stream:
+            return StreamingResponse(
+                stream_agent_response(request, human_messages, messages),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
+            )
+
         # Get agent's response
         agent_response = await orchestrator.get_response(
             request=request, human_messages=human_messages, messages=messages
         )
 
         # Store agent's response
-        await store_message(
+        message_writer.enqueue(
             session_id=request.session_id,
             message_type="ai",
             content=agent_response,
@@ -197,21 +349,15 @@ async def sample_supabase_agent(
     except UserError as ue:
         user_error_string = str(ue)
         print(f"Error>> get_response: {user_error_string}")
-        exception_response = await buzz_intern_agent.run(
-            user_prompt=f"Respond with a short polite message within 100 words to "
-                        f"convey the following error.\n{user_error_string}. "
-                        f"You can mention the user guide "
-                        f"'https://github.com/hammaadworks/streambuzz/?tab=readme-ov-file#hackathon-community-voting'"
-                        f" Use emojis sparingly to express yourself.",
-            result_type=str,
-            deps=request.session_id,
+        exception_response = await user_error_response(
+            request.session_id, user_error_string
         )
 
         # Store agent's response
-        await store_message(
+        message_writer.enqueue(
             session_id=request.session_id,
             message_type="ai",
-            content=exception_response.data,
+            content=exception_response,
             data={"request_id": request.request_id},
         )
 
@@ -219,10 +365,10 @@ async def sample_supabase_agent(
     except Exception as e:
         print(f"Error processing request: {str(e)}")
         # Store error message in conversation
-        await store_message(
+        message_writer.enqueue(
             session_id=request.session_id,
             message_type="ai",
-            content="I apologize, but I encountered an error processing your request.",
+            content=ERROR_REPLY,
             data={"error": str(e), "request_id": request.request_id},
         )
         return AgentResponse(success=False)
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Import the app modules the same way streambuzz.py does, from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholder credentials, so importing the agents does not need real ones
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+os.environ.setdefault("OPEN_ROUTER_API_KEY", "test-open-router-key")
+
+
+class FakeClock:
+    """A clock that only moves when a test advances `now`."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces `time.time` and `time.monotonic` with one `FakeClock`.
+
+    Tests using it must not sleep on the event loop, which reads the same clock.
+    """
+    fake = FakeClock()
+    monkeypatch.setattr(time, "time", fake)
+    monkeypatch.setattr(time, "monotonic", fake)
+    return fake
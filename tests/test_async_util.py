@@ -0,0 +1,80 @@
+import asyncio
+
+from utils.async_util import close_queue, gather_with_limit, run_stage
+
+
+def test_gather_with_limit_caps_concurrency_and_keeps_order():
+    running = 0
+    peak = 0
+
+    async def work(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return value * 2
+
+    results = asyncio.run(gather_with_limit([work(i) for i in range(6)], limit=2))
+
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert peak == 2
+
+
+def test_gather_with_limit_returns_failures_in_their_slot():
+    async def work(value: int) -> int:
+        if value == 1:
+            raise ValueError("bad")
+        if value == 2:
+            await asyncio.sleep(1)
+        return value
+
+    results = asyncio.run(
+        gather_with_limit([work(i) for i in range(4)], limit=4, timeout=0.05)
+    )
+
+    assert results[0] == 0 and results[3] == 3
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], asyncio.TimeoutError)
+
+
+async def run_pipeline(items, concurrency, batch_size=None, handler=None):
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        await inbox.put(item)
+    await close_queue(inbox)
+    await run_stage(handler, inbox, outbox, concurrency, batch_size=batch_size)
+
+    results = []
+    while not outbox.empty():
+        results.append(outbox.get_nowait())
+    return results
+
+
+def test_run_stage_handles_every_item_and_closes_the_outbox():
+    async def handler(item: int):
+        if item == 3:
+            raise ValueError("dropped")
+        return None if item == 4 else item * 10
+
+    results = asyncio.run(run_pipeline(range(6), concurrency=3, handler=handler))
+
+    # The last result is the end-of-queue marker left for the next stage
+    assert sorted(results[:-1]) == [0, 10, 20, 50]
+    assert len(results) == 5
+
+
+def test_run_stage_hands_waiting_items_over_in_batches():
+    batches = []
+
+    async def handler(batch):
+        batches.append(list(batch))
+        return [item + 1 for item in batch]
+
+    results = asyncio.run(
+        run_pipeline(range(5), concurrency=1, batch_size=2, handler=handler)
+    )
+
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert results[:-1] == [1, 2, 3, 4, 5]
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from constants.enums import BuzzStatusEnum
+from models.youtube_models import StreamBuzzModel
+from utils import buzz_queue
+from utils.buzz_queue import SqliteBuzzQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SqliteBuzzQueue(str(tmp_path / "buzz.db"))
+
+
+def make_buzz(session_id: str, chat: str) -> StreamBuzzModel:
+    return StreamBuzzModel(
+        session_id=session_id,
+        original_chat=chat,
+        author="viewer",
+        buzz_status=BuzzStatusEnum.FOUND.value,
+        buzz_type="question",
+        generated_response="",
+    )
+
+
+def enqueue(queue: SqliteBuzzQueue, *chats: str, session_id: str = "s1") -> None:
+    result = asyncio.run(queue.enqueue([make_buzz(session_id, c) for c in chats]))
+    assert result.inserted == len(chats)
+
+
+def claim(queue: SqliteBuzzQueue, owner: str = "w1", limit: int = 10, after=None):
+    return asyncio.run(queue.claim(owner=owner, limit=limit, after=after))
+
+
+def test_claim_returns_oldest_first_and_hides_claimed_buzz(queue, clock):
+    enqueue(queue, "a", "b", "c")
+
+    first = claim(queue, owner="w1", limit=2)
+    second = claim(queue, owner="w2", limit=2)
+
+    assert [buzz.original_chat for buzz in first] == ["a", "b"]
+    assert [buzz.original_chat for buzz in second] == ["c"]
+    assert claim(queue, owner="w3") == []
+
+
+def test_claim_pages_with_cursor(queue, clock):
+    enqueue(queue, "a", "b", "c")
+
+    page = claim(queue, limit=2)
+    last = page[-1]
+    next_page = claim(queue, limit=2, after=(last.created_at, last.id))
+
+    assert [buzz.original_chat for buzz in next_page] == ["c"]
+
+
+def test_expired_claim_is_claimed_again(queue, clock):
+    enqueue(queue, "a")
+    claim(queue, owner="w1")
+
+    clock.now += buzz_queue.BUZZ_VISIBILITY_TIMEOUT - 1
+    assert claim(queue, owner="w2") == []
+
+    clock.now += 2
+    assert [buzz.original_chat for buzz in claim(queue, owner="w2")] == ["a"]
+
+
+def test_release_makes_buzz_claimable_right_away(queue, clock):
+    enqueue(queue, "a")
+    (buzz,) = claim(queue, owner="w1")
+
+    asyncio.run(queue.release(buzz.id, owner="w1"))
+
+    assert [b.id for b in claim(queue, owner="w2")] == [buzz.id]
+
+
+def test_release_by_another_owner_is_ignored(queue, clock):
+    enqueue(queue, "a")
+    (buzz,) = claim(queue, owner="w1")
+
+    asyncio.run(queue.release(buzz.id, owner="w2"))
+
+    assert claim(queue, owner="w3") == []
+
+
+def test_buzz_is_given_up_after_max_expired_claims(queue, clock):
+    enqueue(queue, "a")
+    for _ in range(buzz_queue.BUZZ_MAX_ATTEMPTS):
+        (buzz,) = claim(queue, owner="w1")
+        clock.now += buzz_queue.BUZZ_VISIBILITY_TIMEOUT + 1
+
+    assert claim(queue, owner="w1") == []
+
+
+def test_buzz_is_given_up_after_max_failed_releases(queue, clock):
+    enqueue(queue, "a")
+    for _ in range(buzz_queue.BUZZ_MAX_ATTEMPTS):
+        (buzz,) = claim(queue, owner="w1")
+        asyncio.run(queue.release(buzz.id, owner="w1"))
+
+    assert claim(queue, owner="w1") == []
+
+
+def test_release_without_counting_keeps_attempts(queue, clock):
+    enqueue(queue, "a")
+    for _ in range(buzz_queue.BUZZ_MAX_ATTEMPTS * 2):
+        (buzz,) = claim(queue, owner="w1")
+        asyncio.run(queue.release(buzz.id, owner="w1", count_attempt=False))
+
+    assert [b.original_chat for b in claim(queue, owner="w1")] == ["a"]
+
+
+def test_complete_after_claim_expired_is_ignored(queue, clock):
+    enqueue(queue, "a")
+    (buzz,) = claim(queue, owner="w1")
+    clock.now += buzz_queue.BUZZ_VISIBILITY_TIMEOUT + 1
+    claim(queue, owner="w2")
+
+    asyncio.run(queue.complete(buzz.id, "w1", "stale answer"))
+    assert asyncio.run(queue.current("s1")) is None
+
+    asyncio.run(queue.complete(buzz.id, "w2", "fresh answer"))
+    assert asyncio.run(queue.current("s1"))["generated_response"] == "fresh answer"
+
+
+def test_complete_puts_buzz_on_display(queue, clock):
+    enqueue(queue, "a", "b")
+    first, second = claim(queue, owner="w1")
+
+    asyncio.run(queue.complete(second.id, "w1", "answer b"))
+    asyncio.run(queue.complete(first.id, "w1", "answer a"))
+
+    current = asyncio.run(queue.current("s1"))
+    assert current["original_chat"] == "a"
+    assert current["generated_response"] == "answer a"
+
+    asyncio.run(queue.retire_current("s1"))
+    assert asyncio.run(queue.current("s1"))["original_chat"] == "b"
+
+    asyncio.run(queue.retire_current("s1"))
+    assert asyncio.run(queue.current("s1")) is None
+
+
+def test_retire_session_only_touches_that_session(queue, clock):
+    enqueue(queue, "a", session_id="s1")
+    enqueue(queue, "b", session_id="s2")
+
+    asyncio.run(queue.retire_session("s1"))
+
+    assert [buzz.original_chat for buzz in claim(queue)] == ["b"]
+
+
+def test_complete_after_session_retired_is_ignored(queue, clock):
+    enqueue(queue, "a")
+    (buzz,) = claim(queue, owner="w1")
+
+    asyncio.run(queue.retire_session("s1"))
+    asyncio.run(queue.complete(buzz.id, "w1", "late answer"))
+
+    assert asyncio.run(queue.current("s1")) is None
+
+
+def test_release_after_session_retired_is_ignored(queue, clock):
+    enqueue(queue, "a")
+    (buzz,) = claim(queue, owner="w1")
+
+    asyncio.run(queue.retire_session("s1"))
+    asyncio.run(queue.release(buzz.id, owner="w1"))
+
+    assert claim(queue, owner="w2") == []
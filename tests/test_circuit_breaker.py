@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from exceptions.circuit_open_error import CircuitOpenError
+from exceptions.user_error import UserError
+from utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+async def fail(breaker: CircuitBreaker, error: Exception) -> None:
+    with pytest.raises(type(error)):
+        async with breaker:
+            raise error
+
+
+async def succeed(breaker: CircuitBreaker) -> None:
+    async with breaker:
+        pass
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        asyncio.run(fail(breaker, RuntimeError("down")))
+    assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    asyncio.run(succeed(breaker))
+    asyncio.run(fail(breaker, RuntimeError("down")))
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    clock.now += 31
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    assert not breaker.allow_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    clock.now += 31
+
+    asyncio.run(succeed(breaker))
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_failed_probe_opens_the_circuit_again(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    clock.now += 31
+
+    asyncio.run(fail(breaker, RuntimeError("still down")))
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 29
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_user_errors_and_other_open_circuits_do_not_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    asyncio.run(fail(breaker, UserError("bad input")))
+    asyncio.run(fail(breaker, CircuitOpenError("other", 10)))
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_cancelled_calls_do_not_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    asyncio.run(fail(breaker, asyncio.CancelledError()))
+    assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(fail(breaker, RuntimeError("down")))
+    clock.now += 31
+    asyncio.run(fail(breaker, asyncio.CancelledError()))
+    # The cancelled probe frees the slot for the next one
+    assert breaker.allow_request()
@@ -0,0 +1,69 @@
+from utils.history_cache import SessionHistoryCache
+
+
+def message(content: str, second: int) -> dict:
+    return {
+        "type": "human",
+        "content": content,
+        "created_at": f"2024-01-01T00:00:{second:02d}.000000+00:00",
+    }
+
+
+def test_put_keeps_the_latest_window(clock):
+    cache = SessionHistoryCache(window=2, ttl=60, max_sessions=10)
+    cache.put("s1", [message("a", 1), message("b", 2), message("c", 3)])
+
+    assert [msg["content"] for msg in cache.get("s1")] == ["b", "c"]
+
+
+def test_buffer_expires_after_ttl(clock):
+    cache = SessionHistoryCache(window=10, ttl=60, max_sessions=10)
+    cache.put("s1", [message("a", 1)])
+
+    clock.now += 59
+    assert cache.get("s1") is not None
+    clock.now += 1
+    assert cache.get("s1") is None
+
+
+def test_least_recently_used_session_is_dropped(clock):
+    cache = SessionHistoryCache(window=10, ttl=60, max_sessions=2)
+    cache.put("s1", [message("a", 1)])
+    cache.put("s2", [message("b", 2)])
+    cache.get("s1")
+    cache.put("s3", [message("c", 3)])
+
+    assert cache.get("s1") is not None
+    assert cache.get("s2") is None
+
+
+def test_append_only_extends_loaded_sessions(clock):
+    cache = SessionHistoryCache(window=10, ttl=60, max_sessions=10)
+    cache.append("s1", message("a", 1))
+    assert cache.get("s1") is None
+
+    cache.put("s1", [message("a", 1)])
+    cache.append("s1", message("b", 2))
+    assert [msg["content"] for msg in cache.get("s1")] == ["a", "b"]
+
+
+def test_put_merges_unflushed_messages_once(clock):
+    cache = SessionHistoryCache(window=10, ttl=60, max_sessions=10)
+    flushed, pending = message("a", 1), message("b", 2)
+    cache.add_unflushed("s1", flushed)
+    cache.add_unflushed("s1", pending)
+    taken_before_load = cache.unflushed("s1")
+    # The first message is flushed while the history is loading
+    cache.mark_flushed("s1", flushed)
+
+    history = cache.put("s1", [dict(flushed)], taken_before_load)
+
+    assert [msg["content"] for msg in history] == ["a", "b"]
+
+
+def test_mark_flushed_stops_tracking(clock):
+    cache = SessionHistoryCache(window=10, ttl=60, max_sessions=10)
+    cache.add_unflushed("s1", message("a", 1))
+    cache.mark_flushed("s1", message("a", 1))
+
+    assert cache.unflushed("s1") == []
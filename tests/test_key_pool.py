@@ -0,0 +1,83 @@
+from utils.key_pool import ApiKeyPool
+from constants.constants import (YOUTUBE_DAILY_QUOTA,
+                                 YOUTUBE_KEY_FAILURE_COOLDOWN,
+                                 YOUTUBE_KEY_FAILURE_THRESHOLD,
+                                 YOUTUBE_KEY_RATE_LIMIT_COOLDOWN)
+
+KEYS = [{"api_key": "a"}, {"api_key": "b"}, {"api_key": "c"}]
+NOW = 1_000_000.0
+
+
+def names(key_bunches):
+    return [key_bunch["api_key"] for key_bunch in key_bunches]
+
+
+def test_select_prefers_least_used_keys():
+    pool = ApiKeyPool()
+    pool.record_success(KEYS[0], 50)
+    pool.record_success(KEYS[1], 10)
+
+    assert names(pool.select(KEYS, 5, now=NOW)) == ["c", "b", "a"]
+
+
+def test_select_prefers_healthy_keys_over_unused_ones():
+    pool = ApiKeyPool()
+    pool.record_success(KEYS[0], 50)
+    pool.record_failure(KEYS[2], 0, now=NOW)
+
+    assert names(pool.select(KEYS, 5, now=NOW)) == ["b", "a", "c"]
+
+
+def test_select_skips_keys_that_cannot_afford_the_call():
+    pool = ApiKeyPool()
+    pool.charge(KEYS[0], YOUTUBE_DAILY_QUOTA - 4)
+
+    assert names(pool.select(KEYS, 5, now=NOW)) == ["b", "c"]
+    assert names(pool.select(KEYS, 5, now=NOW + 3600)) == ["b", "c"]
+
+
+def test_quota_exceeded_skips_the_key_until_the_daily_reset():
+    pool = ApiKeyPool()
+    pool.record_failure(KEYS[0], 5, reason="quotaExceeded", now=NOW)
+
+    assert names(pool.select(KEYS, 5, now=NOW + 3600)) == ["b", "c"]
+
+
+def test_rate_limited_key_cools_down():
+    pool = ApiKeyPool()
+    pool.record_failure(KEYS[0], 5, reason="rateLimitExceeded", now=NOW)
+
+    assert "a" not in names(pool.select(KEYS, 5, now=NOW + 1))
+    later = NOW + YOUTUBE_KEY_RATE_LIMIT_COOLDOWN + 1
+    assert "a" in names(pool.select(KEYS, 5, now=later))
+
+
+def test_repeatedly_failing_key_cools_down():
+    pool = ApiKeyPool()
+    for _ in range(YOUTUBE_KEY_FAILURE_THRESHOLD - 1):
+        pool.record_failure(KEYS[0], 0, now=NOW)
+    assert "a" in names(pool.select(KEYS, 5, now=NOW))
+
+    pool.record_failure(KEYS[0], 0, now=NOW)
+    assert "a" not in names(pool.select(KEYS, 5, now=NOW))
+    later = NOW + YOUTUBE_KEY_FAILURE_COOLDOWN + 1
+    assert "a" in names(pool.select(KEYS, 5, now=later))
+
+
+def test_success_clears_failures():
+    pool = ApiKeyPool()
+    pool.record_failure(KEYS[0], 0, now=NOW)
+    pool.record_success(KEYS[0], 5)
+
+    assert pool.usage()[0]["consecutive_failures"] == 0
+    assert pool.usage()[0]["units_used"] == 5
+
+
+def test_is_available_follows_the_cooldown():
+    pool = ApiKeyPool()
+    assert pool.is_available(KEYS[0], now=NOW)
+
+    pool.record_failure(KEYS[0], 5, reason="userRateLimitExceeded", now=NOW)
+    assert not pool.is_available(KEYS[0], now=NOW + 1)
+    later = NOW + YOUTUBE_KEY_RATE_LIMIT_COOLDOWN
+    assert pool.is_available(KEYS[0], now=later)
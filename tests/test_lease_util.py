@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from utils import lease_util
+from utils.lease_util import SqliteLeaseBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SqliteLeaseBackend(str(tmp_path / "leases.db"))
+
+
+def acquire(backend: SqliteLeaseBackend, owner: str, ttl: float = 30) -> bool:
+    return asyncio.run(backend.acquire("read_live_chats", owner, ttl))
+
+
+def test_first_owner_acquires_and_others_are_refused(backend, clock):
+    assert acquire(backend, "w1")
+    assert not acquire(backend, "w2")
+
+
+def test_owner_renews_its_lease(backend, clock):
+    assert acquire(backend, "w1")
+    clock.now += 20
+    assert acquire(backend, "w1")
+
+    # The renewal pushed the expiry, so w2 is still refused after the first ttl
+    clock.now += 20
+    assert not acquire(backend, "w2")
+
+
+def test_expired_lease_is_taken_over(backend, clock):
+    assert acquire(backend, "w1")
+    clock.now += 31
+
+    assert acquire(backend, "w2")
+    assert not acquire(backend, "w1")
+
+
+def test_lease_is_held_until_it_expires(backend, clock):
+    assert acquire(backend, "w1")
+    clock.now += 29
+
+    assert not acquire(backend, "w2")
+
+
+def test_release_frees_the_lease(backend, clock):
+    assert acquire(backend, "w1")
+    asyncio.run(backend.release("read_live_chats", "w1"))
+
+    assert acquire(backend, "w2")
+
+
+def test_release_by_another_owner_is_ignored(backend, clock):
+    assert acquire(backend, "w1")
+    asyncio.run(backend.release("read_live_chats", "w2"))
+
+    assert not acquire(backend, "w2")
+
+
+def test_leases_are_independent_by_name(backend, clock):
+    assert asyncio.run(backend.acquire("read_live_chats", "w1", 30))
+    assert asyncio.run(backend.acquire("write_live_chats", "w2", 30))
+
+
+def test_leader_only_skips_the_job_without_the_lease(backend, clock, monkeypatch):
+    monkeypatch.setattr(lease_util, "_lease_backend", backend)
+    runs = []
+
+    @lease_util.leader_only("job", ttl=30)
+    async def job():
+        runs.append(lease_util.WORKER_ID)
+        return "ran"
+
+    assert asyncio.run(backend.acquire("job", "another-worker", 30))
+    assert asyncio.run(job()) is None
+
+    clock.now += 31
+    assert asyncio.run(job()) == "ran"
+    assert runs == [lease_util.WORKER_ID]
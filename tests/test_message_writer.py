@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from utils import message_writer as message_writer_module
+from utils import supabase_util
+from utils.history_cache import SessionHistoryCache
+from utils.message_writer import MessageWriter
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = SessionHistoryCache(window=10, ttl=60, max_sessions=10)
+    monkeypatch.setattr(message_writer_module, "session_history_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    batches = []
+
+    async def store_message_batch(rows):
+        batches.append(rows)
+
+    monkeypatch.setattr(supabase_util, "store_message_batch", store_message_batch)
+    return batches
+
+
+def test_flush_writes_in_order_and_in_batches(cache, stored):
+    writer = MessageWriter(batch_size=2, interval=60)
+    for content in ["a", "b", "c"]:
+        writer.enqueue("s1", "human", content)
+
+    asyncio.run(writer.flush())
+
+    assert [[row["message"]["content"] for row in rows] for rows in stored] == [
+        ["a", "b"],
+        ["c"],
+    ]
+    created_at = [row["created_at"] for rows in stored for row in rows]
+    assert created_at == sorted(created_at) and len(set(created_at)) == 3
+    assert cache.unflushed("s1") == []
+
+
+def test_queued_messages_are_tracked_until_flushed(cache, stored):
+    writer = MessageWriter(batch_size=10, interval=60)
+    writer.enqueue("s1", "ai", "answer", data={"request_id": "r1"})
+
+    (pending,) = cache.unflushed("s1")
+    assert pending["content"] == "answer"
+
+    asyncio.run(writer.flush())
+    assert stored[0][0]["message"]["data"] == {"request_id": "r1"}
+    assert cache.unflushed("s1") == []
+
+
+def test_failed_batch_is_retried_on_next_flush(cache, monkeypatch):
+    calls = []
+
+    async def store_message_batch(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("database down")
+
+    monkeypatch.setattr(supabase_util, "store_message_batch", store_message_batch)
+    writer = MessageWriter(batch_size=10, interval=60)
+    writer.enqueue("s1", "human", "a")
+
+    asyncio.run(writer.flush())
+    assert len(cache.unflushed("s1")) == 1
+
+    asyncio.run(writer.flush())
+    assert calls[0] == calls[1]
+    assert cache.unflushed("s1") == []
+
+
+def test_stop_writes_remaining_messages(cache, stored):
+    async def run():
+        writer = MessageWriter(batch_size=10, interval=60)
+        writer.start()
+        writer.enqueue("s1", "human", "a")
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert [row["message"]["content"] for row in stored[0]] == ["a"]
+
+
+def test_batch_is_dropped_after_max_attempts(cache, monkeypatch):
+    calls = []
+
+    async def store_message_batch(rows):
+        calls.append([row["message"]["content"] for row in rows])
+        if rows[0]["message"]["content"] == "bad":
+            raise RuntimeError("constraint violation")
+
+    monkeypatch.setattr(supabase_util, "store_message_batch", store_message_batch)
+    writer = MessageWriter(batch_size=1, interval=60, max_attempts=3)
+    writer.enqueue("s1", "human", "bad")
+    writer.enqueue("s1", "human", "good")
+
+    for _ in range(3):
+        asyncio.run(writer.flush())
+
+    assert calls == [["bad"], ["bad"], ["bad"], ["good"]]
+    assert cache.unflushed("s1") == []
+
+
+def test_messages_beyond_max_queued_are_dropped(cache, stored):
+    writer = MessageWriter(batch_size=10, interval=60, max_queued=2)
+    for content in ["a", "b", "c"]:
+        writer.enqueue("s1", "human", content)
+
+    asyncio.run(writer.flush())
+
+    assert [row["message"]["content"] for row in stored[0]] == ["a", "b"]
+    assert cache.unflushed("s1") == []
@@ -0,0 +1,71 @@
+from constants.constants import (CHAT_READ_INTERVAL, MAX_POLL_INTERVAL,
+                                 MIN_POLL_INTERVAL, POLL_BACKOFF_FACTOR,
+                                 POLL_BUSY_THRESHOLD, POLL_SPEEDUP_FACTOR)
+from utils.poll_scheduler import StreamPollScheduler
+
+NOW = 1_000_000.0
+STREAM = {"session_id": "s1", "live_chat_id": "chat1"}
+
+
+def interval(scheduler: StreamPollScheduler) -> float:
+    return scheduler.next_poll_times()["s1"]["interval"]
+
+
+def test_new_stream_is_due_right_away():
+    scheduler = StreamPollScheduler()
+    assert scheduler.due_streams([STREAM], now=NOW) == [STREAM]
+
+
+def test_stream_is_not_due_before_its_interval():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.record_poll("s1", 5, now=NOW)
+
+    assert scheduler.due_streams([STREAM], now=NOW + CHAT_READ_INTERVAL - 1) == []
+    assert scheduler.due_streams([STREAM], now=NOW + CHAT_READ_INTERVAL) == [STREAM]
+
+
+def test_quiet_stream_backs_off_up_to_the_maximum():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.record_poll("s1", 0, now=NOW)
+    assert interval(scheduler) == CHAT_READ_INTERVAL * POLL_BACKOFF_FACTOR
+
+    for _ in range(20):
+        scheduler.record_poll("s1", 0, now=NOW)
+    assert interval(scheduler) == MAX_POLL_INTERVAL
+
+
+def test_busy_stream_speeds_up_down_to_youtubes_minimum():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.record_poll("s1", POLL_BUSY_THRESHOLD, now=NOW)
+    assert interval(scheduler) == CHAT_READ_INTERVAL / POLL_SPEEDUP_FACTOR
+
+    scheduler.record_poll("s1", POLL_BUSY_THRESHOLD, 12_000, now=NOW)
+    assert interval(scheduler) == max(MIN_POLL_INTERVAL, 12)
+
+
+def test_failure_backs_off():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.record_failure("s1", now=NOW)
+
+    assert interval(scheduler) == CHAT_READ_INTERVAL * POLL_BACKOFF_FACTOR
+
+
+def test_new_live_chat_resets_the_schedule():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.record_poll("s1", 0, now=NOW)
+
+    restarted = {"session_id": "s1", "live_chat_id": "chat2"}
+    assert scheduler.due_streams([restarted], now=NOW + 1) == [restarted]
+
+
+def test_inactive_streams_are_dropped():
+    scheduler = StreamPollScheduler()
+    scheduler.due_streams([STREAM], now=NOW)
+    scheduler.due_streams([], now=NOW)
+
+    assert scheduler.next_poll_times() == {}
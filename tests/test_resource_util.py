@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.resource_util import _raise_for_retryable_status
+
+
+def send(status_code: int) -> httpx.Response:
+    async def run() -> httpx.Response:
+        transport = httpx.MockTransport(lambda request: httpx.Response(status_code))
+        async with httpx.AsyncClient(
+            transport=transport,
+            event_hooks={"response": [_raise_for_retryable_status]},
+        ) as client:
+            async with client.stream("POST", "https://gemini.test") as response:
+                return response
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_retryable_statuses_raise_a_typed_error(status_code):
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        send(status_code)
+    assert error.value.response.status_code == status_code
+
+
+@pytest.mark.parametrize("status_code", [200, 400, 404])
+def test_other_statuses_are_left_to_the_model(status_code):
+    assert send(status_code).status_code == status_code
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from utils.retry_util import RetryDecision, RetryPolicy, parse_retry_after
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("-3") == 0.0
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+    assert 55 <= delay <= 60
+
+
+def test_parse_retry_after_missing_or_invalid():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+
+def test_decide_classifies_errors():
+    policy = RetryPolicy()
+    assert policy.decide(None) == RetryDecision.RETRY
+    assert policy.decide(429) == RetryDecision.RETRY
+    assert policy.decide(503) == RetryDecision.RETRY
+    assert policy.decide(403, "rateLimitExceeded") == RetryDecision.RETRY
+    assert policy.decide(401) == RetryDecision.SWITCH_KEY
+    assert policy.decide(403, "quotaExceeded") == RetryDecision.SWITCH_KEY
+    assert policy.decide(400, "invalidPageToken") == RetryDecision.STOP
+    assert policy.decide(403, "forbidden") == RetryDecision.STOP
+
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    policy = RetryPolicy(max_delay=10)
+    assert policy.backoff(0, retry_after=4) == 4
+    assert policy.backoff(0, retry_after=60) == 10
+
+
+def test_backoff_is_bounded_exponential_jitter():
+    policy = RetryPolicy(base_delay=1, max_delay=16)
+    for attempt in range(8):
+        delay = policy.backoff(attempt)
+        assert 0 <= delay <= min(16, 2**attempt)
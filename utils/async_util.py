@@ -0,0 +1,110 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+
+async def gather_with_limit(
+    coroutines: Iterable[Awaitable[Any]], limit: int, timeout: Optional[float] = None
+) -> List[Any]:
+    """Runs awaitables concurrently with a concurrency limit and per-item deadline.
+
+    At most `limit` awaitables run at the same time. Each one gets its own
+    `timeout`, counted from the moment it starts running rather than from when it
+    was queued. A failure or timeout in one awaitable never cancels the others:
+    the exception is returned in its slot instead of being raised.
+
+    Args:
+        coroutines: The awaitables to run.
+        limit: The maximum number of awaitables running at once.
+        timeout: Optional deadline in seconds for each awaitable.
+
+    Returns:
+        A list with the result, or the raised exception, of each awaitable in
+        input order.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine: Awaitable[Any]) -> Any:
+        async with semaphore:
+            try:
+                if timeout is None:
+                    return await coroutine
+                return await asyncio.wait_for(coroutine, timeout)
+            except Exception as e:
+                return e
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+_END_OF_QUEUE = object()
+"""Marker put on a pipeline queue after its last item."""
+
+
+async def close_queue(queue: asyncio.Queue) -> None:
+    """Marks a pipeline queue as finished once the items already on it are taken.
+
+    Args:
+        queue: The queue feeding a stage run by `run_stage`.
+    """
+    await queue.put(_END_OF_QUEUE)
+
+
+async def run_stage(
+    handler: Callable[[Any], Awaitable[Any]],
+    inbox: asyncio.Queue,
+    outbox: Optional[asyncio.Queue],
+    concurrency: int,
+    batch_size: Optional[int] = None,
+) -> None:
+    """Runs one stage of a queue pipeline with a fixed number of workers.
+
+    Each of the `concurrency` workers takes items from `inbox`, awaits `handler`
+    on them and puts every result that is not None on `outbox`. With bounded
+    queues this gives backpressure: a worker waits while `outbox` is full, so a
+    slow stage slows the stages before it. A handler should deal with its own
+    errors; an exception it raises anyway is logged and the item is dropped.
+    Once `inbox` is closed with `close_queue` and drained, `outbox` is closed too.
+
+    With `batch_size`, `handler` takes a list of the items waiting in `inbox`, up
+    to `batch_size` of them, and returns a list of results. A worker never waits
+    for a batch to fill up.
+
+    Args:
+        handler: The coroutine function applied to every item, or every batch.
+        inbox: The queue the stage takes its items from.
+        outbox: The queue the stage puts its results on, or None for the last
+            stage.
+        concurrency: The number of items, or batches, handled at once.
+        batch_size: The maximum number of items per batch, or None to hand the
+            items to `handler` one at a time.
+    """
+
+    async def work() -> None:
+        finished = False
+        while not finished:
+            item = await inbox.get()
+            if item is _END_OF_QUEUE:
+                break
+            if batch_size is not None:
+                item = [item]
+                while len(item) < batch_size and not inbox.empty():
+                    next_item = inbox.get_nowait()
+                    if next_item is _END_OF_QUEUE:
+                        finished = True
+                        break
+                    item.append(next_item)
+            try:
+                result = await handler(item)
+            except Exception as e:
+                print(f"Error>> run_stage: {handler.__name__}: {str(e)}")
+                continue
+            if outbox is None:
+                continue
+            for result in result if batch_size is not None else [result]:
+                if result is not None:
+                    await outbox.put(result)
+        # Leave the marker for the other workers of the stage
+        await inbox.put(_END_OF_QUEUE)
+
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    if outbox is not None:
+        await close_queue(outbox)
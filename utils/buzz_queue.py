@@ -0,0 +1,405 @@
+import asyncio
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from constants.constants import (BUZZ_MAX_ATTEMPTS, BUZZ_QUEUE_BACKEND,
+                                 BUZZ_QUEUE_DB_PATH, BUZZ_VISIBILITY_TIMEOUT)
+from constants.enums import BuzzStatusEnum
+from models.agent_models import BatchInsertResult, ProcessFoundBuzz
+from models.youtube_models import StreamBuzzModel
+from utils import supabase_util
+
+
+def _found_buzz(row: dict) -> ProcessFoundBuzz:
+    return ProcessFoundBuzz(
+        id=row["id"],
+        session_id=row["session_id"],
+        author=row["author"],
+        buzz_type=row["buzz_type"],
+        original_chat=row["original_chat"],
+        created_at=row["created_at"],
+    )
+
+
+class BuzzQueue(ABC):
+    """Queue that hands out buzz to respond to, one claim at a time.
+
+    A claimed buzz is hidden from other workers until `BUZZ_VISIBILITY_TIMEOUT`
+    passes, so workers can drain the queue in parallel, and buzz left behind by a
+    crashed worker is claimed again once its claim expires. A failed attempt is
+    counted when the buzz is released after a failure of its own, or when its
+    claim expires; buzz that failed `BUZZ_MAX_ATTEMPTS` times is marked INACTIVE.
+    Failures that are not the buzz's fault, such as an open circuit, can release
+    it without using up an attempt.
+
+    Answered buzz stays in the queue's store as ACTIVE until the streamer moves
+    on, so every read and update of buzz goes through the same backend.
+    """
+
+    @abstractmethod
+    async def enqueue(self, buzz_list: List[StreamBuzzModel]) -> BatchInsertResult:
+        """Adds buzz to the queue.
+
+        Args:
+            buzz_list: The buzz to add.
+
+        Returns:
+            A `BatchInsertResult` with the buzz that could not be added.
+        """
+
+    @abstractmethod
+    async def claim(
+        self, owner: str, limit: int, after: Optional[Tuple[str, int]] = None
+    ) -> List[ProcessFoundBuzz]:
+        """Claims up to `limit` buzz for `owner`, oldest first.
+
+        Args:
+            owner: The unique identifier of the worker claiming the buzz.
+            limit: The maximum number of buzz to claim.
+            after: The (`created_at`, `id`) cursor of the last buzz of the
+                previous page. Only buzz after it is claimed, so buzz released
+                during a pass is not claimed again in the same pass.
+
+        Returns:
+            The claimed buzz.
+        """
+
+    @abstractmethod
+    async def complete(
+        self, buzz_id: int, owner: str, generated_response: str
+    ) -> None:
+        """Stores the response of a buzz claimed by `owner` and marks it ACTIVE.
+
+        Nothing is stored once the claim of `owner` has expired and the buzz may
+        have been claimed by another worker, or once the buzz has been retired.
+
+        Args:
+            buzz_id: The ID of the buzz.
+            owner: The unique identifier of the worker that claimed the buzz.
+            generated_response: The response generated for the buzz.
+        """
+
+    @abstractmethod
+    async def release(
+        self, buzz_id: int, owner: str, count_attempt: bool = True
+    ) -> None:
+        """Puts a buzz claimed by `owner` back in the queue right away.
+
+        A buzz retired meanwhile is left alone.
+
+        Args:
+            buzz_id: The ID of the buzz.
+            owner: The unique identifier of the worker that claimed the buzz.
+            count_attempt: Whether the failure counts against the buzz's
+                `BUZZ_MAX_ATTEMPTS`. False for failures that are not the buzz's
+                fault.
+        """
+
+    @abstractmethod
+    async def current(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the oldest answered buzz of a session still on display.
+
+        Args:
+            session_id: The unique identifier of the session.
+
+        Returns:
+            The `buzz_type`, `original_chat`, `author` and `generated_response`
+            of the buzz, or None if the session has no ACTIVE buzz.
+        """
+
+    @abstractmethod
+    async def retire_current(self, session_id: str) -> None:
+        """Marks the buzz returned by `current` INACTIVE.
+
+        Args:
+            session_id: The unique identifier of the session.
+        """
+
+    @abstractmethod
+    async def retire_session(self, session_id: str) -> None:
+        """Marks every buzz of a session INACTIVE and drops their claims.
+
+        Args:
+            session_id: The unique identifier of the session.
+        """
+
+
+class SupabaseBuzzQueue(BuzzQueue):
+    """Buzz queue on the Supabase `YT_BUZZ` table.
+
+    Claims go through the `claim_buzz` database function, which uses
+    `FOR UPDATE SKIP LOCKED` so concurrent claims never return the same row.
+    """
+
+    async def enqueue(self, buzz_list: List[StreamBuzzModel]) -> BatchInsertResult:
+        return await supabase_util.store_buzz_batch(buzz_list)
+
+    async def claim(
+        self, owner: str, limit: int, after: Optional[Tuple[str, int]] = None
+    ) -> List[ProcessFoundBuzz]:
+        rows = await supabase_util.claim_buzz(
+            owner, limit, BUZZ_VISIBILITY_TIMEOUT, BUZZ_MAX_ATTEMPTS, after
+        )
+        return [_found_buzz(row) for row in rows]
+
+    async def complete(
+        self, buzz_id: int, owner: str, generated_response: str
+    ) -> None:
+        await supabase_util.update_buzz_response_by_id(
+            buzz_id, owner, generated_response
+        )
+
+    async def release(
+        self, buzz_id: int, owner: str, count_attempt: bool = True
+    ) -> None:
+        await supabase_util.release_buzz(buzz_id, owner, count_attempt)
+
+    async def current(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await supabase_util.get_current_buzz(session_id)
+
+    async def retire_current(self, session_id: str) -> None:
+        await supabase_util.mark_current_buzz_inactive(session_id)
+
+    async def retire_session(self, session_id: str) -> None:
+        await supabase_util.update_buzz_status_by_session_id(
+            session_id, BuzzStatusEnum.INACTIVE.value
+        )
+
+
+class SqliteBuzzQueue(BuzzQueue):
+    """Buzz queue in a local SQLite file, for tests and local runs.
+
+    SQLite has no `SKIP LOCKED`; claims take the database write lock instead, so
+    concurrent claims from the workers of one host are serialised.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buzz ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "created_at TEXT NOT NULL, "
+                "buzz_type TEXT NOT NULL, "
+                "session_id TEXT NOT NULL, "
+                "original_chat TEXT NOT NULL, "
+                "author TEXT NOT NULL, "
+                "generated_response TEXT NOT NULL DEFAULT '', "
+                "buzz_status INTEGER NOT NULL DEFAULT 0, "
+                "claimed_by TEXT, "
+                "claimed_until REAL, "
+                "attempts INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_buzz_status_created_at "
+                "ON buzz (buzz_status, created_at, id)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _enqueue(self, buzz_list: List[StreamBuzzModel]) -> None:
+        # Fixed-width ISO times sort lexicographically in time order
+        now = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT INTO buzz (created_at, buzz_type, session_id, "
+                "original_chat, author, generated_response, buzz_status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        now,
+                        buzz.buzz_type,
+                        buzz.session_id,
+                        buzz.original_chat,
+                        buzz.author,
+                        buzz.generated_response,
+                        BuzzStatusEnum.FOUND.value,
+                    )
+                    for buzz in buzz_list
+                ],
+            )
+            connection.execute("COMMIT")
+
+    def _claim(
+        self, owner: str, limit: int, after: Optional[Tuple[str, int]]
+    ) -> List[ProcessFoundBuzz]:
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            # An expired claim means its worker died or hung: count the attempt
+            connection.execute(
+                "UPDATE buzz SET buzz_status = ?, claimed_by = NULL, "
+                "claimed_until = NULL, attempts = attempts + 1 "
+                "WHERE buzz_status = ? "
+                "AND (claimed_until IS NULL OR claimed_until < ?)",
+                (BuzzStatusEnum.FOUND.value, BuzzStatusEnum.PROCESSING.value, now),
+            )
+            connection.execute(
+                "UPDATE buzz SET buzz_status = ? "
+                "WHERE buzz_status = ? AND attempts >= ?",
+                (
+                    BuzzStatusEnum.INACTIVE.value,
+                    BuzzStatusEnum.FOUND.value,
+                    BUZZ_MAX_ATTEMPTS,
+                ),
+            )
+            after_clause, after_args = "", ()
+            if after is not None:
+                after_clause = "AND (created_at, id) > (?, ?) "
+                after_args = after
+            rows = connection.execute(
+                "SELECT * FROM buzz WHERE buzz_status = ? AND attempts < ? "
+                f"{after_clause}ORDER BY created_at, id LIMIT ?",
+                (BuzzStatusEnum.FOUND.value, BUZZ_MAX_ATTEMPTS, *after_args, limit),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE buzz SET buzz_status = ?, claimed_by = ?, "
+                "claimed_until = ? WHERE id = ?",
+                [
+                    (
+                        BuzzStatusEnum.PROCESSING.value,
+                        owner,
+                        now + BUZZ_VISIBILITY_TIMEOUT,
+                        row["id"],
+                    )
+                    for row in rows
+                ],
+            )
+            connection.execute("COMMIT")
+        return [_found_buzz(dict(row)) for row in rows]
+
+    def _complete(self, buzz_id: int, owner: str, generated_response: str) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE buzz SET buzz_status = ?, generated_response = ?, "
+                "claimed_by = NULL, claimed_until = NULL "
+                "WHERE id = ? AND claimed_by = ? AND buzz_status = ?",
+                (
+                    BuzzStatusEnum.ACTIVE.value,
+                    generated_response,
+                    buzz_id,
+                    owner,
+                    BuzzStatusEnum.PROCESSING.value,
+                ),
+            )
+
+    def _current_row(
+        self, connection: sqlite3.Connection, session_id: str
+    ) -> Optional[sqlite3.Row]:
+        return connection.execute(
+            "SELECT id, buzz_type, original_chat, author, generated_response "
+            "FROM buzz WHERE session_id = ? AND buzz_status = ? "
+            "ORDER BY created_at, id LIMIT 1",
+            (session_id, BuzzStatusEnum.ACTIVE.value),
+        ).fetchone()
+
+    def _current(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as connection:
+            row = self._current_row(connection, session_id)
+        if row is None:
+            return None
+        current = dict(row)
+        del current["id"]
+        return current
+
+    def _retire_current(self, session_id: str) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = self._current_row(connection, session_id)
+            if row is not None:
+                connection.execute(
+                    "UPDATE buzz SET buzz_status = ? WHERE id = ?",
+                    (BuzzStatusEnum.INACTIVE.value, row["id"]),
+                )
+            connection.execute("COMMIT")
+
+    def _retire_session(self, session_id: str) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE buzz SET buzz_status = ?, claimed_by = NULL, "
+                "claimed_until = NULL WHERE session_id = ?",
+                (BuzzStatusEnum.INACTIVE.value, session_id),
+            )
+
+    def _release(self, buzz_id: int, owner: str, count_attempt: bool) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE buzz SET buzz_status = ?, claimed_by = NULL, "
+                "claimed_until = NULL, attempts = attempts + ? "
+                "WHERE id = ? AND claimed_by = ? AND buzz_status = ?",
+                (
+                    BuzzStatusEnum.FOUND.value,
+                    int(count_attempt),
+                    buzz_id,
+                    owner,
+                    BuzzStatusEnum.PROCESSING.value,
+                ),
+            )
+
+    async def enqueue(self, buzz_list: List[StreamBuzzModel]) -> BatchInsertResult:
+        result = BatchInsertResult()
+        if not buzz_list:
+            return result
+        try:
+            await asyncio.to_thread(self._enqueue, buzz_list)
+            result.inserted = len(buzz_list)
+        except sqlite3.Error as e:
+            print(f"Error>> Failed at buzz_queue: enqueue: {str(e)}")
+            result.failed.extend(buzz_list)
+            result.errors.append(str(e))
+        return result
+
+    async def claim(
+        self, owner: str, limit: int, after: Optional[Tuple[str, int]] = None
+    ) -> List[ProcessFoundBuzz]:
+        return await asyncio.to_thread(self._claim, owner, limit, after)
+
+    async def complete(
+        self, buzz_id: int, owner: str, generated_response: str
+    ) -> None:
+        await asyncio.to_thread(self._complete, buzz_id, owner, generated_response)
+
+    async def release(
+        self, buzz_id: int, owner: str, count_attempt: bool = True
+    ) -> None:
+        await asyncio.to_thread(self._release, buzz_id, owner, count_attempt)
+
+    async def current(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._current, session_id)
+
+    async def retire_current(self, session_id: str) -> None:
+        await asyncio.to_thread(self._retire_current, session_id)
+
+    async def retire_session(self, session_id: str) -> None:
+        await asyncio.to_thread(self._retire_session, session_id)
+
+
+_buzz_queue: Optional[BuzzQueue] = None
+
+
+def get_buzz_queue() -> BuzzQueue:
+    """Returns the buzz queue selected by `BUZZ_QUEUE_BACKEND`, creating it once.
+
+    Returns:
+        The process-wide `BuzzQueue` instance.
+
+    Raises:
+        ValueError: If `BUZZ_QUEUE_BACKEND` names an unknown backend.
+    """
+    global _buzz_queue
+    if _buzz_queue is None:
+        if BUZZ_QUEUE_BACKEND == "supabase":
+            _buzz_queue = SupabaseBuzzQueue()
+        elif BUZZ_QUEUE_BACKEND == "sqlite":
+            _buzz_queue = SqliteBuzzQueue(BUZZ_QUEUE_DB_PATH)
+        else:
+            raise ValueError(f"Unknown BUZZ_QUEUE_BACKEND: {BUZZ_QUEUE_BACKEND}")
+    return _buzz_queue
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+from constants.constants import (CIRCUIT_FAILURE_THRESHOLD,
+                                 CIRCUIT_RESET_TIMEOUT)
+from exceptions.circuit_open_error import CircuitOpenError
+from exceptions.user_error import UserError
+
+
+class CircuitState(Enum):
+    """State of a circuit breaker.
+
+    Attributes:
+        CLOSED: Calls go through and failures are counted.
+        OPEN: Calls are rejected until the reset timeout passes.
+        HALF_OPEN: A single probe call is let through to test the dependency.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Sheds calls to a dependency after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    call fails immediately with `CircuitOpenError`. Once `reset_timeout` seconds
+    have passed, one probe call is let through: if it succeeds the circuit
+    closes, otherwise it opens again for another `reset_timeout`.
+
+    Use it as an async context manager around a call, or call `before_call`,
+    `record_success` and `record_failure` directly when only some errors should
+    count as failures. `UserError` never counts as a failure, and a cancelled
+    call, such as one cut off by its caller's deadline, is not counted at all.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state, moving from OPEN to HALF_OPEN once the timeout passes."""
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Returns whether a call would be let through right now."""
+        state = self.state
+        return state == CircuitState.CLOSED or (
+            state == CircuitState.HALF_OPEN and not self._probe_in_flight
+        )
+
+    def before_call(self) -> None:
+        """Admits a call, or rejects it if the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe
+                already in flight.
+        """
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return
+        if state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+        raise CircuitOpenError(self.name, max(0.0, retry_in))
+
+    def record_success(self) -> None:
+        """Records a successful call and closes the circuit."""
+        if self._opened_at is not None:
+            print(f"Circuit for {self.name} closed")
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Records a failed call, opening the circuit at the threshold."""
+        self._consecutive_failures += 1
+        threshold_reached = self._consecutive_failures >= self.failure_threshold
+        if self._probe_in_flight or (self._opened_at is None and threshold_reached):
+            print(f"Error>> Circuit for {self.name} opened")
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """Forgets a call that was cancelled or rejected before it finished."""
+        self._probe_in_flight = False
+
+    async def __aenter__(self) -> "CircuitBreaker":
+        self.before_call()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None or issubclass(exc_type, UserError):
+            self.record_success()
+        elif issubclass(exc_type, (CircuitOpenError, asyncio.CancelledError)):
+            # Rejected by another breaker or cut off by the caller; says nothing
+            # about this dependency
+            self.record_cancelled()
+        else:
+            self.record_failure()
+        return False
+
+    def status(self) -> Dict[str, object]:
+        """Returns the state of the breaker for the status endpoint."""
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = round(self._opened_at + self.reset_timeout - time.monotonic(), 1)
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "retry_in": retry_in,
+        }
+
+
+youtube_breaker = CircuitBreaker("youtube")
+gemini_breaker = CircuitBreaker("gemini")
+supabase_breaker = CircuitBreaker("supabase")
+
+BREAKERS = {
+    breaker.name: breaker
+    for breaker in (youtube_breaker, gemini_breaker, supabase_breaker)
+}
+"""Circuit breakers of the external dependencies, by name."""
+
+
+def breaker_status() -> Dict[str, Dict[str, object]]:
+    """Returns the state of every circuit breaker, by dependency name."""
+    return {name: breaker.status() for name, breaker in BREAKERS.items()}
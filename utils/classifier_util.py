@@ -0,0 +1,158 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+
+from agents.buzz_intern import buzz_intern_agent
+from constants.constants import (BUZZ_TYPES, CHAT_BATCH_MAX_SIZE,
+                                 CHAT_BATCH_TOKEN_BUDGET,
+                                 CHAT_CLASSIFY_CONCURRENCY,
+                                 CHAT_CLASSIFY_TIMEOUT)
+from constants.prompts import CHAT_ANALYSER_PROMPT
+from logger import log_method
+from models.youtube_models import ChatIntent
+from utils import intent_util
+from utils.async_util import gather_with_limit
+from utils.circuit_breaker import gemini_breaker
+from utils.rate_limiter import gemini_rate_limiter
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in a text at roughly 4 characters each.
+
+    Args:
+        text: The text to estimate.
+
+    Returns:
+        The estimated number of tokens, at least 1.
+    """
+    return len(text) // 4 + 1
+
+
+def build_micro_batches(
+    chat_list: List[Dict[str, Any]],
+    token_budget: int = CHAT_BATCH_TOKEN_BUDGET,
+    max_size: int = CHAT_BATCH_MAX_SIZE,
+) -> List[List[Dict[str, Any]]]:
+    """Packs chats into batches bounded by an estimated token budget and a size cap.
+
+    Chats are packed greedily in order, so chats from several small pages end up
+    in the same batch while a large page is split over several batches. A single
+    chat larger than the budget gets a batch of its own.
+
+    Args:
+        chat_list: The chats to pack, each with at least the key 'original_chat'.
+        token_budget: The approximate number of chat tokens per batch.
+        max_size: The maximum number of chats per batch.
+
+    Returns:
+        The chats split into batches, in input order.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    batch: List[Dict[str, Any]] = []
+    batch_tokens = 0
+    for chat in chat_list:
+        chat_tokens = estimate_tokens(chat["original_chat"])
+        if batch and (
+            batch_tokens + chat_tokens > token_budget or len(batch) >= max_size
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(chat)
+        batch_tokens += chat_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def classify_batch(batch: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    """Classifies the intent of one batch of chats with a single LLM call.
+
+    Each chat is sent with its position in the batch as `chat_id`, and the LLM
+    returns intents keyed by that id, so results are routed back to the original
+    chat (and its session) without relying on the LLM to echo the chat text.
+    The call is paced by `gemini_rate_limiter` and then given a deadline of
+    `CHAT_CLASSIFY_TIMEOUT` seconds, so waiting for the shared quota never eats
+    into the deadline.
+
+    Args:
+        batch: The chats to classify, each with at least the key 'original_chat'.
+
+    Returns:
+        A list of (chat, intent) pairs for the chats classified as one of
+        `BUZZ_TYPES`.
+    """
+    payload = [
+        {"chat_id": chat_id, "original_chat": chat["original_chat"]}
+        for chat_id, chat in enumerate(batch)
+    ]
+    prompt = f"{CHAT_ANALYSER_PROMPT}\n{json.dumps(payload, ensure_ascii=False)}"
+    # The response holds a short chat_id and intent per chat
+    await gemini_rate_limiter.acquire(estimate_tokens(prompt) + 10 * len(batch))
+    async with gemini_breaker:
+        chat_intent_response = await asyncio.wait_for(
+            buzz_intern_agent.run(prompt, result_type=list[ChatIntent]),
+            CHAT_CLASSIFY_TIMEOUT,
+        )
+
+    classified = []
+    for chat_intent in chat_intent_response.data:
+        intent = chat_intent.intent.strip().upper()
+        if 0 <= chat_intent.chat_id < len(batch) and intent in BUZZ_TYPES:
+            classified.append((batch[chat_intent.chat_id], intent))
+    return classified
+
+
+@log_method
+async def classify_chats(
+    chat_list: List[Dict[str, Any]],
+) -> List[Tuple[Dict[str, Any], str]]:
+    """Classifies the intent of chats from any number of streams.
+
+    Chats are first classified locally with `intent_util.pre_classify_chats`, which
+    settles noise and obvious questions, concerns and requests. Only the ambiguous
+    chats are packed with `build_micro_batches` and sent to the LLM. The batches
+    are classified concurrently, at most `CHAT_CLASSIFY_CONCURRENCY` at a time,
+    each LLM call with a deadline of `CHAT_CLASSIFY_TIMEOUT` seconds. A failed
+    batch is logged and its chats are dropped without affecting the other batches.
+
+    Args:
+        chat_list: The chats to classify, each with at least the key
+            'original_chat'. Any other keys, such as 'session_id' and 'author',
+            are carried through untouched.
+
+    Returns:
+        A list of (chat, intent) pairs for the chats classified as one of
+        `BUZZ_TYPES`.
+    """
+    try:
+        local_intents = await intent_util.pre_classify_chats(
+            [chat["original_chat"] for chat in chat_list]
+        )
+    except Exception as e:
+        print(f"Error>> Local chat classification failed, using the LLM. Exception: {e}")
+        local_intents = [None] * len(chat_list)
+
+    classified = []
+    ambiguous_chats = []
+    for chat, intent in zip(chat_list, local_intents):
+        if intent is None:
+            ambiguous_chats.append(chat)
+        elif intent in BUZZ_TYPES:
+            classified.append((chat, intent))
+    print(
+        f"Classified {len(chat_list) - len(ambiguous_chats)} of {len(chat_list)} "
+        f"chats locally, sending {len(ambiguous_chats)} to the LLM"
+    )
+
+    batches = build_micro_batches(ambiguous_chats)
+    results = await gather_with_limit(
+        (classify_batch(batch) for batch in batches),
+        limit=CHAT_CLASSIFY_CONCURRENCY,
+    )
+
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            print(f"Error classifying {len(batch)} chats. Exception: {result!r}")
+            continue
+        classified.extend(result)
+    return classified
@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from constants.constants import (SESSION_HISTORY_CACHE_SIZE,
+                                 SESSION_HISTORY_CACHE_TTL,
+                                 SESSION_HISTORY_WINDOW)
+
+
+class SessionHistoryCache:
+    """In-process ring buffers of the latest messages of each session.
+
+    Each buffer holds the last `window` messages of a session, oldest first, and
+    is appended to as this worker stores messages, so a session's history is
+    loaded from the database once and then kept current in memory. Buffers expire
+    `ttl` seconds after they were loaded, which bounds how long messages stored
+    by other workers can be missing. At most `max_sessions` buffers are kept; the
+    least recently used session is dropped first.
+
+    Messages queued by the write-behind `message_writer` are tracked until they
+    are flushed and merged into every history loaded meanwhile, so a session
+    always reads its own writes.
+    """
+
+    def __init__(
+        self,
+        window: int = SESSION_HISTORY_WINDOW,
+        ttl: float = SESSION_HISTORY_CACHE_TTL,
+        max_sessions: int = SESSION_HISTORY_CACHE_SIZE,
+    ) -> None:
+        self.window = window
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, Tuple[float, Deque[Dict[str, str]]]] = (
+            OrderedDict()
+        )
+        self._unflushed: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+
+    def get(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        """Returns the buffered messages of a session, oldest first, or None."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return list(entry[1])
+
+    def put(
+        self,
+        session_id: str,
+        messages: List[Dict[str, str]],
+        unflushed_before_load: Sequence[Dict[str, str]] = (),
+    ) -> List[Dict[str, str]]:
+        """Buffers the latest messages of a session loaded from the database.
+
+        Messages of the session that are not flushed yet are appended, unless the
+        load already returned them.
+
+        Args:
+            session_id: The unique identifier of the session.
+            messages: The last messages of the session, oldest first, each with
+                its `created_at` time.
+            unflushed_before_load: The session's unflushed messages taken before
+                the load started, so messages flushed while it ran are kept.
+
+        Returns:
+            The buffered messages, oldest first.
+        """
+        unflushed = list(unflushed_before_load)
+        unflushed += [
+            msg for msg in self.unflushed(session_id) if msg not in unflushed
+        ]
+        loaded_at = {datetime.fromisoformat(msg["created_at"]) for msg in messages}
+        messages = messages + [
+            msg
+            for msg in unflushed
+            if datetime.fromisoformat(msg["created_at"]) not in loaded_at
+        ]
+        self._sessions[session_id] = (
+            time.monotonic(),
+            deque(messages, maxlen=self.window),
+        )
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return list(self._sessions[session_id][1])
+
+    def append(self, session_id: str, message: Dict[str, str]) -> None:
+        """Appends a newly stored message to the buffer of a session, if any.
+
+        Sessions without a buffer are left alone: a buffer must start from the
+        database so it never holds a partial history.
+        """
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry[1].append(message)
+
+    def unflushed(self, session_id: str) -> List[Dict[str, str]]:
+        """Returns the queued messages of a session not flushed yet, oldest first."""
+        return list(self._unflushed.get(session_id, []))
+
+    def add_unflushed(self, session_id: str, message: Dict[str, str]) -> None:
+        """Records a message queued for writing and appends it to the buffer."""
+        self._unflushed[session_id].append(message)
+        self.append(session_id, message)
+
+    def mark_flushed(self, session_id: str, message: Dict[str, str]) -> None:
+        """Stops tracking a queued message once it is stored in the database."""
+        unflushed = self._unflushed.get(session_id)
+        if unflushed and message in unflushed:
+            unflushed.remove(message)
+        if not unflushed:
+            self._unflushed.pop(session_id, None)
+
+
+session_history_cache = SessionHistoryCache()
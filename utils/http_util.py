@@ -0,0 +1,52 @@
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from constants.constants import (HTTP_CONNECT_TIMEOUT, HTTP_KEEPALIVE_EXPIRY,
+                                 HTTP_MAX_CONNECTIONS,
+                                 HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                                 YOUTUBE_REQUEST_TIMEOUT)
+
+# HTTP/2 is only negotiated when the optional `h2` package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared, pooled asynchronous HTTP client.
+
+    The client is created on first use and reused by every caller, so connections
+    to the same host are kept alive and multiplexed (over HTTP/2 when available)
+    instead of being opened for each request.
+
+    Returns:
+        The shared `httpx.AsyncClient` instance.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                YOUTUBE_REQUEST_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared HTTP client and releases its pooled connections.
+
+    This is called when the application shuts down. A later call to
+    `get_http_client` creates a fresh client.
+    """
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
@@ -1,24 +1,146 @@
+import asyncio
+import hashlib
+import json
+import os
 import re
-from typing import List
+import tempfile
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import torch
-from sentence_transformers import util
-
-from constants.constants import (CONFIDENCE_THRESHOLD, NLP_MODEL,
-                                 STREAMER_INTENT_EXAMPLES, YOUTUBE_URL_REGEX)
+from constants.constants import (CHAT_INTENT_CONFIDENCE_THRESHOLD,
+                                 CHAT_INTENT_EXAMPLES, CHAT_INTENT_MARGIN,
+                                 CONFIDENCE_THRESHOLD, INTENT_CACHE_DIR,
+                                 NLP_MODEL_NAME, STREAMER_INTENT_EXAMPLES,
+                                 YOUTUBE_URL_REGEX)
 from constants.enums import StreamerIntentEnum
 from logger import log_method
+from utils import resource_util
+
+# torch and numpy are imported where they are used, so importing this module
+# does not load them
+if TYPE_CHECKING:
+    import torch
+
+
+def build_centroid_matrix(
+    examples_by_intent: Dict[str, List[str]]
+) -> "torch.Tensor":
+    """Builds a matrix of unit-length intent centroids, one row per intent.
+
+    All example phrases are encoded in a single call. Each intent's centroid is the
+    mean of its example embeddings, normalized so that a matmul with normalized
+    query embeddings yields cosine similarities.
+
+    Args:
+        examples_by_intent: The example phrases of each intent.
+
+    Returns:
+        A tensor of shape (number of intents, embedding size), with rows in the
+        order of `examples_by_intent`.
+    """
+    import torch
+
+    phrases = [
+        phrase for examples in examples_by_intent.values() for phrase in examples
+    ]
+    nlp_model = resource_util.get_resource("nlp_model")
+    embeddings = nlp_model.encode(phrases, convert_to_tensor=True, batch_size=32)
+    centroids, start = [], 0
+    for examples in examples_by_intent.values():
+        centroids.append(torch.mean(embeddings[start:start + len(examples)], dim=0))
+        start += len(examples)
+    return torch.nn.functional.normalize(torch.stack(centroids), dim=1)
+
 
-# Compute embeddings for streamer buzz_type examples
-streamer_intent_embeddings = {}
-for intent, examples in STREAMER_INTENT_EXAMPLES.items():
-    # Generate embeddings for all examples of the buzz_type
-    embeddings = NLP_MODEL.encode(
-        examples, convert_to_tensor=True, batch_size=32, show_progress_bar=True
+def score_intents(
+    texts: List[str], centroid_matrix: "torch.Tensor"
+) -> "torch.Tensor":
+    """Scores texts against every intent centroid with a single encode and matmul.
+
+    The centroids are moved to the device of the embeddings, since a matrix loaded
+    from the disk cache is always on the CPU.
+
+    Args:
+        texts: The texts to score.
+        centroid_matrix: The unit-length centroids from `build_centroid_matrix`.
+
+    Returns:
+        A tensor of shape (number of texts, number of intents) holding the cosine
+        similarity of each text to each intent.
+    """
+    nlp_model = resource_util.get_resource("nlp_model")
+    embeddings = nlp_model.encode(
+        texts, convert_to_tensor=True, batch_size=64, normalize_embeddings=True
     )
-    # Take the mean embedding for the buzz_type
-    streamer_intent_embeddings[intent] = torch.mean(embeddings, dim=0)
-print("Streamer Intent Embeddings generated!!")
+    return embeddings @ centroid_matrix.to(embeddings.device).T
+
+
+def centroid_cache_path(examples_by_intent: Dict[str, List[str]]) -> str:
+    """Returns the cache file of a centroid matrix.
+
+    The file name holds a hash of `NLP_MODEL_NAME` and the examples, so editing the
+    examples or switching the model points to a new file.
+
+    Args:
+        examples_by_intent: The example phrases of each intent.
+
+    Returns:
+        The path of the `.npy` file in `INTENT_CACHE_DIR`.
+    """
+    key = json.dumps(
+        {"model": NLP_MODEL_NAME, "examples": examples_by_intent}, sort_keys=True
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(INTENT_CACHE_DIR, f"intent_centroids_{digest}.npy")
+
+
+def load_centroid_matrix(
+    examples_by_intent: Dict[str, List[str]]
+) -> "torch.Tensor":
+    """Loads a centroid matrix from the disk cache, building it on a cache miss.
+
+    The cached matrix is memory-mapped, so worker processes share its pages. A
+    freshly built matrix is written to a temporary file and moved into place, so
+    concurrent workers never read a partial file.
+
+    Args:
+        examples_by_intent: The example phrases of each intent.
+
+    Returns:
+        The unit-length centroids, as returned by `build_centroid_matrix`.
+    """
+    import numpy as np
+    import torch
+
+    path = centroid_cache_path(examples_by_intent)
+    try:
+        return torch.from_numpy(np.load(path, mmap_mode="c"))
+    except (OSError, ValueError):
+        pass
+
+    centroid_matrix = build_centroid_matrix(examples_by_intent)
+    try:
+        os.makedirs(INTENT_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=INTENT_CACHE_DIR, suffix=".npy", delete=False
+        ) as cache_file:
+            np.save(cache_file, centroid_matrix.cpu().numpy())
+        os.replace(cache_file.name, path)
+    except OSError as e:
+        print(f"Error>> Unable to cache intent centroids at {path}. Exception: {e}")
+    return centroid_matrix
+
+
+# Centroid matrices are loaded on first use, with rows in the order of the intent
+# lists
+streamer_intents = list(STREAMER_INTENT_EXAMPLES)
+chat_intents = list(CHAT_INTENT_EXAMPLES)
+resource_util.register_resource(
+    "streamer_intent_centroids",
+    lambda: load_centroid_matrix(STREAMER_INTENT_EXAMPLES),
+)
+resource_util.register_resource(
+    "chat_intent_centroids", lambda: load_centroid_matrix(CHAT_INTENT_EXAMPLES)
+)
 
 
 def contains_valid_youtube_url(user_query: str) -> bool:
@@ -36,22 +158,110 @@ def contains_valid_youtube_url(user_query: str) -> bool:
     return re.search(YOUTUBE_URL_REGEX, user_query) is not None
 
 
+def _pre_classify_chats(chats: List[str]) -> List[Optional[str]]:
+    """Classifies chats against the chat intent centroids in a single batch.
+
+    Args:
+        chats: The chat texts to classify.
+
+    Returns:
+        The intent for each chat, or None if the chat is ambiguous.
+    """
+    centroid_matrix = resource_util.get_resource("chat_intent_centroids")
+    similarities = score_intents(chats, centroid_matrix)
+    top_scores, top_indices = similarities.topk(k=2, dim=1)
+
+    intents = []
+    for (best, runner_up), index in zip(
+        top_scores.tolist(), top_indices[:, 0].tolist()
+    ):
+        confident = best >= CHAT_INTENT_CONFIDENCE_THRESHOLD
+        if not confident or best - runner_up < CHAT_INTENT_MARGIN:
+            intents.append(None)
+        else:
+            intents.append(chat_intents[index])
+    return intents
+
+
+async def pre_classify_chats(chats: List[str]) -> List[Optional[str]]:
+    """Classifies viewer chats locally as QUESTION, CONCERN, REQUEST or UNKNOWN.
+
+    Each chat is compared with the centroid of the `CHAT_INTENT_EXAMPLES` of every
+    intent. A chat is classified only when its best similarity reaches
+    `CHAT_INTENT_CONFIDENCE_THRESHOLD` and leads the runner-up by at least
+    `CHAT_INTENT_MARGIN`; otherwise it is left for the LLM. Encoding runs on a
+    worker thread so the event loop is not blocked.
+
+    Args:
+        chats: The chat texts to classify.
+
+    Returns:
+        The intent for each chat in input order, or None if the chat is ambiguous.
+    """
+    if not chats:
+        return []
+    return await asyncio.to_thread(_pre_classify_chats, chats)
+
+
+def _classify_streamer_intents(queries: List[str]) -> List[StreamerIntentEnum]:
+    """Classifies streamer queries against the streamer intent centroids.
+
+    Args:
+        queries: The streamer queries to classify.
+
+    Returns:
+        The streamer intent of each query, in input order.
+    """
+    centroid_matrix = resource_util.get_resource("streamer_intent_centroids")
+    similarities = score_intents(queries, centroid_matrix)
+    max_similarities, indices = similarities.max(dim=1)
+
+    predicted_intents = []
+    for query, max_similarity, index in zip(
+        queries, max_similarities.tolist(), indices.tolist()
+    ):
+        predicted_intent = streamer_intents[index]
+
+        # If confidence is too low, classify as UNKNOWN
+        if max_similarity < CONFIDENCE_THRESHOLD:
+            predicted_intent = "UNKNOWN"
+
+        # A query with a valid YouTube URL always starts a stream
+        if contains_valid_youtube_url(query):
+            predicted_intent = "START_STREAM"
+        predicted_intents.append(StreamerIntentEnum[predicted_intent.upper()])
+    return predicted_intents
+
+
+async def classify_streamer_intents(queries: List[str]) -> List[StreamerIntentEnum]:
+    """Classifies many streamer queries with a single encode call.
+
+    Useful to replay or evaluate stored conversations in bulk. Encoding runs on a
+    worker thread so the event loop is not blocked.
+
+    Args:
+        queries: The streamer queries to classify.
+
+    Returns:
+        The streamer intent of each query, in input order.
+    """
+    if not queries:
+        return []
+    return await asyncio.to_thread(_classify_streamer_intents, queries)
+
+
 @log_method
 async def classify_streamer_intent(
     messages: List[str], query: str
 ) -> StreamerIntentEnum:
-    """Classifies the intent of a streamer based on previous messages and the latest query.
+    """Classifies the intent of a streamer based on the latest query.
 
-    This function leverages sentence embeddings to determine the streamer's intent.
-    It combines the embeddings of previous messages and the latest query, giving
-    more weight to the latest query. Then, it calculates the cosine similarity
-    between the combined embedding and pre-computed embeddings for each streamer
-    intent. The intent with the highest similarity is returned.
+    The query is embedded and scored against the streamer intent centroids with a
+    single matmul, and the intent with the highest similarity is returned. If the
+    highest similarity is below `CONFIDENCE_THRESHOLD`, the intent is "UNKNOWN".
 
-    If the predicted intent is "START_STREAM" but the query does not contain a
-    valid YouTube URL, the intent is classified as "UNKNOWN". This prevents
-    incorrect classification when a user intends something else but uses similar
-    wording.
+    A query containing a valid YouTube URL is always classified as "START_STREAM",
+    since a stream can only be started from its URL.
 
     Args:
         messages: A list of previous messages from the user.
@@ -63,27 +273,8 @@ async def classify_streamer_intent(
     """
     try:
         print(f"{query} >> {messages}")
-        # Encode the query
-        chat_embedding = NLP_MODEL.encode(query, convert_to_tensor=True)
-
-        # Compute cosine similarity with each buzz_type
-        similarities = {
-            streamer_intent: util.cos_sim(chat_embedding, intent_embedding).item()
-            for streamer_intent, intent_embedding in streamer_intent_embeddings.items()
-        }
-
-        # Find the intent with the highest similarity score
-        predicted_intent, max_similarity = max(similarities.items(), key=lambda x: x[1])
-
-        # If confidence is too low, classify as UNKNOWN
-        if max_similarity < CONFIDENCE_THRESHOLD:
-            predicted_intent = "UNKNOWN"
-
-        # If the START_STREAM query doesn't have a valid YouTube URL, classify it as
-        # UNKNOWN
-        if contains_valid_youtube_url(query):
-            predicted_intent = "START_STREAM"
-        return StreamerIntentEnum[predicted_intent.upper()]
+        [streamer_intent] = await classify_streamer_intents([query])
+        return streamer_intent
     except Exception as e:
         print(f"Error classifying buzz_type: {e}")
         return StreamerIntentEnum.UNKNOWN
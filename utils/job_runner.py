@@ -0,0 +1,97 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Optional
+
+
+@dataclass
+class JobStats:
+    """Run metrics of a scheduled job.
+
+    Attributes:
+        interval (float): The interval the job is scheduled at, in seconds.
+        runs (int): The number of ticks that ran.
+        skipped (int): The number of ticks coalesced into a tick still running.
+        failures (int): The number of ticks that raised an exception.
+        overruns (int): The number of ticks that took longer than `interval`.
+        last_started_at (Optional[str]): ISO time of the start of the last tick.
+        last_duration (float): Duration of the last tick in seconds.
+        max_duration (float): Duration of the slowest tick in seconds.
+        last_lag (float): Seconds by which the last tick overran `interval`.
+        last_error (Optional[str]): The exception raised by the last failed tick.
+    """
+
+    interval: float
+    runs: int = 0
+    skipped: int = 0
+    failures: int = 0
+    overruns: int = 0
+    last_started_at: Optional[str] = None
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+    last_lag: float = 0.0
+    last_error: Optional[str] = None
+
+
+_job_locks: Dict[str, asyncio.Lock] = {}
+_job_stats: Dict[str, JobStats] = {}
+
+
+def run_exclusively(name: str, interval: float):
+    """Decorator that runs at most one tick of a job at a time in this worker.
+
+    A tick that starts while the previous one is still running is skipped and
+    counted, so missed ticks coalesce into the running one instead of piling up
+    or overlapping. Every tick's duration is recorded, and a tick that takes
+    longer than `interval` logs by how much it lagged behind the schedule.
+
+    Args:
+        name: The name of the job, usually its scheduler job ID.
+        interval: The interval the job is scheduled at, in seconds.
+
+    Returns:
+        The decorator.
+    """
+    lock = _job_locks.setdefault(name, asyncio.Lock())
+    stats = _job_stats.setdefault(name, JobStats(interval=interval))
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if lock.locked():
+                stats.skipped += 1
+                print(f"Job {name} is still running, skipping this tick")
+                return None
+
+            async with lock:
+                stats.runs += 1
+                stats.last_started_at = datetime.now(timezone.utc).isoformat()
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    stats.failures += 1
+                    stats.last_error = repr(e)
+                    raise
+                finally:
+                    duration = time.perf_counter() - started
+                    stats.last_duration = duration
+                    stats.max_duration = max(stats.max_duration, duration)
+                    stats.last_lag = max(0.0, duration - interval)
+                    if stats.last_lag:
+                        stats.overruns += 1
+                        print(
+                            f"Error>> Job {name} overran its {interval}s interval "
+                            f"by {stats.last_lag:.2f}s (took {duration:.2f}s)"
+                        )
+
+        return wrapper
+
+    return decorator
+
+
+def job_stats() -> Dict[str, Dict[str, object]]:
+    """Returns the run metrics of every job, by name."""
+    return {name: asdict(stats) for name, stats in _job_stats.items()}
@@ -0,0 +1,162 @@
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from constants.constants import (YOUTUBE_DAILY_QUOTA,
+                                 YOUTUBE_KEY_FAILURE_COOLDOWN,
+                                 YOUTUBE_KEY_FAILURE_THRESHOLD,
+                                 YOUTUBE_KEY_RATE_LIMIT_COOLDOWN,
+                                 YOUTUBE_QUOTA_RESET_TIMEZONE)
+
+QUOTA_EXCEEDED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+"""Error reasons meaning a key bunch has spent its daily quota."""
+RATE_LIMITED_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+"""Error reasons meaning a key bunch is sending requests too fast."""
+
+
+@dataclass
+class KeyState:
+    """Usage and health of a single YouTube key bunch.
+
+    Attributes:
+        units_used (int): Quota units spent since the last daily reset.
+        quota_day (date): The Pacific date `units_used` belongs to.
+        consecutive_failures (int): Failures since the last successful call.
+        available_at (float): Epoch time in seconds before which the key bunch is
+            skipped, after a rate limit, repeated failures or an exhausted quota.
+    """
+
+    units_used: int
+    quota_day: date
+    consecutive_failures: int = 0
+    available_at: float = 0.0
+
+
+class ApiKeyPool:
+    """Spreads YouTube calls over the key bunches by quota use and health.
+
+    Each call is tried with the healthy key bunches ordered from least to most
+    used, so traffic is shared instead of draining the first key. Key bunches
+    that hit `quotaExceeded` or would exceed `YOUTUBE_DAILY_QUOTA` are skipped
+    until the quota resets at midnight Pacific time, rate-limited ones for
+    `YOUTUBE_KEY_RATE_LIMIT_COOLDOWN` seconds, and ones failing repeatedly for
+    `YOUTUBE_KEY_FAILURE_COOLDOWN` seconds.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, KeyState] = {}
+        self._quota_timezone = ZoneInfo(YOUTUBE_QUOTA_RESET_TIMEZONE)
+
+    def _state(self, key_bunch: dict) -> KeyState:
+        """Returns the state of a key bunch, resetting its usage on a new day."""
+        today = datetime.now(self._quota_timezone).date()
+        state = self._keys.setdefault(
+            key_bunch["api_key"], KeyState(units_used=0, quota_day=today)
+        )
+        if state.quota_day != today:
+            state.units_used = 0
+            state.quota_day = today
+        return state
+
+    def _next_quota_reset(self) -> float:
+        """Returns the epoch time in seconds of the next midnight Pacific time."""
+        now = datetime.now(self._quota_timezone)
+        tomorrow = datetime.combine(
+            now.date() + timedelta(days=1), datetime.min.time(), self._quota_timezone
+        )
+        return tomorrow.timestamp()
+
+    def select(
+        self, key_bunches: List[dict], cost: int, now: Optional[float] = None
+    ) -> List[dict]:
+        """Returns the key bunches to try for a call, best first.
+
+        Args:
+            key_bunches: All YouTube key bunches.
+            cost: The quota units the call is charged.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+
+        Returns:
+            The key bunches that are not cooling down and can afford `cost`,
+            ordered by consecutive failures and then by quota units used.
+        """
+        now = time.time() if now is None else now
+        candidates = []
+        for key_bunch in key_bunches:
+            state = self._state(key_bunch)
+            if state.available_at > now:
+                continue
+            if state.units_used + cost > YOUTUBE_DAILY_QUOTA:
+                state.available_at = self._next_quota_reset()
+                continue
+            candidates.append((state.consecutive_failures, state.units_used, key_bunch))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        return [key_bunch for _, _, key_bunch in candidates]
+
+    def is_available(self, key_bunch: dict, now: Optional[float] = None) -> bool:
+        """Returns whether a key bunch is not cooling down.
+
+        Args:
+            key_bunch: The key bunch to check.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        return self._state(key_bunch).available_at <= now
+
+    def charge(self, key_bunch: dict, cost: int) -> None:
+        """Charges a call to a key bunch without affecting its health."""
+        self._state(key_bunch).units_used += cost
+
+    def record_success(self, key_bunch: dict, cost: int) -> None:
+        """Charges a successful call to a key bunch and clears its failures."""
+        self.charge(key_bunch, cost)
+        self._state(key_bunch).consecutive_failures = 0
+
+    def record_failure(
+        self,
+        key_bunch: dict,
+        cost: int,
+        reason: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """Records a failed call and cools the key bunch down if needed.
+
+        Args:
+            key_bunch: The key bunch the call was made with.
+            cost: The quota units the call is charged. YouTube charges failed
+                calls too.
+            reason: The error reason returned by YouTube, if any.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        self.charge(key_bunch, cost)
+        state = self._state(key_bunch)
+        state.consecutive_failures += 1
+        if reason in QUOTA_EXCEEDED_REASONS:
+            state.available_at = self._next_quota_reset()
+            print("Quota exceeded for key bunch, skipping it until the daily reset")
+        elif reason in RATE_LIMITED_REASONS:
+            state.available_at = now + YOUTUBE_KEY_RATE_LIMIT_COOLDOWN
+        elif state.consecutive_failures >= YOUTUBE_KEY_FAILURE_THRESHOLD:
+            state.available_at = now + YOUTUBE_KEY_FAILURE_COOLDOWN
+
+    def usage(self) -> List[Dict[str, object]]:
+        """Returns the quota use and health of each key bunch seen so far.
+
+        Key bunches are listed by position, without their keys.
+        """
+        now = time.time()
+        return [
+            {
+                "key_bunch": position + 1,
+                "units_used": state.units_used,
+                "consecutive_failures": state.consecutive_failures,
+                "available_in": max(0.0, round(state.available_at - now, 1)),
+            }
+            for position, state in enumerate(self._keys.values())
+        ]
+
+
+youtube_key_pool = ApiKeyPool()
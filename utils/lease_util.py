@@ -0,0 +1,199 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from functools import wraps
+from typing import Optional
+
+from constants.constants import LEASE_BACKEND, LEASE_DB_PATH, LEASE_TTL
+from utils import supabase_util
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+"""Unique identifier of this worker process, used as the lease owner."""
+
+
+class LeaseBackend(ABC):
+    """Storage that grants a named lease to at most one owner at a time."""
+
+    @abstractmethod
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Acquires or renews the lease `name` for `owner`.
+
+        Args:
+            name: The name of the lease.
+            owner: The unique identifier of the worker asking for the lease.
+            ttl: The number of seconds the lease stays valid.
+
+        Returns:
+            True if `owner` holds the lease, otherwise False.
+        """
+
+    @abstractmethod
+    async def release(self, name: str, owner: str) -> None:
+        """Releases the lease `name` if it is held by `owner`.
+
+        Args:
+            name: The name of the lease.
+            owner: The unique identifier of the worker releasing the lease.
+        """
+
+
+class NoLeaseBackend(LeaseBackend):
+    """Grants every lease to every owner, so each worker runs every job."""
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return True
+
+    async def release(self, name: str, owner: str) -> None:
+        return None
+
+
+class SqliteLeaseBackend(LeaseBackend):
+    """Leases stored in a SQLite file shared by the workers of one host."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = connection.execute(
+                "SELECT owner FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+            connection.execute("COMMIT")
+        return row is not None and row[0] == owner
+
+    def _release(self, name: str, owner: str) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._acquire, name, owner, ttl)
+
+    async def release(self, name: str, owner: str) -> None:
+        await asyncio.to_thread(self._release, name, owner)
+
+
+class SupabaseLeaseBackend(LeaseBackend):
+    """Leases stored in the Supabase `SCHEDULER_LEASES` table.
+
+    A lease row is used instead of a Postgres advisory lock because PostgREST
+    hands out pooled connections, so a session-level lock would not stay with
+    the worker that took it.
+    """
+
+    async def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return await supabase_util.try_acquire_lease(name, owner, ttl)
+
+    async def release(self, name: str, owner: str) -> None:
+        await supabase_util.release_lease(name, owner)
+
+
+_lease_backend: Optional[LeaseBackend] = None
+_held_leases: set[str] = set()
+
+
+def get_lease_backend() -> LeaseBackend:
+    """Returns the lease backend selected by `LEASE_BACKEND`, creating it once.
+
+    Returns:
+        The process-wide `LeaseBackend` instance.
+
+    Raises:
+        ValueError: If `LEASE_BACKEND` names an unknown backend.
+    """
+    global _lease_backend
+    if _lease_backend is None:
+        if LEASE_BACKEND == "sqlite":
+            _lease_backend = SqliteLeaseBackend(LEASE_DB_PATH)
+        elif LEASE_BACKEND == "supabase":
+            _lease_backend = SupabaseLeaseBackend()
+        elif LEASE_BACKEND == "none":
+            _lease_backend = NoLeaseBackend()
+        else:
+            raise ValueError(f"Unknown LEASE_BACKEND: {LEASE_BACKEND}")
+    return _lease_backend
+
+
+async def _renew_lease(name: str, ttl: float) -> None:
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            await get_lease_backend().acquire(name, WORKER_ID, ttl)
+        except Exception as e:
+            print(f"Error>> _renew_lease: {name=}\n{str(e)}")
+
+
+def leader_only(name: str, ttl: float = LEASE_TTL):
+    """Decorator that runs a scheduled job only in the worker holding its lease.
+
+    Before each run the worker acquires (or renews) the lease `name`. If another
+    worker holds it, the run is skipped. While the job runs, the lease is renewed
+    in the background so a long tick is not taken over halfway through.
+
+    Args:
+        name: The name of the lease, usually the job ID.
+        ttl: The number of seconds the lease stays valid without renewal.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                is_leader = await get_lease_backend().acquire(name, WORKER_ID, ttl)
+            except Exception as e:
+                print(f"Error>> leader_only: {name=}\n{str(e)}")
+                return None
+            if not is_leader:
+                _held_leases.discard(name)
+                return None
+            _held_leases.add(name)
+
+            renewal = asyncio.create_task(_renew_lease(name, ttl))
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                renewal.cancel()
+
+        return wrapper
+
+    return decorator
+
+
+async def release_held_leases() -> None:
+    """Releases every lease held by this worker.
+
+    This is called on shutdown so another worker can take over the jobs without
+    waiting for the leases to expire.
+    """
+    for name in list(_held_leases):
+        try:
+            await get_lease_backend().release(name, WORKER_ID)
+        except Exception as e:
+            print(f"Error>> release_held_leases: {name=}\n{str(e)}")
+        _held_leases.discard(name)
@@ -0,0 +1,178 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+from constants.constants import (MESSAGE_FLUSH_BATCH_SIZE,
+                                 MESSAGE_FLUSH_INTERVAL,
+                                 MESSAGE_FLUSH_MAX_ATTEMPTS,
+                                 MESSAGE_QUEUE_MAX_SIZE)
+from utils import supabase_util
+from utils.history_cache import session_history_cache
+
+
+class MessageWriter:
+    """Write-behind queue for conversation messages.
+
+    `enqueue` returns as soon as a message is queued, so storing it does not add
+    database latency to the request. A background task inserts the queued
+    messages in batches of up to `MESSAGE_FLUSH_BATCH_SIZE` rows every
+    `MESSAGE_FLUSH_INTERVAL` seconds, or sooner once a batch is full. Messages are
+    written in the order they were queued, and each one carries its own
+    `created_at`, so the history of a session keeps its order however the
+    batches land. Every conversation message is written through here, so one
+    clock orders a session and the history cache can match flushed messages by
+    their `created_at`. A failed batch stays at the head of the queue and is
+    retried on the next flush, up to `MESSAGE_FLUSH_MAX_ATTEMPTS` times; then it is
+    logged and dropped, so one bad row cannot block every later message. At most
+    `MESSAGE_QUEUE_MAX_SIZE` messages wait to be written; messages queued beyond
+    that are logged and dropped. Until a message is written,
+    `fetch_session_history` merges it into the session's history.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = MESSAGE_FLUSH_BATCH_SIZE,
+        interval: float = MESSAGE_FLUSH_INTERVAL,
+        max_attempts: int = MESSAGE_FLUSH_MAX_ATTEMPTS,
+        max_queued: int = MESSAGE_QUEUE_MAX_SIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+        self._queue: Deque[Dict[str, Any]] = deque()
+        # Failed inserts of the batch at the head of the queue
+        self._failed_attempts = 0
+        self._last_created_at: Optional[datetime] = None
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _next_created_at(self) -> datetime:
+        """Returns the current time, strictly after the last queued message."""
+        created_at = datetime.now(timezone.utc)
+        if self._last_created_at is not None and created_at <= self._last_created_at:
+            created_at = self._last_created_at + timedelta(microseconds=1)
+        self._last_created_at = created_at
+        return created_at
+
+    def enqueue(
+        self,
+        session_id: str,
+        message_type: str,
+        content: str,
+        data: Optional[Dict] = None,
+    ) -> None:
+        """Queues a message for the `MESSAGES` table.
+
+        The message is dropped if `max_queued` messages are already waiting.
+
+        Args:
+            session_id: The unique identifier of the session.
+            message_type: The type of the message (e.g., "human", "ai").
+            content: The content of the message.
+            data: An optional dictionary containing additional message data.
+                Defaults to None.
+        """
+        if len(self._queue) >= self.max_queued:
+            print(
+                f"Error>> message_writer: queue full, dropped a {message_type} "
+                f"message of session {session_id}"
+            )
+            return
+        message_obj = {"type": message_type, "content": content}
+        if data:
+            message_obj["data"] = data
+        created_at = self._next_created_at().isoformat(timespec="microseconds")
+        history_message = {
+            "type": message_type,
+            "content": content,
+            "created_at": created_at,
+        }
+        self._queue.append(
+            {
+                "row": {
+                    "session_id": session_id,
+                    "created_at": created_at,
+                    "message": message_obj,
+                },
+                "history_message": history_message,
+            }
+        )
+        session_history_cache.add_unflushed(session_id, history_message)
+        if len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> None:
+        """Writes every queued message, one batch at a time.
+
+        Stops at the first batch that fails; it is retried on the next flush, or
+        dropped once it has failed `max_attempts` times.
+        """
+        async with self._flush_lock:
+            while self._queue:
+                batch: List[Dict[str, Any]] = list(
+                    islice(self._queue, self.batch_size)
+                )
+                try:
+                    await supabase_util.store_message_batch(
+                        [entry["row"] for entry in batch]
+                    )
+                except Exception as e:
+                    self._failed_attempts += 1
+                    if self._failed_attempts < self.max_attempts:
+                        print(
+                            f"Error>> message_writer: {len(self._queue)} messages "
+                            f"waiting to be written: {str(e)}"
+                        )
+                        return
+                    dropped = [
+                        (entry["row"]["session_id"], entry["row"]["created_at"])
+                        for entry in batch
+                    ]
+                    print(
+                        f"Error>> message_writer: dropped {len(batch)} messages "
+                        f"after {self._failed_attempts} failed attempts: {str(e)}\n"
+                        f"Dropped (session_id, created_at): {dropped}"
+                    )
+                self._failed_attempts = 0
+                for entry in batch:
+                    self._queue.popleft()
+                    session_history_cache.mark_flushed(
+                        entry["row"]["session_id"], entry["history_message"]
+                    )
+
+    async def _flush_forever(self) -> None:
+        """Flushes every `interval` seconds, or as soon as a batch is full."""
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Starts the background flush task. Calling this again has no effect."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        """Stops the background flush task and writes the remaining messages."""
+        if self._flush_task is not None:
+            # Cancel between flushes, so a batch is never written twice
+            async with self._flush_lock:
+                self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        if self._queue:
+            print(f"Error>> message_writer: {len(self._queue)} messages not written")
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,149 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from constants.constants import (CHAT_READ_INTERVAL, MAX_POLL_INTERVAL,
+                                 MIN_POLL_INTERVAL, POLL_BACKOFF_FACTOR,
+                                 POLL_BUSY_THRESHOLD, POLL_SPEEDUP_FACTOR)
+
+
+@dataclass
+class StreamPollState:
+    """Polling state of a single active stream.
+
+    Attributes:
+        live_chat_id (str): The live chat the state belongs to. The state is reset
+            when a session starts moderating a different live chat.
+        interval (float): The current poll interval in seconds.
+        min_interval (float): The smallest interval allowed for this stream, taken
+            from the `pollingIntervalMillis` returned by YouTube.
+        next_poll_at (float): Epoch time in seconds of the next poll.
+    """
+
+    live_chat_id: str
+    interval: float
+    min_interval: float
+    next_poll_at: float
+
+
+class StreamPollScheduler:
+    """Schedules each active stream on its own adaptive poll timer.
+
+    A stream is polled again after its own interval, which starts at
+    `CHAT_READ_INTERVAL` and is never shorter than the `pollingIntervalMillis`
+    YouTube asks for. Quiet streams back off by `POLL_BACKOFF_FACTOR` up to
+    `MAX_POLL_INTERVAL`, while busy streams speed up by `POLL_SPEEDUP_FACTOR`.
+    """
+
+    def __init__(self) -> None:
+        self._streams: Dict[str, StreamPollState] = {}
+
+    def due_streams(
+        self, active_streams: List[Dict[str, Any]], now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the active streams whose next poll time has passed.
+
+        Streams seen for the first time are due immediately, and state for
+        streams that are no longer active is dropped.
+
+        Args:
+            active_streams: The active streams, each with at least the keys
+                'session_id' and 'live_chat_id'.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+
+        Returns:
+            The subset of `active_streams` that should be polled now.
+        """
+        now = time.time() if now is None else now
+        active_session_ids = {stream["session_id"] for stream in active_streams}
+        for session_id in list(self._streams):
+            if session_id not in active_session_ids:
+                del self._streams[session_id]
+
+        due = []
+        for stream in active_streams:
+            state = self._streams.get(stream["session_id"])
+            if state is None or state.live_chat_id != stream["live_chat_id"]:
+                state = StreamPollState(
+                    live_chat_id=stream["live_chat_id"],
+                    interval=CHAT_READ_INTERVAL,
+                    min_interval=MIN_POLL_INTERVAL,
+                    next_poll_at=now,
+                )
+                self._streams[stream["session_id"]] = state
+            if state.next_poll_at <= now:
+                due.append(stream)
+        return due
+
+    def record_poll(
+        self,
+        session_id: str,
+        chat_count: int,
+        polling_interval_millis: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """Adapts a stream's interval after a successful poll.
+
+        Args:
+            session_id: The session of the polled stream.
+            chat_count: The number of chats returned by the poll.
+            polling_interval_millis: The minimum wait YouTube asked for before the
+                next poll, if any.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+        """
+        state = self._streams.get(session_id)
+        if state is None:
+            return
+        if polling_interval_millis:
+            state.min_interval = max(MIN_POLL_INTERVAL, polling_interval_millis / 1000)
+
+        if chat_count == 0:
+            interval = state.interval * POLL_BACKOFF_FACTOR
+        elif chat_count >= POLL_BUSY_THRESHOLD:
+            interval = state.interval / POLL_SPEEDUP_FACTOR
+        else:
+            interval = state.interval
+        self._schedule(state, interval, now)
+
+    def record_failure(self, session_id: str, now: Optional[float] = None) -> None:
+        """Backs off a stream's interval after a failed or timed out poll.
+
+        Args:
+            session_id: The session of the polled stream.
+            now: The current epoch time in seconds. Defaults to `time.time()`.
+        """
+        state = self._streams.get(session_id)
+        if state is None:
+            return
+        self._schedule(state, state.interval * POLL_BACKOFF_FACTOR, now)
+
+    def next_poll_times(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the scheduled next poll of every tracked stream.
+
+        Returns:
+            A dictionary keyed by session ID with the live chat ID, the current
+            interval in seconds and the next poll time in ISO 8601 format.
+        """
+        return {
+            session_id: {
+                "live_chat_id": state.live_chat_id,
+                "interval": round(state.interval, 3),
+                "next_poll_at": datetime.fromtimestamp(
+                    state.next_poll_at, tz=timezone.utc
+                ).isoformat(),
+            }
+            for session_id, state in self._streams.items()
+        }
+
+    @staticmethod
+    def _schedule(
+        state: StreamPollState, interval: float, now: Optional[float]
+    ) -> None:
+        now = time.time() if now is None else now
+        state.interval = min(max(interval, state.min_interval), MAX_POLL_INTERVAL)
+        state.next_poll_at = now + state.interval
+
+
+stream_poll_scheduler = StreamPollScheduler()
+"""Process-wide poll scheduler shared by the read-chat tick."""
@@ -1,23 +1,35 @@
 import asyncio
 import base64
 import json
-import os
 import re
 from typing import Any, Dict, List, Tuple
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 from agents.buzz_intern import buzz_intern_agent
 from constants.constants import (ACCEPTED_FILE_EXTENSION, ACCEPTED_FILE_MIME,
                                  ACCEPTED_FILE_QUANTITY, CHUNK_SIZE,
-                                 EMBEDDING_DIMENSIONS, EMBEDDING_MODEL_NAME,
-                                 MAX_FILE_SIZE_B, MAX_FILE_SIZE_MB, SUMMARY, TITLE)
+                                 EMBEDDING_BATCH_SIZE, EMBEDDING_DIMENSIONS,
+                                 EMBEDDING_MODEL_NAME,
+                                 EMBEDDING_RETRY_ATTEMPTS,
+                                 EMBEDDING_RETRY_BASE_DELAY,
+                                 MAX_FILE_SIZE_B, MAX_FILE_SIZE_MB,
+                                 RAG_EMBED_CONCURRENCY, RAG_INSERT_CONCURRENCY,
+                                 RAG_PROGRESS_STEPS, RAG_QUEUE_SIZE,
+                                 RAG_SUMMARY_CONCURRENCY, SUMMARY, TITLE)
 from constants.prompts import TITLE_SUMMARY_PROMPT
 from exceptions.user_error import UserError
 from logger import log_method
-from models.agent_models import AgentRequest, ProcessedChunk
+from models.agent_models import (AgentRequest, IngestionProgress,
+                                 ProcessedChunk)
 from utils import supabase_util
+from utils.async_util import close_queue, run_stage
+from utils.circuit_breaker import gemini_breaker
+from utils.classifier_util import estimate_tokens
+from utils.message_writer import message_writer
+from utils.rate_limiter import (gemini_embedding_rate_limiter,
+                                gemini_rate_limiter)
+from utils.resource_util import get_resource
 
 load_dotenv()
 
@@ -28,6 +40,7 @@ async def get_title_and_summary(chunk: str) -> dict:
 
     This function uses buzz_intern_agent to process the input chunk and extract
     the title and summary. It uses the `TITLE_SUMMARY_PROMPT` to guide the agent.
+    Calls are paced to the Gemini quota by `gemini_rate_limiter`.
 
     Args:
         chunk: The input text string from which to extract the title and summary.
@@ -42,10 +55,12 @@ async def get_title_and_summary(chunk: str) -> dict:
         the console, and default error messages are returned.
     """
     try:
-        completions = await buzz_intern_agent.run(
-            user_prompt=f"{TITLE_SUMMARY_PROMPT}\n{chunk[:500]}",
-            result_type=str
-        )
+        user_prompt = f"{TITLE_SUMMARY_PROMPT}\n{chunk[:500]}"
+        await gemini_rate_limiter.acquire(estimate_tokens(user_prompt) * 2)
+        async with gemini_breaker:
+            completions = await buzz_intern_agent.run(
+                user_prompt=user_prompt, result_type=str
+            )
         response_text = completions.data
         if response_text.startswith("```json"):
             response_text = re.sub(
@@ -140,68 +155,79 @@ async def get_file_contents(files: List[Dict[str, Any]]) -> Tuple[str, str]:
     return files[0]["name"], file_content
 
 
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embeds texts in one blocking request with the shared embedding client."""
+    response = get_resource("embedding_client").embed_content(
+        model=EMBEDDING_MODEL_NAME, content=texts
+    )
+    return response["embedding"]
+
+
+async def _embed_one(text: str) -> List[float]:
+    """Embeds a single text, retrying with exponential backoff.
+
+    Returns a zero vector of size `EMBEDDING_DIMENSIONS` once
+    `EMBEDDING_RETRY_ATTEMPTS` attempts have failed.
+    """
+    for attempt in range(EMBEDDING_RETRY_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(EMBEDDING_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        try:
+            await gemini_embedding_rate_limiter.acquire()
+            return (await asyncio.to_thread(_embed_batch, [text]))[0]
+        except Exception as e:
+            print(f"Error getting embedding (attempt {attempt + 1}): {e}")
+    return [0] * EMBEDDING_DIMENSIONS  # Return zero vector on error
+
+
 @log_method
-async def get_embedding(text: str) -> List[float]:
-    """Generates an embedding vector for a given text using the Gemini model.
+async def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Generates embedding vectors for many texts using the Gemini model.
 
-    This function uses the `google.generativeai` library to generate an embedding
-    vector for the provided text. It configures the API key from the environment
-    and uses the specified embedding model.
+    Texts are sent in batches of up to `EMBEDDING_BATCH_SIZE` per request, using
+    the `embedding_client` resource, which is configured once per process. Each
+    text counts against `gemini_embedding_rate_limiter`, since the quota is
+    charged per embedded text. If a batch fails, its texts are retried one at a
+    time, so one bad text does not cost the whole batch its embeddings.
 
     Args:
-        text: The input text string for which the embedding is to be generated.
+        texts: The input text strings to embed.
 
     Returns:
-        A list of floats representing the embedding vector. Returns a zero vector
-        of size `EMBEDDING_DIMENSIONS` if there's an error during embedding.
-
-    Raises:
-         Any exception encountered during the embedding process is caught, printed to the console, and a zero vector is returned.
+        The embedding vectors, in the order of `texts`. A text that could not be
+        embedded gets a zero vector of size `EMBEDDING_DIMENSIONS`.
     """
-    try:
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        response = genai.embed_content(model=EMBEDDING_MODEL_NAME, content=text)
-        return response["embedding"]
-    except Exception as e:
-        print(f"Error getting embedding: {e}")
-        return [0] * EMBEDDING_DIMENSIONS  # Return zero vector on error
+    embeddings: List[List[float]] = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = texts[start : start + EMBEDDING_BATCH_SIZE]
+        try:
+            await gemini_embedding_rate_limiter.acquire(len(batch))
+            batch_embeddings = await asyncio.to_thread(_embed_batch, batch)
+            if len(batch_embeddings) != len(batch):
+                raise ValueError(
+                    f"Got {len(batch_embeddings)} embeddings for {len(batch)} texts"
+                )
+        except Exception as e:
+            print(f"Error getting embeddings, retrying one by one: {e}")
+            batch_embeddings = await asyncio.gather(
+                *(_embed_one(text) for text in batch)
+            )
+        embeddings.extend(batch_embeddings)
+    return embeddings
 
 
 @log_method
-async def process_chunk(
-    chunk_number: int, session_id: str, file_name: str, chunk: str
-) -> ProcessedChunk:
-    """Processes a single chunk of text to extract metadata and generate embeddings.
-
-    This function orchestrates the extraction of title and summary using
-    `get_title_and_summary`, generates embeddings using `get_embedding`, and
-    packages the results into a `ProcessedChunk` object.
+async def get_embedding(text: str) -> List[float]:
+    """Generates an embedding vector for a given text using the Gemini model.
 
     Args:
-        chunk_number: The index of the chunk in the original document.
-        session_id: The unique ID of the user session.
-        file_name: The name of the file the chunk belongs to.
-        chunk: The text content of the chunk.
+        text: The input text string for which the embedding is to be generated.
 
     Returns:
-        A `ProcessedChunk` object containing the session ID, file name, chunk
-        number, extracted title, summary, content, and embedding vector.
+        A list of floats representing the embedding vector. Returns a zero vector
+        of size `EMBEDDING_DIMENSIONS` if the text could not be embedded.
     """
-    # Get title and summary
-    extracted = await get_title_and_summary(chunk)
-
-    # Get embedding
-    embedding = await get_embedding(chunk)
-
-    return ProcessedChunk(
-        session_id=session_id,
-        file_name=file_name,
-        chunk_number=chunk_number,
-        title=extracted[TITLE],
-        summary=extracted[SUMMARY],
-        content=chunk,
-        embedding=embedding,
-    )
+    return (await get_embeddings([text]))[0]
 
 
 @log_method
@@ -272,32 +298,91 @@ async def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
 @log_method
 async def process_and_store_document(
     session_id: str, file_name: str, file_content: str
-):
+) -> IngestionProgress:
     """Processes a document by splitting it into chunks, extracting metadata, and storing it.
 
-    This function orchestrates the processing of a document by first splitting it into
-    chunks using `chunk_text`, then processes each chunk in parallel using
-    `process_chunk`, and finally stores the processed chunks in a database
-    in parallel using `supabase_util.insert_chunk`.
+    This function splits the document into chunks using `chunk_text` and streams
+    them through a three-stage pipeline: `get_title_and_summary`, `get_embeddings`
+    and `supabase_util.insert_chunk`. Each stage runs a fixed number of workers
+    (`RAG_SUMMARY_CONCURRENCY`, `RAG_EMBED_CONCURRENCY`, `RAG_INSERT_CONCURRENCY`)
+    and the embedding workers take up to `EMBEDDING_BATCH_SIZE` waiting chunks per
+    request. The stages are linked by queues of at most `RAG_QUEUE_SIZE` chunks,
+    so a large document never fans out more calls than the limits allow and chunks
+    do not pile up in memory ahead of a slower stage. LLM and embedding calls are
+    paced to the Gemini quota. Progress is logged `RAG_PROGRESS_STEPS` times.
 
     Args:
         session_id: The unique ID of the user session.
         file_name: The name of the file being processed.
         file_content: The text content of the file.
+
+    Returns:
+        An `IngestionProgress` with the number of chunks through each stage.
+
+    Raises:
+        Exception: If any chunk could not be stored.
     """
     # Split into chunks
     chunks = await chunk_text(file_content)
-
-    # Process chunks in parallel
-    tasks = [
-        process_chunk(index, session_id, file_name, chunk)
-        for index, chunk in enumerate(chunks)
-    ]
-    processed_chunks = await asyncio.gather(*tasks)
-
-    # Store chunks in parallel
-    insert_tasks = [supabase_util.insert_chunk(chunk) for chunk in processed_chunks]
-    await asyncio.gather(*insert_tasks)
+    progress = IngestionProgress(total=len(chunks))
+    progress_step = max(1, len(chunks) // RAG_PROGRESS_STEPS)
+
+    async def summarize(item: Tuple[int, str]) -> Dict[str, Any]:
+        chunk_number, chunk = item
+        extracted = await get_title_and_summary(chunk)
+        progress.summarized += 1
+        return {"chunk_number": chunk_number, "content": chunk, **extracted}
+
+    async def embed(items: List[Dict[str, Any]]) -> List[ProcessedChunk]:
+        embeddings = await get_embeddings([item["content"] for item in items])
+        progress.embedded += len(items)
+        return [
+            ProcessedChunk(
+                session_id=session_id,
+                file_name=file_name,
+                chunk_number=item["chunk_number"],
+                title=item[TITLE],
+                summary=item[SUMMARY],
+                content=item["content"],
+                embedding=embedding,
+            )
+            for item, embedding in zip(items, embeddings)
+        ]
+
+    async def store(chunk: ProcessedChunk) -> None:
+        try:
+            await supabase_util.insert_chunk(chunk)
+            progress.stored += 1
+        except Exception as e:
+            print(f"Error>> process_and_store_document: {str(e)}")
+            progress.failed += 1
+        done = progress.stored + progress.failed
+        if done % progress_step == 0 or done == progress.total:
+            print(f"Ingesting {file_name} for {session_id}>> {progress}")
+
+    to_summarize = asyncio.Queue(maxsize=RAG_QUEUE_SIZE)
+    to_embed = asyncio.Queue(maxsize=RAG_QUEUE_SIZE)
+    to_store = asyncio.Queue(maxsize=RAG_QUEUE_SIZE)
+
+    async def feed() -> None:
+        for item in enumerate(chunks):
+            await to_summarize.put(item)
+        await close_queue(to_summarize)
+
+    await asyncio.gather(
+        feed(),
+        run_stage(summarize, to_summarize, to_embed, RAG_SUMMARY_CONCURRENCY),
+        run_stage(
+            embed, to_embed, to_store, RAG_EMBED_CONCURRENCY, EMBEDDING_BATCH_SIZE
+        ),
+        run_stage(store, to_store, None, RAG_INSERT_CONCURRENCY),
+    )
+    if progress.failed:
+        raise Exception(
+            f"Failed to store {progress.failed} of {progress.total} chunks of "
+            f"{file_name}"
+        )
+    return progress
 
 
 @log_method
@@ -325,7 +410,7 @@ async def create_knowledge_base(request: AgentRequest) -> None:
         f"Analyzing a response to your query ..."
     )
     # Display this to user and use his query in unknown buzz_type
-    await supabase_util.store_message(
+    message_writer.enqueue(
         session_id=request.session_id,
         message_type="ai",
         content=response_string,
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from typing import Optional
+
+from constants.constants import (GEMINI_EMBEDDING_REQUESTS_PER_MINUTE,
+                                 GEMINI_REQUESTS_PER_MINUTE,
+                                 GEMINI_TOKENS_PER_MINUTE)
+
+
+class TokenBucket:
+    """An asyncio token bucket refilled continuously at a per-minute rate.
+
+    Waiters are served one at a time in arrival order, so a large request is not
+    starved by a stream of small ones.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: The number of tokens added per minute.
+            capacity: The maximum number of tokens held, i.e. the largest burst.
+                Defaults to one minute's worth of tokens.
+        """
+        self._rate = rate_per_minute / 60
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Waits until `amount` tokens are available and takes them.
+
+        Args:
+            amount: The number of tokens to take, capped at the bucket capacity.
+        """
+        amount = min(amount, self._capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= amount
+
+
+class ModelRateLimiter:
+    """Paces LLM calls to a model's requests-per-minute and tokens-per-minute quota."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Waits until the quota allows one more call of `estimated_tokens` tokens.
+
+        Args:
+            estimated_tokens: The estimated prompt and response tokens of the call.
+        """
+        await self._requests.acquire(1)
+        await self._tokens.acquire(estimated_tokens)
+
+
+gemini_rate_limiter = ModelRateLimiter(
+    GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE
+)
+gemini_embedding_rate_limiter = TokenBucket(GEMINI_EMBEDDING_REQUESTS_PER_MINUTE)
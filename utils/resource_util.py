@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from constants.constants import (GEMINI_MODEL_NAME, GEMINI_REQUEST_TIMEOUT,
+                                 HTTP_CONNECT_TIMEOUT, NLP_MODEL_NAME,
+                                 OPEN_ROUTER_BASE_URL, OPEN_ROUTER_MODEL_NAME)
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_resources: Dict[str, Any] = {}
+_resources_lock = threading.RLock()
+
+
+def register_resource(name: str, factory: Callable[[], Any]) -> None:
+    """Registers a heavy resource to be created on first use.
+
+    Args:
+        name: The name the resource is looked up by.
+        factory: A function without arguments that creates the resource. Heavy
+            libraries should be imported inside it, so registering is free.
+    """
+    with _resources_lock:
+        _factories[name] = factory
+
+
+def get_resource(name: str) -> Any:
+    """Returns a registered resource, creating it on first use.
+
+    Creation is guarded by a lock, so concurrent callers on worker threads share a
+    single instance.
+
+    Args:
+        name: The name the resource was registered with.
+
+    Returns:
+        The resource instance.
+
+    Raises:
+        KeyError: If no resource is registered with this name.
+    """
+    if name in _resources:
+        return _resources[name]
+    with _resources_lock:
+        if name not in _resources:
+            _resources[name] = _factories[name]()
+            print(f"Resource {name} loaded!!")
+        return _resources[name]
+
+
+def loaded_resources() -> List[str]:
+    """Returns the names of the resources created so far."""
+    return list(_resources)
+
+
+async def warm_up(names: Optional[Iterable[str]] = None) -> None:
+    """Creates registered resources ahead of their first use.
+
+    Resources are created on a worker thread so the event loop is not blocked.
+    A resource that fails to load is logged and left to be created on first use.
+
+    Args:
+        names: The resources to create. Defaults to every registered resource.
+    """
+    for name in list(names if names is not None else _factories):
+        try:
+            await asyncio.to_thread(get_resource, name)
+        except Exception as e:
+            print(f"Error>> Unable to warm up resource {name}. Exception: {e}")
+
+
+def _create_nlp_model():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(NLP_MODEL_NAME)
+
+
+def _create_open_router_client():
+    from openai import OpenAI
+
+    return OpenAI(
+        base_url=OPEN_ROUTER_BASE_URL,
+        api_key=os.getenv("OPEN_ROUTER_API_KEY"),
+    )
+
+
+def _create_open_router_model():
+    from pydantic_ai.models.openai import OpenAIModel
+
+    return OpenAIModel(
+        model_name=OPEN_ROUTER_MODEL_NAME,
+        base_url=OPEN_ROUTER_BASE_URL,
+        api_key=os.getenv("OPEN_ROUTER_API_KEY"),
+    )
+
+
+async def _raise_for_retryable_status(response) -> None:
+    """Raises `httpx.HTTPStatusError` for rate limits and server errors.
+
+    Pydantic-AI reports Gemini HTTP errors only in an exception message, so the
+    status code of an error worth retrying is raised as a typed error first.
+    """
+    if response.status_code == 429 or response.status_code >= 500:
+        await response.aread()
+        response.raise_for_status()
+
+
+def _create_gemini_model():
+    import httpx
+    from pydantic_ai.models.gemini import GeminiModel
+
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(GEMINI_REQUEST_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        event_hooks={"response": [_raise_for_retryable_status]},
+    )
+    return GeminiModel(
+        model_name=GEMINI_MODEL_NAME,
+        api_key=os.getenv("GEMINI_API_KEY"),
+        http_client=http_client,
+    )
+
+
+def _create_embedding_client():
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai
+
+
+register_resource("nlp_model", _create_nlp_model)
+register_resource("embedding_client", _create_embedding_client)
+register_resource("open_router_client", _create_open_router_client)
+register_resource("open_router_model", _create_open_router_model)
+register_resource("gemini_model", _create_gemini_model)
+# Model used in project
+register_resource("pydantic_ai_model", lambda: get_resource("gemini_model"))
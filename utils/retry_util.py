@@ -0,0 +1,114 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Optional
+
+from constants.constants import (YOUTUBE_POLL_RETRY_DEADLINE,
+                                 YOUTUBE_RETRY_BASE_DELAY,
+                                 YOUTUBE_RETRY_DEADLINE,
+                                 YOUTUBE_RETRY_MAX_ATTEMPTS,
+                                 YOUTUBE_RETRY_MAX_DELAY)
+from utils.key_pool import QUOTA_EXCEEDED_REASONS, RATE_LIMITED_REASONS
+
+
+class RetryDecision(Enum):
+    """What to do after a failed attempt.
+
+    Attributes:
+        RETRY: The error is transient; retry with the next key after a backoff.
+        SWITCH_KEY: The error is specific to the key; retry with the next key
+            right away.
+        STOP: The error is permanent; retrying cannot succeed.
+    """
+
+    RETRY = "retry"
+    SWITCH_KEY = "switch_key"
+    STOP = "stop"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value: The header value, if any.
+
+    Returns:
+        The number of seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Decides whether and when to retry a failed request.
+
+    Transient errors (network errors, 429, rate limits and 5xx) are retried with
+    exponential backoff and full jitter, honouring Retry-After when present. Key
+    errors (401 and exhausted quota) move on to the next key without waiting, and
+    any other 4xx stops right away. No attempt starts after the overall deadline.
+
+    Attributes:
+        max_attempts (int): The maximum number of attempts, including the first.
+        base_delay (float): The backoff before the second attempt, in seconds.
+        max_delay (float): The cap on a single backoff, in seconds.
+        deadline (float): The time budget for all attempts, in seconds.
+    """
+
+    max_attempts: int = YOUTUBE_RETRY_MAX_ATTEMPTS
+    base_delay: float = YOUTUBE_RETRY_BASE_DELAY
+    max_delay: float = YOUTUBE_RETRY_MAX_DELAY
+    deadline: float = YOUTUBE_RETRY_DEADLINE
+
+    def decide(
+        self, status_code: Optional[int], reason: Optional[str] = None
+    ) -> RetryDecision:
+        """Classifies a failed attempt.
+
+        Args:
+            status_code: The HTTP status code, or None for a network error.
+            reason: The error reason returned by the API, if any.
+
+        Returns:
+            The `RetryDecision` for the failure.
+        """
+        if status_code is None:
+            return RetryDecision.RETRY
+        if status_code == 401 or reason in QUOTA_EXCEEDED_REASONS:
+            return RetryDecision.SWITCH_KEY
+        if status_code == 429 or status_code >= 500 or reason in RATE_LIMITED_REASONS:
+            return RetryDecision.RETRY
+        return RetryDecision.STOP
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Returns the delay before the attempt after `attempt`.
+
+        Args:
+            attempt: The zero-based number of the attempt that failed.
+            retry_after: The delay asked for by the server, if any.
+
+        Returns:
+            The delay in seconds, never more than `max_delay`.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+YOUTUBE_RETRY_POLICY = RetryPolicy()
+"""Retry policy for YouTube Data API requests."""
+YOUTUBE_POLL_RETRY_POLICY = RetryPolicy(deadline=YOUTUBE_POLL_RETRY_DEADLINE)
+"""Retry policy for live chat polls, which must finish within a read tick."""
@@ -0,0 +1,66 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from constants.constants import ACTIVE_STREAM_CACHE_TTL
+from models.youtube_models import StreamMetadataDB
+
+
+class ActiveStreamCache:
+    """In-process cache of the active streams, keyed by session ID.
+
+    Entries expire after `ttl` seconds, so a stream started or stopped by another
+    worker is seen within `ttl`. Changes made through this worker invalidate or
+    update the affected entries right away. Cached streams are returned as copies,
+    so callers cannot alter the cache by mutating them.
+    """
+
+    def __init__(self, ttl: float = ACTIVE_STREAM_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._streams: Dict[str, Tuple[float, StreamMetadataDB]] = {}
+        self._all_cached_at: Optional[float] = None
+
+    def _is_fresh(self, cached_at: Optional[float]) -> bool:
+        return cached_at is not None and time.monotonic() - cached_at < self.ttl
+
+    def get(self, session_id: str) -> Optional[StreamMetadataDB]:
+        """Returns the cached active stream of a session, or None on a miss."""
+        entry = self._streams.get(session_id)
+        if entry is None or not self._is_fresh(entry[0]):
+            return None
+        return entry[1].model_copy()
+
+    def put(self, stream: StreamMetadataDB) -> None:
+        """Caches the active stream of a session."""
+        self._streams[stream.session_id] = (time.monotonic(), stream.model_copy())
+
+    def get_all(self) -> Optional[List[StreamMetadataDB]]:
+        """Returns every active stream, or None unless the full list is cached."""
+        if not self._is_fresh(self._all_cached_at):
+            return None
+        return [
+            stream.model_copy()
+            for cached_at, stream in self._streams.values()
+            if cached_at >= self._all_cached_at
+        ]
+
+    def put_all(self, streams: List[StreamMetadataDB]) -> None:
+        """Replaces the cache with the full list of active streams."""
+        now = time.monotonic()
+        self._streams = {
+            stream.session_id: (now, stream.model_copy()) for stream in streams
+        }
+        self._all_cached_at = now
+
+    def update_next_chat_page(self, live_chat_id: str, next_chat_page: str) -> None:
+        """Stores a new chat page token in the cached stream of `live_chat_id`."""
+        for _, stream in self._streams.values():
+            if stream.live_chat_id == live_chat_id:
+                stream.next_chat_page = next_chat_page
+
+    def invalidate(self, session_id: str) -> None:
+        """Drops the cached stream of a session and the cached full list."""
+        self._streams.pop(session_id, None)
+        self._all_cached_at = None
+
+
+active_stream_cache = ActiveStreamCache()
@@ -1,79 +1,181 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from pydantic_ai.messages import (ModelRequest, ModelResponse, TextPart,
                                   UserPromptPart)
+from supabase import AClientOptions, AsyncClient, acreate_client
 
-from constants.constants import (CONVERSATION_CONTEXT, MESSAGES, MODEL_RETRIES,
-                                 STREAMER_KB, SUPABASE_CLIENT, YT_BUZZ,
-                                 YT_REPLY, YT_STREAMS)
+from constants.constants import (BUZZ_INSERT_BATCH_SIZE, CONVERSATION_CONTEXT,
+                                 MESSAGES, MODEL_RETRIES, SCHEDULER_LEASES,
+                                 SESSION_HISTORY_WINDOW, STREAMER_KB,
+                                 SUPABASE_SERVICE_KEY, SUPABASE_TIMEOUT,
+                                 SUPABASE_URL, YT_BUZZ, YT_REPLY, YT_STREAMS)
 from constants.enums import BuzzStatusEnum, StateEnum
-from models.agent_models import ProcessedChunk
+from models.agent_models import BatchInsertResult, ProcessedChunk
 from models.youtube_models import (StreamBuzzModel, StreamMetadataDB,
                                    WriteChatModel)
+from utils.history_cache import session_history_cache
+from utils.stream_cache import active_stream_cache
 
 # Load environment variables
 load_dotenv()
 
+_supabase_client: Optional[AsyncClient] = None
+_supabase_client_lock = asyncio.Lock()
+
+
+async def get_supabase_client() -> AsyncClient:
+    """Returns the shared asynchronous Supabase client, creating it on first use.
+
+    Every query in this module goes through this one client, so they share its
+    pooled HTTP connections and never block the event loop on database I/O.
+
+    Returns:
+        The shared `AsyncClient` instance.
+    """
+    global _supabase_client
+    if _supabase_client is None:
+        async with _supabase_client_lock:
+            if _supabase_client is None:
+                _supabase_client = await acreate_client(
+                    SUPABASE_URL,
+                    SUPABASE_SERVICE_KEY,
+                    options=AClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT),
+                )
+    return _supabase_client
+
 
 # MESSAGES table queries
-async def fetch_human_session_history(session_id: str, limit: int = 10) -> list[str]:
-    """Fetches the most recent human conversation history for a given session.
+async def fetch_session_history(session_id: str) -> list[Dict[str, str]]:
+    """Fetches the latest messages of a session in a single query.
 
-    This function retrieves a specified number of the most recent messages from the
-    `MESSAGES` table in Supabase, filtering for messages of type "human" and
-    ordering them by creation time in descending order. It then returns a list of
-    message contents, limited by the `CONVERSATION_CONTEXT` constant.
+    This function returns the last `SESSION_HISTORY_WINDOW` messages of the
+    session from `session_history_cache`, or loads them from the `MESSAGES`
+    table, selecting only the `created_at` and `message` columns, and buffers
+    them. Messages still queued in `message_writer` are included, so a session
+    reads its own writes. Both the model history and the human history are
+    derived from this window.
 
     Args:
         session_id: The unique identifier of the session.
-        limit: The maximum number of messages to retrieve. Defaults to 10.
 
     Returns:
-        A list of strings, where each string is the content of a human message.
-        The list is limited by the `CONVERSATION_CONTEXT` constant.
+        A list of dictionaries with the `type` and `content` of each message, in
+        chronological order.
 
     Raises:
         HTTPException: If an error occurs during the database query, with a 500
         status code and error details.
     """
+    history = session_history_cache.get(session_id)
+    if history is not None:
+        return history
+    unflushed = session_history_cache.unflushed(session_id)
     try:
-        response = (
-            SUPABASE_CLIENT.table(MESSAGES)
-            .select("*")
+        client = await get_supabase_client()
+        response = await (
+            client.table(MESSAGES)
+            .select("created_at, message")
             .eq("session_id", session_id)
             .order("created_at", desc=True)
-            .limit(limit)
+            .limit(SESSION_HISTORY_WINDOW)
             .execute()
         )
-
-        messages = []
-        for msg in response.data:
-            if msg["message"]["type"] == "human":
-                messages.append(msg["message"]["content"])
-        return messages[:CONVERSATION_CONTEXT]
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to fetch_human_session_history: {str(e)}"
+            status_code=500, detail=f"Failed to fetch_session_history: {str(e)}"
         )
 
+    # Reverse to get chronological order
+    history = [
+        {
+            "type": msg["message"]["type"],
+            "content": msg["message"]["content"],
+            "created_at": msg["created_at"],
+        }
+        for msg in response.data[::-1]
+    ]
+    return session_history_cache.put(session_id, history, unflushed)
+
+
+def to_human_history(history: list[Dict[str, str]], limit: int = 10) -> list[str]:
+    """Returns the latest human messages of a session history, newest first.
+
+    Args:
+        history: The session history, in chronological order.
+        limit: The number of latest messages to look at. Defaults to 10.
+
+    Returns:
+        A list of strings, where each string is the content of a human message.
+        The list is limited by the `CONVERSATION_CONTEXT` constant.
+    """
+    messages = [
+        msg["content"] for msg in reversed(history[-limit:]) if msg["type"] == "human"
+    ]
+    return messages[:CONVERSATION_CONTEXT]
+
+
+def to_model_history(
+    history: list[Dict[str, str]], limit: int = 10
+) -> list[ModelRequest | ModelResponse]:
+    """Converts the latest messages of a session history for Pydantic AI.
+
+    Args:
+        history: The session history, in chronological order.
+        limit: The number of latest messages to convert. Defaults to 10.
+
+    Returns:
+        A list of `ModelRequest` objects for "human" messages and `ModelResponse`
+        objects for the others, in chronological order.
+    """
+    return [
+        ModelRequest(parts=[UserPromptPart(content=msg["content"])])
+        if msg["type"] == "human"
+        else ModelResponse(parts=[TextPart(content=msg["content"])])
+        for msg in history[-limit:]
+    ]
+
+
+async def fetch_human_session_history(session_id: str, limit: int = 10) -> list[str]:
+    """Fetches the most recent human conversation history for a given session.
+
+    This function looks at the `limit` most recent messages of the session, as
+    returned by `fetch_session_history`, and returns the contents of the "human"
+    ones, newest first, limited by the `CONVERSATION_CONTEXT` constant.
+
+    Args:
+        session_id: The unique identifier of the session.
+        limit: The maximum number of messages to look at. Defaults to 10, and is
+            capped at `SESSION_HISTORY_WINDOW`.
+
+    Returns:
+        A list of strings, where each string is the content of a human message.
+        The list is limited by the `CONVERSATION_CONTEXT` constant.
+
+    Raises:
+        HTTPException: If an error occurs during the database query, with a 500
+        status code and error details.
+    """
+    return to_human_history(await fetch_session_history(session_id), limit)
+
 
 async def fetch_conversation_history(
     session_id: str, limit: int = 10
 ) -> list[ModelRequest | ModelResponse]:
     """Fetches the most recent conversation history for a given session.
 
-    This function retrieves a specified number of the most recent messages from the
-    `MESSAGES` table in Supabase, ordering them by creation time in descending
-    order. It then converts the messages into a list of `ModelRequest` or
+    This function converts the `limit` most recent messages of the session, as
+    returned by `fetch_session_history`, into a list of `ModelRequest` or
     `ModelResponse` objects, based on the message type ("human" or other). The
     list is returned in chronological order (oldest to newest).
 
     Args:
         session_id: The unique identifier of the session.
-        limit: The maximum number of messages to retrieve. Defaults to 10.
+        limit: The maximum number of messages to retrieve. Defaults to 10, and is
+            capped at `SESSION_HISTORY_WINDOW`.
 
     Returns:
         A list of `ModelRequest` or `ModelResponse` objects, representing the
@@ -83,69 +185,27 @@ async def fetch_conversation_history(
         HTTPException: If an error occurs during the database query, with a 500
         status code and error details.
     """
-    try:
-        response = (
-            SUPABASE_CLIENT.table(MESSAGES)
-            .select("*")
-            .eq("session_id", session_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
-        )
-
-        # Convert to list and reverse to get chronological order
-        conversation_history = response.data[::-1]
-
-        # Convert conversation history to format expected by Pydantic AI
-        messages = []
-        for msg in conversation_history:
-            msg_data = msg["message"]
-            msg_type = msg_data["type"]
-            msg_content = msg_data["content"]
-            msg = (
-                ModelRequest(parts=[UserPromptPart(content=msg_content)])
-                if msg_type == "human"
-                else ModelResponse(parts=[TextPart(content=msg_content)])
-            )
-            messages.append(msg)
-        return messages
-    except Exception as e:
-        print(f"Error>> Failed at supabase_util: {str(e)}")
-        raise HTTPException(
-            status_code=500, detail=f"Failed to fetch_conversation_history: {str(e)}"
-        )
-
+    return to_model_history(await fetch_session_history(session_id), limit)
 
-async def store_message(
-    session_id: str, message_type: str, content: str, data: Optional[Dict] = None
-):
-    """Stores a message in the Supabase `MESSAGES` table.
 
-    This function inserts a new message into the `MESSAGES` table, including the
-    session ID, message type, content, and any optional data.
+async def store_message_batch(rows: List[Dict[str, Any]]):
+    """Stores many messages in the Supabase `MESSAGES` table in one insert.
 
     Args:
-        session_id: The unique identifier of the session.
-        message_type: The type of the message (e.g., "human", "ai").
-        content: The content of the message.
-        data: An optional dictionary containing additional message data. Defaults to None.
+        rows: The rows to insert, each with the `session_id`, `created_at` and
+            `message` columns.
 
     Raises:
         HTTPException: If an error occurs during the database insertion, with a 500
         status code and error details.
     """
-    message_obj = {"type": message_type, "content": content}
-    if data:
-        message_obj["data"] = data
-
     try:
-        SUPABASE_CLIENT.table(MESSAGES).insert(
-            {"session_id": session_id, "message": message_obj}
-        ).execute()
+        client = await get_supabase_client()
+        await client.table(MESSAGES).insert(rows).execute()
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to store_message: {str(e)}"
+            status_code=500, detail=f"Failed to store_message_batch: {str(e)}"
         )
 
 
@@ -154,7 +214,8 @@ async def get_active_streams() -> List[Dict[str, Any]]:
     """Retrieves all active streams from the `YT_STREAMS` table.
 
     This function queries the `YT_STREAMS` table to find all rows where the
-    `is_active` flag is set to `StateEnum.YES.value`.
+    `is_active` flag is set to `StateEnum.YES.value`. The result is served from
+    `active_stream_cache` until it expires or a stream is started or stopped.
 
     Returns:
         A list of dictionaries, where each dictionary represents an active stream.
@@ -165,14 +226,31 @@ async def get_active_streams() -> List[Dict[str, Any]]:
         HTTPException: If an error occurs during the database query, with a 500
         status code and error details.
     """
+    cached_streams = active_stream_cache.get_all()
+    if cached_streams is not None:
+        return [
+            stream.model_dump(include={"session_id", "live_chat_id", "next_chat_page"})
+            for stream in cached_streams
+        ]
     try:
-        response = (
-            SUPABASE_CLIENT.table(YT_STREAMS)
-            .select("session_id, live_chat_id, next_chat_page")
+        client = await get_supabase_client()
+        response = await (
+            client.table(YT_STREAMS)
+            .select("session_id, video_id, live_chat_id, next_chat_page, is_active")
             .eq("is_active", StateEnum.YES.value)
             .execute()
         )
-        return response.data
+        active_stream_cache.put_all(
+            [StreamMetadataDB(**stream) for stream in response.data]
+        )
+        return [
+            {
+                "session_id": stream["session_id"],
+                "live_chat_id": stream["live_chat_id"],
+                "next_chat_page": stream["next_chat_page"],
+            }
+            for stream in response.data
+        ]
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -185,7 +263,9 @@ async def get_active_stream(session_id: str) -> Optional[StreamMetadataDB]:
 
     This function queries the `YT_STREAMS` table to find the active stream
     associated with the provided `session_id`. A stream is considered active if
-    its `is_active` flag is set to `StateEnum.YES.value`.
+    its `is_active` flag is set to `StateEnum.YES.value`. Found streams are
+    served from `active_stream_cache` until they expire; a missing stream is
+    always looked up again, since another worker may have just started it.
 
     Args:
         session_id: The unique identifier of the session.
@@ -198,10 +278,14 @@ async def get_active_stream(session_id: str) -> Optional[StreamMetadataDB]:
         HTTPException: If an error occurs during the database query, with a 500
         status code and error details.
     """
+    cached_stream = active_stream_cache.get(session_id)
+    if cached_stream is not None:
+        return cached_stream
     try:
-        response = (
-            SUPABASE_CLIENT.table(YT_STREAMS)
-            .select("*")
+        client = await get_supabase_client()
+        response = await (
+            client.table(YT_STREAMS)
+            .select("session_id, video_id, live_chat_id, next_chat_page, is_active")
             .eq("session_id", session_id)
             .eq("is_active", StateEnum.YES.value)
             .execute()
@@ -209,13 +293,15 @@ async def get_active_stream(session_id: str) -> Optional[StreamMetadataDB]:
         if not response.data:
             return None
         active_stream = response.data[0]
-        return StreamMetadataDB(
+        stream_metadata_db = StreamMetadataDB(
             session_id=active_stream["session_id"],
             video_id=active_stream["video_id"],
             live_chat_id=active_stream["live_chat_id"],
             next_chat_page=active_stream["next_chat_page"],
             is_active=active_stream["is_active"],
         )
+        active_stream_cache.put(stream_metadata_db)
+        return stream_metadata_db
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -237,7 +323,8 @@ async def start_stream(stream_metadata_db: StreamMetadataDB):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).insert(
+        client = await get_supabase_client()
+        await client.table(YT_STREAMS).insert(
             {
                 "session_id": stream_metadata_db.session_id,
                 "video_id": stream_metadata_db.video_id,
@@ -246,6 +333,7 @@ async def start_stream(stream_metadata_db: StreamMetadataDB):
                 "is_active": stream_metadata_db.is_active,
             }
         ).execute()
+        active_stream_cache.invalidate(stream_metadata_db.session_id)
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start_stream: {str(e)}")
@@ -265,9 +353,11 @@ async def deactivate_existing_streams(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).update({"is_active": StateEnum.NO.value}).eq(
+        client = await get_supabase_client()
+        await client.table(YT_STREAMS).update({"is_active": StateEnum.NO.value}).eq(
             "session_id", session_id
         ).execute()
+        active_stream_cache.invalidate(session_id)
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -291,9 +381,11 @@ async def update_next_chat_page(live_chat_id: str, next_chat_page: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).update({"next_chat_page": next_chat_page}).eq(
+        client = await get_supabase_client()
+        await client.table(YT_STREAMS).update({"next_chat_page": next_chat_page}).eq(
             "live_chat_id", live_chat_id
         ).eq("is_active", StateEnum.YES.value).execute()
+        active_stream_cache.update_next_chat_page(live_chat_id, next_chat_page)
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -302,33 +394,59 @@ async def update_next_chat_page(live_chat_id: str, next_chat_page: str):
 
 
 # YT_BUZZ table queries
-async def store_buzz(buzz: StreamBuzzModel):
-    """Stores a buzz event in the `YT_BUZZ` table.
+def _buzz_row(buzz: StreamBuzzModel) -> Dict[str, Any]:
+    return {
+        "buzz_type": buzz.buzz_type,
+        "session_id": buzz.session_id,
+        "original_chat": buzz.original_chat,
+        "author": buzz.author,
+        "generated_response": buzz.generated_response,
+        "buzz_status": BuzzStatusEnum.FOUND.value,
+    }
 
-    This function inserts a new row into the `YT_BUZZ` table with the provided
-    buzz details.
+
+async def store_buzz_batch(buzz_list: List[StreamBuzzModel]) -> BatchInsertResult:
+    """Stores many buzz events in the `YT_BUZZ` table with multi-row inserts.
+
+    This function writes the buzz in chunks of `BUZZ_INSERT_BATCH_SIZE` rows, one
+    insert per chunk, so a whole classification pass costs a handful of round
+    trips instead of one per buzz. A failed chunk is recorded in the result and
+    does not stop the remaining chunks.
 
     Args:
-        buzz: A `StreamBuzzModel` object containing the buzz details.
+        buzz_list: The `StreamBuzzModel` objects to store.
+
+    Returns:
+        A `BatchInsertResult` with the number of inserted rows and the buzz and
+        error message of every failed chunk.
 
     Raises:
-        HTTPException: If an error occurs during the database insertion, with a 500
-        status code and error details.
+        HTTPException: If the Supabase client cannot be created, with a 500 status
+        code and error details.
     """
+    result = BatchInsertResult()
+    if not buzz_list:
+        return result
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).insert(
-            {
-                "buzz_type": buzz.buzz_type,
-                "session_id": buzz.session_id,
-                "original_chat": buzz.original_chat,
-                "author": buzz.author,
-                "generated_response": buzz.generated_response,
-                "buzz_status": BuzzStatusEnum.FOUND.value,
-            }
-        ).execute()
+        client = await get_supabase_client()
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to store_buzz: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to store_buzz_batch: {str(e)}"
+        )
+
+    for start in range(0, len(buzz_list), BUZZ_INSERT_BATCH_SIZE):
+        chunk = buzz_list[start:start + BUZZ_INSERT_BATCH_SIZE]
+        try:
+            await client.table(YT_BUZZ).insert(
+                [_buzz_row(buzz) for buzz in chunk]
+            ).execute()
+            result.inserted += len(chunk)
+        except Exception as e:
+            print(f"Error>> Failed at supabase_util: store_buzz_batch: {str(e)}")
+            result.failed.extend(chunk)
+            result.errors.append(str(e))
+    return result
 
 
 async def get_current_buzz(session_id: str) -> Optional[Dict[str, Any]]:
@@ -353,8 +471,9 @@ async def get_current_buzz(session_id: str) -> Optional[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
-            SUPABASE_CLIENT.table(YT_BUZZ)
+        client = await get_supabase_client()
+        response = await (
+            client.table(YT_BUZZ)
             .select("buzz_type, original_chat, author, generated_response")
             .eq("session_id", session_id)
             .eq("buzz_status", BuzzStatusEnum.ACTIVE.value)
@@ -387,8 +506,9 @@ async def mark_current_buzz_inactive(session_id: str):
         status code and error details.
     """
     try:
-        response = (
-            SUPABASE_CLIENT.table(YT_BUZZ)
+        client = await get_supabase_client()
+        response = await (
+            client.table(YT_BUZZ)
             .select("id")
             .eq("session_id", session_id)
             .eq("buzz_status", BuzzStatusEnum.ACTIVE.value)
@@ -398,7 +518,7 @@ async def mark_current_buzz_inactive(session_id: str):
             .execute()
         )
         if response.data:
-            SUPABASE_CLIENT.table(YT_BUZZ).update(
+            await client.table(YT_BUZZ).update(
                 {"buzz_status": BuzzStatusEnum.INACTIVE.value}
             ).eq("id", response.data[0]["id"]).execute()
     except Exception as e:
@@ -408,137 +528,158 @@ async def mark_current_buzz_inactive(session_id: str):
         )
 
 
-async def get_found_buzz() -> list[Dict[str, Any]]:
-    """Retrieves all buzz events with a status of "FOUND".
-
-    This function queries the `YT_BUZZ` table to retrieve all rows where the
-    `buzz_status` is set to `BuzzStatusEnum.FOUND.value`.
-
-    Returns:
-        A list of dictionaries, where each dictionary contains the `id`,
-        `buzz_type`, and `original_chat` of a found buzz event.
-
-    Raises:
-        HTTPException: If an error occurs during the database query, with a 500
-        status code and error details.
-    """
-    try:
-        response = (
-            SUPABASE_CLIENT.table(YT_BUZZ)
-            .select("id, session_id, author, buzz_type, original_chat")
-            .eq("buzz_status", BuzzStatusEnum.FOUND.value)
-            .order("created_at")
-            .execute()
-        )
-        return response.data
-    except Exception as e:
-        print(f"Error>> Failed at supabase_util: {str(e)}")
-        raise HTTPException(
-            status_code=500, detail=f"Failed to get_found_buzz: {str(e)}"
-        )
-
-
-async def update_buzz_status_by_id(buzz_id: int, buzz_status: str):
-    """Updates the status of a specific buzz event by its ID.
+async def update_buzz_status_by_session_id(session_id: str, buzz_status: int):
+    """Updates the status of all buzz events for a given session.
 
-    This function updates the `buzz_status` column in the `YT_BUZZ` table for the
-    row that matches the provided `id`.
+    This function updates the `buzz_status` column in the `YT_BUZZ` table for all
+    rows that match the provided `session_id`, and clears their buzz queue claims
+    so a worker still holding one cannot complete or release the buzz later.
 
     Args:
-        buzz_id: The unique identifier of the buzz event to update.
-        buzz_status: The new status to set for the buzz event.
+        session_id: The unique identifier of the session.
+        buzz_status: The new status to set for the buzz events.
 
     Raises:
         HTTPException: If an error occurs during the database update, with a 500
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
-            "id", buzz_id
-        ).execute()
+        client = await get_supabase_client()
+        await client.table(YT_BUZZ).update(
+            {"buzz_status": buzz_status, "claimed_by": None, "claimed_until": None}
+        ).eq("session_id", session_id).execute()
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to update_buzz_status: {str(e)}"
+            status_code=500, detail=f"Failed to read_existing_buzz: {str(e)}"
         )
 
 
-async def update_buzz_status_by_session_id(session_id: str, buzz_status: int):
-    """Updates the status of all buzz events for a given session.
+async def update_buzz_response_by_id(
+    buzz_id: int, owner: str, generated_response: str
+):
+    """Updates the response of a specific buzz event by its ID.
 
-    This function updates the `buzz_status` column in the `YT_BUZZ` table for all
-    rows that match the provided `session_id`.
+    This function updates the `buzz_status` to `BuzzStatusEnum.ACTIVE.value` and
+    the `generated_response` column in the `YT_BUZZ` table for the row that
+    matches the provided `id`, and clears its buzz queue claim. The row is only
+    updated while `owner` holds the claim and the buzz is still PROCESSING, so a
+    worker whose claim expired cannot overwrite the result of the worker that
+    claimed the buzz after it, nor bring back a buzz whose session was retired.
 
     Args:
-        session_id: The unique identifier of the session.
-        buzz_status: The new status to set for the buzz events.
+        buzz_id: The unique identifier of the buzz event to update.
+        owner: The unique identifier of the worker that claimed the buzz.
+        generated_response: The new generated response to set for the buzz event.
 
     Raises:
         HTTPException: If an error occurs during the database update, with a 500
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
-            "session_id", session_id
+        client = await get_supabase_client()
+        await client.table(YT_BUZZ).update(
+            {
+                "buzz_status": BuzzStatusEnum.ACTIVE.value,
+                "generated_response": generated_response,
+                "claimed_by": None,
+                "claimed_until": None,
+            }
+        ).eq("id", buzz_id).eq("claimed_by", owner).eq(
+            "buzz_status", BuzzStatusEnum.PROCESSING.value
         ).execute()
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to read_existing_buzz: {str(e)}"
+            status_code=500, detail=f"Failed to update_buzz_response: {str(e)}"
         )
 
 
-async def update_buzz_status_batch_by_id(id_list: list[int], buzz_status: int):
-    """Updates the status of multiple buzz events by their IDs.
+async def claim_buzz(
+    owner: str,
+    batch_size: int,
+    visibility_timeout: float,
+    max_attempts: int,
+    after: Optional[Tuple[str, int]] = None,
+) -> list[Dict[str, Any]]:
+    """Claims the oldest claimable buzz events for a worker.
 
-    This function updates the `buzz_status` column in the `YT_BUZZ` table for all
-    rows that match the provided list of `id_list`.
+    This function calls the `claim_buzz` RPC function in Supabase, which locks
+    FOUND buzz and buzz whose claim has expired with `FOR UPDATE SKIP LOCKED` and
+    marks them PROCESSING for `owner` until the visibility timeout. Reclaiming an
+    expired claim counts as a failed attempt. Concurrent workers therefore never
+    claim the same buzz. Buzz is paged with a keyset cursor on (`created_at`,
+    `id`) rather than an offset.
 
     Args:
-        id_list: A list of unique identifiers of the buzz events to update.
-        buzz_status: The new status to set for the buzz events.
+        owner: The unique identifier of the worker claiming the buzz.
+        batch_size: The maximum number of buzz events to claim.
+        visibility_timeout: The number of seconds the claim stays valid.
+        max_attempts: The number of failed attempts after which a buzz is given
+            up on.
+        after: The (`created_at`, `id`) of the last buzz of the previous page, or
+            None to start from the oldest buzz.
+
+    Returns:
+        A list of dictionaries, where each dictionary is a claimed `YT_BUZZ` row,
+        oldest first.
 
     Raises:
-        HTTPException: If an error occurs during the database update, with a 500
+        HTTPException: If an error occurs during the database query, with a 500
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).in_(
-            "id", id_list
+        client = await get_supabase_client()
+        response = await client.rpc(
+            "claim_buzz",
+            {
+                "claim_owner": owner,
+                "batch_size": batch_size,
+                "visibility_seconds": int(visibility_timeout),
+                "max_attempts": max_attempts,
+                "after_created_at": after[0] if after else None,
+                "after_id": after[1] if after else None,
+            },
         ).execute()
+        return sorted(response.data, key=lambda row: (row["created_at"], row["id"]))
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to update_buzz_status: {str(e)}"
+            status_code=500, detail=f"Failed to claim_buzz: {str(e)}"
         )
 
 
-async def update_buzz_response_by_id(buzz_id: int, generated_response: str):
-    """Updates the response of a specific buzz event by its ID.
+async def release_buzz(buzz_id: int, owner: str, count_attempt: bool):
+    """Puts a claimed buzz event back in the queue if it is claimed by `owner`.
 
-    This function updates the `buzz_status` to `BuzzStatusEnum.ACTIVE.value` and
-    the `generated_response` column in the `YT_BUZZ` table for the row that
-    matches the provided `id`.
+    This function calls the `release_buzz` RPC function in Supabase, which sets
+    the `buzz_status` back to `BuzzStatusEnum.FOUND.value` and clears the claim,
+    so the buzz can be claimed again right away. A buzz that is no longer
+    PROCESSING, such as one retired with its session, is left alone.
 
     Args:
-        buzz_id: The unique identifier of the buzz event to update.
-        generated_response: The new generated response to set for the buzz event.
+        buzz_id: The unique identifier of the buzz event to release.
+        owner: The unique identifier of the worker releasing the buzz.
+        count_attempt: Whether the failure counts against the buzz's attempts.
 
     Raises:
         HTTPException: If an error occurs during the database update, with a 500
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update(
+        client = await get_supabase_client()
+        await client.rpc(
+            "release_buzz",
             {
-                "buzz_status": BuzzStatusEnum.ACTIVE.value,
-                "generated_response": generated_response,
-            }
-        ).eq("id", buzz_id).execute()
+                "release_id": buzz_id,
+                "claim_owner": owner,
+                "count_attempt": count_attempt,
+            },
+        ).execute()
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to update_buzz_response: {str(e)}"
+            status_code=500, detail=f"Failed to release_buzz: {str(e)}"
         )
 
 
@@ -557,7 +698,8 @@ async def store_reply(reply: WriteChatModel):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).insert(
+        client = await get_supabase_client()
+        await client.table(YT_REPLY).insert(
             {
                 "session_id": reply.session_id,
                 "live_chat_id": reply.live_chat_id,
@@ -587,8 +729,9 @@ async def get_unwritten_replies() -> list[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
-            SUPABASE_CLIENT.table(YT_REPLY)
+        client = await get_supabase_client()
+        response = await (
+            client.table(YT_REPLY)
             .select("session_id, live_chat_id, reply")
             .eq("is_written", StateEnum.NO.value)
             .lt("retry_count", MODEL_RETRIES)
@@ -617,7 +760,8 @@ async def mark_replies_pending(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update(
+        client = await get_supabase_client()
+        await client.table(YT_REPLY).update(
             {"is_written": StateEnum.PENDING.value}
         ).eq("live_chat_id", live_chat_id).eq("is_written", StateEnum.NO.value).execute()
     except Exception as e:
@@ -642,7 +786,8 @@ async def mark_replies_success(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
+        client = await get_supabase_client()
+        await client.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
             "live_chat_id", live_chat_id
         ).eq("is_written", StateEnum.PENDING.value).execute()
     except Exception as e:
@@ -668,7 +813,8 @@ async def mark_replies_failed(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update(
+        client = await get_supabase_client()
+        await client.table(YT_REPLY).update(
             {"is_written": StateEnum.NO.value}
         ).inc({"retry_count": 1}).eq("live_chat_id", live_chat_id).eq(
             "is_written", StateEnum.PENDING.value
@@ -694,7 +840,8 @@ async def deactivate_replies(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
+        client = await get_supabase_client()
+        await client.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
             "session_id", session_id
         ).execute()
     except Exception as e:
@@ -722,8 +869,9 @@ async def get_kb_file_name(session_id: str) -> Optional[str]:
         status code and error details.
     """
     try:
-        response = (
-            SUPABASE_CLIENT.table(STREAMER_KB)
+        client = await get_supabase_client()
+        response = await (
+            client.table(STREAMER_KB)
             .select("file_name")
             .eq("session_id", session_id)
             .execute()
@@ -750,7 +898,8 @@ async def delete_previous_kb_entries(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(STREAMER_KB).delete().eq(
+        client = await get_supabase_client()
+        await client.table(STREAMER_KB).delete().eq(
             "session_id", session_id
         ).execute()
     except Exception as e:
@@ -777,6 +926,7 @@ async def insert_chunk(chunk: ProcessedChunk):
         status code and error details.
     """
     try:
+        client = await get_supabase_client()
         data = {
             "session_id": chunk.session_id,
             "file_name": chunk.file_name,
@@ -787,7 +937,7 @@ async def insert_chunk(chunk: ProcessedChunk):
             "embedding": chunk.embedding,
         }
 
-        result = SUPABASE_CLIENT.table(STREAMER_KB).insert(data).execute()
+        result = await client.table(STREAMER_KB).insert(data).execute()
         print(f"Inserted chunk {chunk.chunk_number} for {chunk.session_id}")
         return result
     except Exception as e:
@@ -820,7 +970,8 @@ async def get_matching_chunks(
         status code and error details.
     """
     try:
-        response = SUPABASE_CLIENT.rpc(
+        client = await get_supabase_client()
+        response = await client.rpc(
             "match_streamer_knowledge",
             {
                 "query_embedding": query_embedding,
@@ -835,3 +986,60 @@ async def get_matching_chunks(
         raise HTTPException(
             status_code=500, detail=f"Failed to get_matching_chunks: {str(e)}"
         )
+
+
+# SCHEDULER_LEASES table queries
+async def try_acquire_lease(name: str, owner: str, ttl: float) -> bool:
+    """Acquires or renews the lease of a scheduled job.
+
+    This function calls the `try_acquire_lease` RPC function in Supabase, which
+    atomically grants the lease to `owner` if it is free, expired or already held
+    by `owner`, and extends it by `ttl` seconds.
+
+    Args:
+        name: The name of the scheduled job.
+        owner: The unique identifier of the worker asking for the lease.
+        ttl: The number of seconds the lease stays valid.
+
+    Returns:
+        True if `owner` holds the lease, otherwise False.
+
+    Raises:
+        HTTPException: If an error occurs during the database query, with a 500
+        status code and error details.
+    """
+    try:
+        client = await get_supabase_client()
+        response = await client.rpc(
+            "try_acquire_lease",
+            {"lease_name": name, "lease_owner": owner, "ttl_seconds": int(ttl)},
+        ).execute()
+        return bool(response.data)
+    except Exception as e:
+        print(f"Error>> Failed at supabase_util: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to try_acquire_lease: {str(e)}"
+        )
+
+
+async def release_lease(name: str, owner: str):
+    """Releases the lease of a scheduled job if it is held by `owner`.
+
+    Args:
+        name: The name of the scheduled job.
+        owner: The unique identifier of the worker releasing the lease.
+
+    Raises:
+        HTTPException: If an error occurs during the database deletion, with a 500
+        status code and error details.
+    """
+    try:
+        client = await get_supabase_client()
+        await client.table(SCHEDULER_LEASES).delete().eq("name", name).eq(
+            "owner", owner
+        ).execute()
+    except Exception as e:
+        print(f"Error>> Failed at supabase_util: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to release_lease: {str(e)}"
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from constants.constants import (OAUTH_TOKEN_URI,
+                                 YOUTUBE_TOKEN_DEFAULT_LIFETIME,
+                                 YOUTUBE_TOKEN_REFRESH_MARGIN,
+                                 YOUTUBE_TOKEN_REFRESH_RETRY_DELAY, YOUTUBE_SSL)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Retrieve and parse the dictionary
+YOUTUBE_API_KEY_BUNCHES_ENV = json.loads(os.getenv("YOUTUBE_API_KEY_BUNCHES"))
+
+
+class YouTubeTokenManager:
+    """Keeps the OAuth access token of every YouTube key bunch fresh in the background.
+
+    Each key bunch gets its own `Credentials`. After an initial refresh, a
+    background task refreshes each token `YOUTUBE_TOKEN_REFRESH_MARGIN` seconds
+    before it expires. Refreshes use the blocking google-auth transport, so they run
+    concurrently on worker threads. Callers read the current tokens without waiting
+    on a refresh.
+    """
+
+    def __init__(self, key_bunches: List[dict]):
+        self._key_bunches = key_bunches
+        self._credentials = [
+            Credentials(
+                None,  # No initial access token
+                refresh_token=key_bunch["refresh_token"],
+                token_uri=OAUTH_TOKEN_URI,
+                client_id=key_bunch["client_id"],
+                client_secret=key_bunch["client_secret"],
+                scopes=[YOUTUBE_SSL],
+            )
+            for key_bunch in key_bunches
+        ]
+        # Monotonic time at which each token is next refreshed
+        self._refresh_at = [0.0] * len(key_bunches)
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _refresh(self, index: int) -> None:
+        """Refreshes one token. Runs on a worker thread."""
+        creds = self._credentials[index]
+        try:
+            creds.refresh(Request())
+        except Exception as e:
+            print(f"Error>> Token refresh failed for key bunch {index + 1}: {e}")
+            retry_at = time.monotonic() + YOUTUBE_TOKEN_REFRESH_RETRY_DELAY
+            self._refresh_at[index] = retry_at
+            return
+
+        lifetime = YOUTUBE_TOKEN_DEFAULT_LIFETIME
+        if creds.expiry is not None:
+            # google-auth stores the expiry as a naive UTC datetime
+            expiry = creds.expiry.replace(tzinfo=timezone.utc)
+            lifetime = (expiry - datetime.now(timezone.utc)).total_seconds()
+        self._refresh_at[index] = (
+            time.monotonic() + max(0.0, lifetime - YOUTUBE_TOKEN_REFRESH_MARGIN)
+        )
+        self._key_bunches[index]["access_token"] = creds.token
+        print(f"Token refreshed successfully for key bunch {index + 1}.")
+
+    async def refresh_due(self) -> None:
+        """Refreshes, concurrently, every token that is due for a refresh."""
+        now = time.monotonic()
+        due = [
+            index
+            for index, refresh_at in enumerate(self._refresh_at)
+            if refresh_at <= now
+        ]
+        await asyncio.gather(
+            *(asyncio.to_thread(self._refresh, index) for index in due)
+        )
+
+    async def _refresh_forever(self) -> None:
+        """Sleeps until the next token is due, refreshes it and repeats."""
+        while True:
+            next_refresh_at = min(
+                self._refresh_at, default=time.monotonic() + YOUTUBE_TOKEN_DEFAULT_LIFETIME
+            )
+            await asyncio.sleep(max(1.0, next_refresh_at - time.monotonic()))
+            await self.refresh_due()
+
+    async def start(self) -> None:
+        """Refreshes every token once and starts the background refresh task.
+
+        Calling this again, or concurrently, has no effect.
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+            await self.refresh_due()
+            self._refresh_task = asyncio.create_task(self._refresh_forever())
+            self._started = True
+
+    async def stop(self) -> None:
+        """Stops the background refresh task. A later `start` restarts it."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+        self._started = False
+
+    async def get_key_bunches(self) -> List[dict]:
+        """Returns the key bunches with their current access tokens.
+
+        Only the first call before `start` waits for the initial refresh; after
+        that the tokens are read without any refresh on the caller's path.
+
+        Returns:
+            The key bunches, each with 'api_key' and a fresh 'access_token'.
+        """
+        if not self._started:
+            await self.start()
+        return self._key_bunches
+
+
+youtube_token_manager = YouTubeTokenManager(YOUTUBE_API_KEY_BUNCHES_ENV)
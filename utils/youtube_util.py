@@ -1,49 +1,41 @@
-import json
-import os
+import asyncio
 import re
 import time
+from collections import deque
+from typing import Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
-import requests
-from cachetools.func import ttl_cache
-from dotenv import load_dotenv
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from requests import HTTPError
+import httpx
+from httpx import HTTPError
 
-from constants.constants import (ALLOWED_DOMAINS, OAUTH_TOKEN_URI, YOUTUBE_API_ENDPOINT,
-                                 YOUTUBE_LIVE_API_ENDPOINT, YOUTUBE_SSL)
-from constants.enums import BuzzStatusEnum
+from constants.constants import (ALLOWED_DOMAINS, YOUTUBE_API_ENDPOINT,
+                                 YOUTUBE_LIVE_API_ENDPOINT,
+                                 YOUTUBE_LIVE_CHAT_INSERT_COST,
+                                 YOUTUBE_LIVE_CHAT_LIST_COST, YOUTUBE_REQUEST_TIMEOUT,
+                                 YOUTUBE_VIDEOS_LIST_COST)
+from exceptions.key_pool_exhausted_error import KeyPoolExhaustedError
 from exceptions.user_error import UserError
 from logger import log_method
-from utils import supabase_util
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Retrieve and parse the dictionary
-YOUTUBE_API_KEY_BUNCHES_ENV = json.loads(os.getenv("YOUTUBE_API_KEY_BUNCHES"))
-
-
-@ttl_cache(ttl=3600)
-def get_youtube_api_key_bunches():
-    youtube_api_key_bunches = []
-    for key_bunch in YOUTUBE_API_KEY_BUNCHES_ENV:
-        creds = Credentials(
-            None,  # No initial access token
-            refresh_token=key_bunch["refresh_token"],
-            token_uri=OAUTH_TOKEN_URI,
-            client_id=key_bunch["client_id"],
-            client_secret=key_bunch["client_secret"],
-            scopes=[YOUTUBE_SSL]
-        )
-        if not creds.valid:
-            creds.refresh(Request())
-            print("Token refreshed successfully.")
-        key_bunch["access_token"] = creds.token
-        youtube_api_key_bunches.append(key_bunch)
+from utils import http_util, supabase_util
+from utils.buzz_queue import get_buzz_queue
+from utils.circuit_breaker import youtube_breaker
+from utils.key_pool import youtube_key_pool
+from utils.message_writer import message_writer
+from utils.retry_util import (YOUTUBE_POLL_RETRY_POLICY, YOUTUBE_RETRY_POLICY,
+                              RetryDecision, RetryPolicy, parse_retry_after)
+from utils.token_util import youtube_token_manager
+
+
+async def get_youtube_api_key_bunches() -> list:
+    """Returns the YouTube key bunches with fresh OAuth access tokens.
 
-    return youtube_api_key_bunches
+    Tokens are kept fresh in the background by `youtube_token_manager`, so this does
+    not refresh anything on the caller's path once the manager has started.
+
+    Returns:
+        The key bunches, each with 'api_key' and 'access_token'.
+    """
+    return await youtube_token_manager.get_key_bunches()
 
 
 @log_method
@@ -158,79 +150,244 @@ async def get_stream_metadata(video_id: str, session_id: str) -> dict:
         raise
 
 
+def get_error_reason(response: httpx.Response) -> Optional[str]:
+    """Extracts the error reason, such as 'quotaExceeded', from a YouTube response.
+
+    Args:
+        response (httpx.Response): The failed YouTube API response.
+
+    Returns:
+        Optional[str]: The reason of the first error, or None if the response has
+            no parsable error body.
+    """
+    if not 400 <= response.status_code < 500:
+        return None
+    try:
+        return response.json().get("error", {}).get("errors", [{}])[0].get("reason")
+    except (ValueError, AttributeError, IndexError):
+        return None
+
+
+async def _request_with_retries(
+        method: str,
+        url: str,
+        params: dict,
+        use_keys: bool,
+        quota_cost: int,
+        content: Optional[str] = None,
+        session_id: Optional[str] = None,
+        retry_policy: RetryPolicy = YOUTUBE_RETRY_POLICY,
+) -> dict:
+    """Sends a request, retrying across the key pool as `retry_policy` decides.
+
+    Keys are picked by `youtube_key_pool`, least used first, and rotated on every
+    attempt; a key the pool starts cooling down is dropped. Each attempt is
+    charged `quota_cost` units against its key and is bounded by the time left
+    before the policy's deadline. Calls are shed while `youtube_breaker` is open;
+    any definite answer from YouTube, even an error, counts as a success for the
+    breaker. When no key bunch can afford the call, nothing is sent and the
+    breaker is left alone, since running out of quota says nothing about
+    YouTube's health. A request cancelled by its caller, like a poll cut off by
+    `STREAM_POLL_TIMEOUT`, is not counted either.
+
+    Args:
+        method (str): The HTTP method, "GET" or "POST".
+        url (str): The URL to send the request to.
+        params (dict): The query parameters of the request.
+        use_keys (bool): If True, uses 'api_key' for authentication;
+                        otherwise, uses 'access_token'.
+        quota_cost (int): The quota units the call is charged.
+        content (Optional[str]): The body of the request, if any.
+        session_id (Optional[str]): The session whose stream is deactivated if
+                        YouTube reports that its live chat has ended.
+        retry_policy (RetryPolicy): Decides whether and when to retry.
+
+    Returns:
+        dict: The JSON response if successful.
+
+    Raises:
+        CircuitOpenError: If the YouTube circuit is open.
+        KeyPoolExhaustedError: If no key bunch can afford the call.
+        HTTPError: If an error is permanent, every attempt fails or the deadline
+            passes.
+    """
+    api_key_bunches = deque(
+        youtube_key_pool.select(await get_youtube_api_key_bunches(), quota_cost)
+    )
+    if not api_key_bunches:
+        raise KeyPoolExhaustedError(quota_cost)
+    youtube_breaker.before_call()
+    # Whether YouTube gave a definite answer, which keeps its circuit closed
+    answered = False
+    cancelled = False
+    chat_ended = False
+    try:
+        client = http_util.get_http_client()
+        deadline = time.monotonic() + retry_policy.deadline
+        for attempt in range(retry_policy.max_attempts):
+            if not api_key_bunches:
+                break
+            timeout = min(YOUTUBE_REQUEST_TIMEOUT, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            key_dict = api_key_bunches[0]
+            retry_after = None
+            try:
+                if use_keys:
+                    headers = {}
+                    params["key"] = key_dict["api_key"]
+                else:
+                    headers = {"Authorization": f"Bearer {key_dict['access_token']}"}
+                if content is not None:
+                    headers["Content-Type"] = "application/json"
+                response = await client.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    content=content,
+                    timeout=timeout,
+                )
+
+                if response.status_code == 200:
+                    youtube_key_pool.record_success(key_dict, quota_cost)
+                    response_json = response.json()
+                    answered = True
+                    return response_json
+
+                error_reason = get_error_reason(response)
+                decision = retry_policy.decide(response.status_code, error_reason)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 403 and error_reason == "liveChatEnded":
+                    answered = True
+                    chat_ended = True
+                    youtube_key_pool.charge(key_dict, quota_cost)
+                    print("Live Chat Ended: Deactivating stream and breaking...")
+                    break
+                if decision == RetryDecision.STOP:
+                    answered = True
+                    youtube_key_pool.charge(key_dict, quota_cost)
+                    print(
+                        f"Bad Request ({response.status_code}): {error_reason}\n"
+                        f"Breaking..."
+                    )
+                    break
+
+                if decision == RetryDecision.SWITCH_KEY:
+                    # A key problem is still a definite answer from YouTube
+                    answered = True
+                youtube_key_pool.record_failure(
+                    key_dict, quota_cost, reason=error_reason
+                )
+                print(
+                    f"Attempt {attempt + 1}: {response.status_code=}\nBody="
+                    f"{response.text}. Retrying..."
+                )
+
+            except (httpx.HTTPError, ValueError) as e:
+                # Log the exception
+                decision = retry_policy.decide(None)
+                youtube_key_pool.record_failure(key_dict, 0)
+                print(f"Error>> {str(e)}\nAttempt {attempt + 1}. Retrying...")
+
+            if decision == RetryDecision.SWITCH_KEY:
+                # The key is unusable for now; move on to the next one right away
+                api_key_bunches.popleft()
+                continue
+
+            # Back off before retrying with the next key, unless it would pass the
+            # deadline. A key the pool now cools down, after a rate limit or
+            # repeated failures, is dropped like an unusable one.
+            if youtube_key_pool.is_available(key_dict):
+                api_key_bunches.rotate(-1)
+            else:
+                api_key_bunches.popleft()
+                if not api_key_bunches:
+                    break
+            delay = retry_policy.backoff(attempt, retry_after)
+            if time.monotonic() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+
+        if chat_ended and session_id:
+            # Outside the retry loop, so a database error is not blamed on a key
+            await deactivate_stream(
+                session_id=session_id,
+                message="The current YouTube Live Stream has ended. You can explore the buzz so far, but replies are disabled. Start a new stream anytime!",
+            )
+
+        # If all attempts fail
+        raise HTTPError("All API keys failed, maximum retries reached or bad request.")
+    except asyncio.CancelledError:
+        # Cut off by the caller's deadline; says nothing about YouTube's health
+        cancelled = True
+        raise
+    finally:
+        # Also runs when the caller cancels the request, so a probe never hangs
+        if cancelled:
+            youtube_breaker.record_cancelled()
+        elif answered:
+            youtube_breaker.record_success()
+        else:
+            youtube_breaker.record_failure()
+
+
 @log_method
 async def post_request_with_retries(
-        url: str, params: dict, payload: dict, use_keys: bool = False
+        url: str,
+        params: dict,
+        payload: str,
+        use_keys: bool = False,
+        quota_cost: int = YOUTUBE_LIVE_CHAT_INSERT_COST,
 ) -> dict:
     """
     Makes a POST request with retries using multiple API keys.
 
-    This function iterates through a list of API keys, attempting to make a POST
-    request to the specified URL. If a request fails, it retries with the next key
-    after a short delay. The function handles both API key authentication and
-    bearer token authentication based on the `use_keys` flag.
+    The request is retried across the API keys picked by `youtube_key_pool` as
+    `YOUTUBE_RETRY_POLICY` decides: transient errors back off exponentially with
+    jitter, key errors move on to the next key and permanent errors stop. Each
+    attempt is charged `quota_cost` units against its key. The function handles
+    both API key authentication and bearer token authentication based on the
+    `use_keys` flag.
 
     Args:
         url (str): The URL to make the POST request to.
         params (dict): The parameters to include in the POST request.
-        payload (dict): The payload to include in the POST request.
+        payload (str): The JSON payload to include in the POST request.
         use_keys (bool): If True, uses 'api_key' for authentication;
                         otherwise, uses 'access_token'. Defaults to False.
+        quota_cost (int): The quota units the call is charged. Defaults to the
+                        cost of a liveChatMessages.insert call.
 
     Returns:
         dict: The JSON response from the POST request if successful.
 
     Raises:
+        KeyPoolExhaustedError: If no API key can afford the call right now.
         HTTPError: If all API keys fail or the maximum number of retries is reached.
     """
-    api_key_bunches = get_youtube_api_key_bunches()
-    for attempt, key_dict in enumerate(api_key_bunches):
-        if use_keys:
-            params["key"] = key_dict["api_key"]
-            response = requests.post(url, params=params, data=payload, timeout=10)
-        else:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key_dict['access_token']}",
-            }
-            response = requests.post(
-                url, headers=headers, params=params, data=payload, timeout=10
-            )
-
-        try:
-            if response.status_code == 200:
-                return response.json()
-
-            # Log the failure
-            print(
-                f"Attempt {attempt + 1}: {response.status_code=}\nBody="
-                f"{response.json()}. Retrying..."
-            )
-
-        except requests.exceptions.RequestException as e:
-            # Log the exception
-            print(
-                f"Error>> {str(e)}\nAttempt {attempt + 1}: {response.status_code=}\n"
-                f"body={response.json()}. Retrying..."
-            )
-
-        # Retry after a short delay
-        time.sleep(2)
-
-    # If all attempts fail
-    raise HTTPError("All API keys failed or maximum retries reached.")
+    return await _request_with_retries(
+        "POST", url, params, use_keys, quota_cost, content=payload
+    )
 
 
 @log_method
 async def get_request_with_retries(
-        url: str, params: dict, session_id: str, use_keys: bool = True
+        url: str,
+        params: dict,
+        session_id: str,
+        use_keys: bool = True,
+        quota_cost: int = YOUTUBE_VIDEOS_LIST_COST,
+        retry_policy: RetryPolicy = YOUTUBE_RETRY_POLICY,
 ) -> dict:
     """Makes a GET request with retries using multiple API keys.
 
-    This function iterates through a list of API keys, attempting to make a GET
-    request to the specified URL. If a request fails, it retries with the next key
-    after a short delay. The function handles both API key authentication and
-    bearer token authentication based on the `use_keys` flag.
+    The request is retried across the API keys picked by `youtube_key_pool` as
+    `retry_policy` decides: transient errors back off exponentially with
+    jitter, key errors move on to the next key and permanent errors stop. Each
+    attempt is charged `quota_cost` units against its key. The function handles
+    both API key authentication and bearer token authentication based on the
+    `use_keys` flag.
 
     Args:
         url (str): The URL to make the GET request to.
@@ -238,64 +395,27 @@ async def get_request_with_retries(
         session_id (str): The session ID associated with the request.
         use_keys (bool): If True, uses 'api_key' for authentication;
                         otherwise, uses 'access_token'. Defaults to True.
+        quota_cost (int): The quota units the call is charged. Defaults to the
+                        cost of a videos.list call.
+        retry_policy (RetryPolicy): Decides whether and when to retry. Defaults
+                        to `YOUTUBE_RETRY_POLICY`.
 
     Returns:
         dict: The JSON response from the GET request if successful.
 
     Raises:
+        KeyPoolExhaustedError: If no API key can afford the call right now.
         HTTPError: If all API keys fail or the maximum number of retries is reached.
     """
-    api_key_bunches = get_youtube_api_key_bunches()
-    for attempt, key_dict in enumerate(api_key_bunches):
-        if use_keys:
-            params["key"] = key_dict["api_key"]
-            response = requests.get(url, params=params, timeout=10)
-        else:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key_dict['access_token']}",
-            }
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-
-        try:
-            if response.status_code == 200:
-                return response.json()
-            error_reason = None
-            if 400 <= response.status_code < 500:
-                error_reason = (
-                    response.json()
-                    .get("error", {})
-                    .get("errors", [{}])[0]
-                    .get("reason")
-                )
-            if response.status_code == 400:
-                print(f"Bad Request (400): {error_reason}\nBreaking...")
-                break
-            elif response.status_code == 403 and error_reason == "liveChatEnded":
-                print("Live Chat Ended: Deactivating stream and breaking...")
-                await deactivate_stream(
-                    session_id=session_id,
-                    message="The current YouTube Live Stream has ended. You can explore the buzz so far, but replies are disabled. Start a new stream anytime!",
-                )
-                break
-            else:
-                print(
-                    f"Attempt {attempt + 1}: {response.status_code=}\nBody="
-                    f"{response.json()}. Retrying..."
-                )
-
-        except requests.exceptions.RequestException as e:
-            # Log the exception
-            print(
-                f"Error>> {str(e)}\nAttempt {attempt + 1}: {response.status_code=}\n"
-                f"body={response.json()}. Retrying..."
-            )
-
-        # Retry after a short delay
-        time.sleep(2)
-
-    # If all attempts fail
-    raise HTTPError("All API keys failed, maximum retries reached or bad request.")
+    return await _request_with_retries(
+        "GET",
+        url,
+        params,
+        use_keys,
+        quota_cost,
+        session_id=session_id,
+        retry_policy=retry_policy,
+    )
 
 
 @log_method
@@ -321,7 +441,7 @@ async def deactivate_stream(session_id: str, message: str = None) -> None:
         await supabase_util.deactivate_replies(session_id)
         if message:
             # Store agent's response
-            await supabase_util.store_message(
+            message_writer.enqueue(
                 session_id=session_id,
                 message_type="ai",
                 content=message,
@@ -350,9 +470,7 @@ async def deactivate_session(session_id: str) -> None:
     """
     try:
         await deactivate_stream(session_id)
-        await supabase_util.update_buzz_status_by_session_id(
-            session_id, BuzzStatusEnum.INACTIVE.value
-        )
+        await get_buzz_queue().retire_session(session_id)
     except Exception as e:
         print(f"Error>> deactivate_session: {session_id=}\n{str(e)}")
         raise
@@ -360,12 +478,14 @@ async def deactivate_session(session_id: str) -> None:
 
 @log_method
 async def get_live_chat_messages(session_id: str, live_chat_id: str,
-                                 next_chat_page: str) -> list:
+                                 next_chat_page: str) -> Tuple[list, Optional[int]]:
     """
     Retrieves live chat messages from YouTube using the Live Chat API.
 
     This function fetches live chat messages from a specified YouTube live chat,
-    formats the messages, and updates the next page token.
+    formats the messages, and updates the next page token. It also returns the
+    `pollingIntervalMillis` YouTube asks clients to wait before the next poll.
+    Retries follow `YOUTUBE_POLL_RETRY_POLICY`, so the poll fits in a read tick.
 
     Args:
         session_id (str): The session ID associated with the request.
@@ -373,8 +493,9 @@ async def get_live_chat_messages(session_id: str, live_chat_id: str,
         next_chat_page (str): The token for the next page of chat messages.
 
     Returns:
-        list: A list of dictionaries, where each dictionary represents a chat
-              message with 'original_chat' and 'author' keys.
+        Tuple[list, Optional[int]]: A list of dictionaries, where each dictionary
+              represents a chat message with 'original_chat' and 'author' keys,
+              and the polling interval in milliseconds, if YouTube returned one.
 
     Raises:
         Exception: If there's an error during the API request or data processing.
@@ -388,6 +509,8 @@ async def get_live_chat_messages(session_id: str, live_chat_id: str,
         params=params,
         session_id=session_id,
         use_keys=True,
+        quota_cost=YOUTUBE_LIVE_CHAT_LIST_COST,
+        retry_policy=YOUTUBE_POLL_RETRY_POLICY,
     )
 
     # Extract chats as a list of dictionaries with updated displayName formatting
@@ -425,4 +548,4 @@ async def get_live_chat_messages(session_id: str, live_chat_id: str,
     next_chat_page = live_chat_response.get("nextPageToken", "")
     await supabase_util.update_next_chat_page(live_chat_id, next_chat_page)
 
-    return chats
+    return chats, live_chat_response.get("pollingIntervalMillis")